@@ -0,0 +1,66 @@
+"""
+Benchmark de concurrencia de /api/chat con un LLM simulado.
+
+Compara el camino antiguo (endpoint async que llama al responder() síncrono y bloquea
+el event loop) con el nuevo aresponder() asíncrono, lanzando N peticiones concurrentes
+en un único event loop, igual que haría un worker de uvicorn.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_async_chat --requests 200 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from benchmarks.stub_llm import install_stub  # noqa: E402
+
+MESSAGE = "¿Cuál es el correo del abonado 12345678A?"
+
+
+async def _blocking_chat(i):
+    # Reproduce el endpoint anterior: async def que llama a código síncrono
+    return agent.responder(MESSAGE, "admin", "rigido", session_id=f"sync-{i}")
+
+
+async def _async_chat(i):
+    # Una sesión por petición, como /api/chat: los turnos de una misma sesión van en orden
+    return await agent.aresponder(MESSAGE, "admin", "rigido", session_id=f"async-{i}")
+
+
+async def _run(handler, n):
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(i) for i in range(n)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="Peticiones concurrentes")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia simulada por llamada al LLM (s)")
+    args = parser.parse_args()
+
+    install_stub(agent.orchestrator, latency=args.latency)
+    results = {}
+    for label, handler in (("sync_responder", _blocking_chat), ("aresponder", _async_chat)):
+        elapsed = asyncio.run(_run(handler, args.requests))
+        results[label] = {
+            "requests": args.requests,
+            "seconds": round(elapsed, 3),
+            "req_per_s": round(args.requests / elapsed, 1),
+        }
+    results["speedup"] = round(results["aresponder"]["req_per_s"] / results["sync_responder"]["req_per_s"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Benchmark de acceso a base de datos del backend de herramientas.
+
+Levanta con uvicorn (en un proceso aparte) tres variantes de la misma aplicación, cada una
+sobre una copia temporal de demo.db con las mismas migraciones e índices. Solo cambia la
+forma de abrir y ejecutar las consultas:
+- "fresh_loop": endpoints async que abren una conexión sqlite3 nueva por consulta y la
+  ejecutan en el event loop (el backend anterior).
+- "pool_loop": endpoints async con el ConnectionPool de core/backend/db.py.
+- "pool_threadpool": endpoints síncronos con el ConnectionPool, que FastAPI ejecuta en
+  su threadpool (como core/backend/server.py).
+
+Se mide:
+- query_us: coste por consulta en proceso, conexión nueva frente a conexión del pool.
+- req_per_s: peticiones por segundo de /datos_abonado y /todas_las_facturas (consultas
+  por índice, baratas) con clientes concurrentes.
+- report: un informe que recorre toda la tabla de facturas (/resumen_facturas) con pocos
+  clientes y, mientras dura, la latencia de /herramientas_disponibles (sin base de datos).
+  Con la consulta en el event loop, cualquier otra petición espera a que termine; en el
+  threadpool, sqlite3 libera el GIL mientras ejecuta y el event loop sigue atendiendo.
+
+Con --facturas se añaden filas a las copias para que las consultas pesen más que el
+framework HTTP.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_backend_db --requests 2000 --concurrency 50 --facturas 200000
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from fastapi import Body, FastAPI
+from pydantic import BaseModel
+from typing import Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+DEMO_DB = os.path.join(ROOT, "core", "backend", "demo.db")
+DNI = "12345678A"
+VARIANTS = ("fresh_loop", "pool_loop", "pool_threadpool")
+
+
+def variant_app():
+    """
+    Factoría de uvicorn: la variante BENCH_VARIANT de /datos_abonado, /todas_las_facturas,
+    /resumen_facturas y /herramientas_disponibles.
+    """
+    from core.backend.db import ConnectionPool
+
+    db_path = os.environ["DB_PATH"]
+    variant = os.environ["BENCH_VARIANT"]
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def log_requests(request, call_next):
+        # Mismo middleware en las tres variantes
+        response = await call_next(request)
+        logging.info(f"{request.method} {request.url} - Status: {response.status_code}")
+        return response
+
+    if variant == "fresh_loop":
+        def run_query(query, params=()):
+            with sqlite3.connect(db_path) as conn:
+                return conn.execute(query, params).fetchall()
+    else:
+        run_query = ConnectionPool(db_path).run_query
+
+    def endpoint(func):
+        # En el threadpool, la función síncrona tal cual; si no, envuelta en una corrutina
+        if variant == "pool_threadpool":
+            return func
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+        return wrapper
+
+    class DatosAbonadoInput(BaseModel):
+        dni: Optional[str] = None
+        poliza: Optional[str] = None
+
+    @app.post("/datos_abonado")
+    @endpoint
+    def datos_abonado(data: DatosAbonadoInput):
+        result = run_query(
+            "SELECT nombre, dni, direccion, email, telefono, poliza FROM abonados WHERE dni = ?", (data.dni,)
+        )
+        return dict(zip(["nombre", "dni", "direccion", "correo", "telefono", "poliza"], result[0])) if result else {}
+
+    @app.post("/todas_las_facturas")
+    @endpoint
+    def todas_las_facturas(dni: str = Body(..., embed=True)):
+        result = run_query(
+            "SELECT id,fecha, estado, importe FROM facturas WHERE dni_abonado = ? ORDER BY fecha DESC", (dni,)
+        )
+        return {"facturas": [{"identificador": r[0], "fecha": r[1], "estado": r[2], "importe": r[3]} for r in result]}
+
+    @app.post("/resumen_facturas")
+    @endpoint
+    def resumen_facturas():
+        result = run_query(
+            "SELECT estado, COUNT(*), ROUND(SUM(importe), 2) FROM facturas WHERE importe >= 0 GROUP BY estado"
+        )
+        return {"resumen": [{"estado": r[0], "facturas": r[1], "importe": r[2]} for r in result]}
+
+    @app.get("/herramientas_disponibles")
+    async def herramientas_disponibles():
+        return [{"endpoint": "/datos_abonado"}, {"endpoint": "/todas_las_facturas"}]
+
+    return app
+
+
+def _seed(db_path, facturas):
+    from core.backend.migrations import migrate
+
+    # Facturas de otros abonados: no cambian las respuestas, solo el tamaño de la tabla
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO facturas (dni_abonado, fecha, estado, importe) VALUES (?, '2024-01-01', 'Pagado', 10.0)",
+            ((f"{i:08d}X",) for i in range(facturas))
+        )
+    migrate(db_path)
+
+
+def _query_us(db_path, calls=2000):
+    from core.backend.db import ConnectionPool
+    query = "SELECT id,fecha, estado, importe FROM facturas WHERE dni_abonado = ? ORDER BY fecha DESC"
+
+    def fresh_connection():
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute(query, (DNI,)).fetchall()
+
+    pool = ConnectionPool(db_path)
+    results = {}
+    for label, fn in (("fresh", fresh_connection), ("pool", lambda: pool.run_query(query, (DNI,)))):
+        fn()
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        results[label] = round((time.perf_counter() - start) / calls * 1e6, 1)
+    pool.close()
+    return results
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(variant, db_path):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "benchmarks.bench_backend_db:variant_app", "--factory",
+           "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--timeout-keep-alive", "60"]
+    process = subprocess.Popen(cmd, env={**os.environ, "DB_PATH": db_path, "BENCH_VARIANT": variant})
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(base_url + "/docs")
+            break
+        except httpx.TransportError:
+            time.sleep(0.1)
+    return process, base_url
+
+
+async def _load(base_url, path, requests, concurrency, probe=False):
+    """
+    Returns:
+        tuple: (peticiones por segundo, latencias en ms de /herramientas_disponibles
+        durante la carga, o None sin probe).
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        await client.post(path, json={"dni": DNI})  # calentamiento
+        semaphore = asyncio.Semaphore(concurrency)
+        done = asyncio.Event()
+
+        async def one():
+            async with semaphore:
+                r = await client.post(path, json={"dni": DNI})
+                r.raise_for_status()
+
+        async def probe_latency():
+            latencies = []
+            async with httpx.AsyncClient(base_url=base_url, timeout=None) as probe_client:
+                while not done.is_set():
+                    start = time.perf_counter()
+                    (await probe_client.get("/herramientas_disponibles")).raise_for_status()
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    await asyncio.sleep(0.01)
+            return latencies
+
+        probe_task = asyncio.create_task(probe_latency()) if probe else None
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        req_per_s = round(requests / (time.perf_counter() - start), 1)
+        done.set()
+        return req_per_s, (await probe_task if probe_task else None)
+
+
+def _percentiles(latencies):
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--facturas", type=int, default=0, help="Facturas extra a sembrar en las copias")
+    parser.add_argument("--report-requests", type=int, default=100, help="Peticiones del informe")
+    parser.add_argument("--report-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_db_")
+    req_per_s = {}
+    report = {}
+    try:
+        for variant in VARIANTS:
+            db_path = os.path.join(tmp, f"{variant}.db")
+            shutil.copy(DEMO_DB, db_path)
+            _seed(db_path, args.facturas)
+            process, base_url = _serve(variant, db_path)
+            try:
+                req_per_s[variant] = {
+                    path: asyncio.run(_load(base_url, path, args.requests, args.concurrency))[0]
+                    for path in ("/datos_abonado", "/todas_las_facturas")
+                }
+                report_rps, latencies = asyncio.run(
+                    _load(base_url, "/resumen_facturas", args.report_requests, args.report_concurrency, probe=True)
+                )
+                report[variant] = {"req_per_s": report_rps, "probe_latency": _percentiles(latencies)}
+            finally:
+                process.terminate()
+                process.wait()
+        query_us = _query_us(db_path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(json.dumps({
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "facturas_extra": args.facturas,
+        "cpus": len(os.sched_getaffinity(0)),
+        "query_us": query_us,
+        "req_per_s": req_per_s,
+        "report": report,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Lotes de mensajes: una llamada a aresponder() por mensaje frente a BatchRunner.
+
+Genera un lote de mensajes sin sesión (plantillas de consultas de facturas, datos e
+incidencias sobre un conjunto acotado de DNIs, así que muchos se repiten, como en una
+re-ejecución de QA o una clasificación nocturna) y lo procesa en proceso, con el
+FakeProvider (latencias del guion) y un backend simulado de 5 ms:
+  - individual: cada mensaje con aresponder(), con la misma concurrencia y las cachés
+    activadas pero sin agrupar llamadas simultáneas (como antes de /api/chat/batch).
+  - batch:        BatchRunner sin deduplicar mensajes, con InFlight agrupando las
+    consultas al router y las herramientas cacheables idénticas simultáneas.
+  - batch_dedupe: BatchRunner deduplicando además los mensajes idénticos (opción de
+    BATCH_DEDUPE, segura aquí porque el lote solo tiene consultas).
+Cada variante usa un orquestador nuevo (cachés vacías). Se informa del tiempo total,
+mensajes por segundo, llamadas al modelo y llamadas al backend.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_batch --items 2000 --dnis 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("CONFIG_RELOAD", "false")
+
+from benchmarks.bench_providers import _install  # noqa: E402
+from benchmarks.seed_db import dni_for  # noqa: E402
+
+SCRIPT = "benchmarks/fake_llm_script.json"
+TEMPLATES = [
+    "¿Cuánto debo? Mi DNI es {dni}",
+    "Quiero ver mis facturas, DNI {dni}",
+    "¿Cuál es el correo del abonado {dni}?",
+    "¿Qué incidencias tiene el {dni}?",
+    "¿Cuál fue mi último pago? {dni}",
+]
+
+
+def build(batch):
+    """
+    Returns:
+        tuple: (orquestador con FakeProvider y backend simulado, proveedor, contador de
+        llamadas al backend). Sin `batch`, las llamadas simultáneas no se agrupan.
+    """
+    from core.agent import agent
+    from core.agent.providers import FakeProvider
+
+    with open(SCRIPT, encoding="utf-8") as f:
+        script = json.load(f)
+    orchestrator = agent.build_orchestrator(agent.session_store)
+    provider = FakeProvider(script)
+    _install(orchestrator, provider)
+    backend_calls = [0]
+
+    async def endpoint(http_info, args):
+        backend_calls[0] += 1
+        await asyncio.sleep(0.005)
+        return {"ok": True, "dni": args.get("dni")}
+
+    async def direct(key, factory):
+        return await factory()
+
+    for target in orchestrator.agents:
+        target._acall_tool_endpoint = endpoint
+        if not batch:
+            target.tool_inflight = None
+    if not batch:
+        orchestrator.router_inflight.run = direct
+    return orchestrator, provider, backend_calls
+
+
+def make_items(n, dnis, seed_value):
+    rng = random.Random(seed_value)
+    return [
+        {"id": i, "message": rng.choice(TEMPLATES).format(dni=dni_for(rng.randrange(dnis))), "user_role": "admin"}
+        for i in range(n)
+    ]
+
+
+async def run_individual(orchestrator, items, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(item):
+        async with semaphore:
+            await orchestrator.aresponder(item["message"], item["user_role"], item["mode"], session_id=f"i-{item['id']}")
+
+    await asyncio.gather(*(one(item) for item in items))
+
+
+async def run_batch(orchestrator, items, concurrency, dedupe):
+    from core.agent.batch import BatchRunner
+
+    async def respond(message, user_role, mode, session_id):
+        return await orchestrator.aresponder(message, user_role, mode, session_id=session_id)
+
+    runner = BatchRunner(respond, concurrency=concurrency, dedupe=dedupe)
+    async for _ in runner.run(items):
+        pass
+    return runner.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--dnis", type=int, default=200, help="DNIs distintos en el lote")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from core.agent.batch import normalize_items
+
+    items = normalize_items(make_items(args.items, args.dnis, args.seed))
+    distinct = len({(item["message"], item["user_role"], item["mode"]) for item in items})
+    results = {}
+    for label in ("individual", "batch", "batch_dedupe"):
+        orchestrator, provider, backend_calls = build(batch=label != "individual")
+        start = time.perf_counter()
+        if label == "individual":
+            asyncio.run(run_individual(orchestrator, items, args.concurrency))
+            stats = None
+        else:
+            stats = asyncio.run(run_batch(orchestrator, items, args.concurrency, dedupe=label == "batch_dedupe"))
+        elapsed = time.perf_counter() - start
+        results[label] = {
+            "elapsed_s": round(elapsed, 2),
+            "items_per_s": round(len(items) / elapsed, 1),
+            "llm_calls": provider.calls,
+            "backend_calls": backend_calls[0],
+            "coalesced": orchestrator.get_stats()["coalesced"],
+            "batch": stats,
+        }
+    print(json.dumps({
+        "meta": {"items": len(items), "distinct_messages": distinct, "dnis": args.dnis, "concurrency": args.concurrency},
+        "results": results,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark de la recarga en caliente de client_config bajo carga.
+
+Lanza peticiones concurrentes contra aresponder() con un LLM simulado y, en una
+segunda fase, modifica agents_config.json (en una copia temporal de client_config)
+cada --reload-every segundos mientras ConfigReloader vigila la carpeta. Informa del
+coste de reconstruir la configuración, de la latencia del swap, de las peticiones que
+empezaron con un orquestador y terminaron tras publicarse otro, y de los percentiles
+de latencia con y sin recargas. Ninguna petición debe fallar.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_config_reload --duration 5 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from core.agent.config_reloader import ConfigReloader  # noqa: E402
+from benchmarks.stub_llm import install_stub  # noqa: E402
+
+MESSAGE = "¿Qué datos tengo registrados?"
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)  # noqa: E731
+    return {"requests": len(ordered), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+async def _load(duration, concurrency):
+    latencies, errors, crossed = [], [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(i):
+        nonlocal crossed
+        while time.perf_counter() < deadline:
+            # Igual que agent.aresponder(): el orquestador se lee una vez al empezar
+            orchestrator = agent.orchestrator
+            start = time.perf_counter()
+            try:
+                await orchestrator.aresponder(MESSAGE, "admin", "rigido", session_id=f"bench-{i}")
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            latencies.append(time.perf_counter() - start)
+            if agent.orchestrator is not orchestrator:
+                crossed += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, crossed
+
+
+def _touch_agents_config(config_dir, stop, every):
+    """Alterna el system_prompt del primer agente para forzar recargas reales."""
+    path = os.path.join(config_dir, "agents_config.json")
+    with open(path, encoding="utf-8") as f:
+        configs = json.load(f)
+    original = configs[0]["system_prompt"]
+    version = 0
+    while not stop.wait(every):
+        version += 1
+        configs[0]["system_prompt"] = f"{original} (v{version})"
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(configs, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por fase")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia por llamada al LLM (s)")
+    parser.add_argument("--reload-every", type=float, default=0.5, help="Segundos entre cambios de configuración")
+    args = parser.parse_args()
+
+    config_dir = tempfile.mkdtemp(prefix="client_config_")
+    shutil.copytree("client_config", config_dir, dirs_exist_ok=True)
+    install_stub(agent.orchestrator, latency=args.latency)
+    build = lambda: agent.build_orchestrator(agent.session_store, config_dir=config_dir, previous=agent.orchestrator)  # noqa: E731
+    agent._swap_orchestrator(build())
+
+    build_ms = []
+
+    def timed_build():
+        start = time.perf_counter()
+        new = build()
+        build_ms.append((time.perf_counter() - start) * 1000)
+        return new
+
+    swap_us = []
+
+    def timed_swap(new):
+        start = time.perf_counter()
+        agent._swap_orchestrator(new)
+        swap_us.append((time.perf_counter() - start) * 1e6)
+
+    try:
+        baseline, baseline_errors, _ = asyncio.run(_load(args.duration, args.concurrency))
+
+        reloader = ConfigReloader(config_dir, timed_build, timed_swap, interval=0.05, debounce=0.0).start()
+        stop = threading.Event()
+        writer = threading.Thread(target=_touch_agents_config, args=(config_dir, stop, args.reload_every), daemon=True)
+        writer.start()
+        during, during_errors, crossed = asyncio.run(_load(args.duration, args.concurrency))
+        stop.set()
+        writer.join()
+        reloader.stop()
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "reloads": reloader.reloads,
+        "reload_failures": reloader.failures,
+        "build_ms": {"mean": round(statistics.mean(build_ms), 2), "max": round(max(build_ms), 2)} if build_ms else None,
+        "swap_us": {"mean": round(statistics.mean(swap_us), 2), "max": round(max(swap_us), 2)} if swap_us else None,
+        "requests_in_flight_across_swap": crossed,
+        "errors": len(baseline_errors) + len(during_errors),
+        "without_reload": _percentiles(baseline),
+        "with_reload": _percentiles(during),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark de latencia de las consultas del backend según el tamaño de los datos.
+
+Para cada tamaño genera una base de datos con benchmarks/seed_db.py, apunta el pool de
+core.backend.server a ella y mide p50/p95 de los endpoints de consulta llamándolos
+directamente (sin HTTP) con DNIs aleatorios. Después elimina los índices de la
+migración y repite la medición, para comparar con el comportamiento anterior.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_db_scaling --sizes 10000,100000,1000000 --lookups 300
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from core.backend.db import ConnectionPool  # noqa: E402
+from core.backend.migrations import MIGRATIONS  # noqa: E402
+from benchmarks.seed_db import CIUDADES, dni_for, seed  # noqa: E402
+
+
+def _endpoints(server):
+    return {
+        "datos_abonado": lambda dni: server.datos_abonado(server.DatosAbonadoInput(dni=dni)),
+        "todas_las_facturas": lambda dni: server.todas_las_facturas(dni),
+        "ultimo_pago": lambda dni: server.ultimo_pago(dni),
+        "deuda_total": lambda dni: server.deuda_total(dni),
+        "facturas_pendientes": lambda dni: server.facturas_pendientes(dni),
+        "incidencias_por_dni": lambda dni: server.incidencias_por_dni(dni),
+        "actualizar_estado_incidencia": lambda dni: server.actualizar_estado_incidencia(dni, random.choice(CIUDADES), "Pendiente"),
+    }
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+    }
+
+
+def _measure(endpoints, abonados, lookups):
+    results = {}
+    for name, call in endpoints.items():
+        samples = []
+        for _ in range(lookups):
+            dni = dni_for(random.randrange(abonados))
+            start = time.perf_counter()
+            call(dni)
+            samples.append(time.perf_counter() - start)
+        results[name] = _percentiles(samples)
+    return results
+
+
+def _drop_indexes(db_path):
+    pool = ConnectionPool(db_path)
+    for statements in MIGRATIONS:
+        for statement in statements:
+            index = statement.split("EXISTS ")[1].split(" ON ")[0]
+            pool.run_query(f"DROP INDEX IF EXISTS {index}", commit=True)
+    pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Abonados por base de datos")
+    parser.add_argument("--lookups", type=int, default=300, help="Consultas por endpoint y tamaño")
+    parser.add_argument("--unindexed-lookups", type=int, default=20, help="Consultas por endpoint sin índices")
+    args = parser.parse_args()
+
+    random.seed(0)
+    tmp = tempfile.mkdtemp(prefix="bench_scaling_")
+    report = {}
+    try:
+        # El servidor migra DB_PATH al importarse: se apunta a una base de datos desechable
+        os.environ["DB_PATH"] = os.path.join(tmp, "import.db")
+        from core.backend import server
+        endpoints = _endpoints(server)
+        for size in (int(s) for s in args.sizes.split(",")):
+            db_path = os.path.join(tmp, f"{size}.db")
+            seeded = seed(db_path, size)
+            server.db_pool = ConnectionPool(db_path)
+            indexed = _measure(endpoints, size, args.lookups)
+            server.db_pool.close()
+            _drop_indexes(db_path)
+            server.db_pool = ConnectionPool(db_path)
+            unindexed = _measure(endpoints, size, args.unindexed_lookups)
+            server.db_pool.close()
+            report[size] = {"rows": seeded["rows"], "indexed": indexed, "unindexed": unindexed}
+            os.remove(db_path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Prueba de carga de extremo a extremo del pipeline de chat.
+
+Siembra una base de datos SQLite, levanta core/backend/server.py y web/main.py (cada uno
+en su proceso, con uvicorn) con el proveedor de modelos simulado (LLM_PROVIDER=fake y un
+guion con latencias log-normales) y recorre con usuarios concurrentes el corpus de
+conversaciones de e2e_corpus.json (roles, modos, agentes y tool calls variados) contra
+/api/chat. Informa de:
+  - latencia p50/p95/p99 (total y por conversación) y peticiones por segundo,
+  - tiempo medio por turno de cada etapa (extracción, intenciones, enrutado, agente,
+    herramientas, middleware), a partir de "stages" de /api/stats,
+  - memoria (RSS y pico) de los dos procesos.
+El resultado se guarda en JSON (por defecto en data/benchmarks/e2e-<commit>.json); con
+--compare se muestran las diferencias frente a otro resultado, p. ej. de otro commit.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_e2e --users 200 --concurrency 20
+    python -m benchmarks.bench_e2e --compare data/benchmarks/e2e-abc1234.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from benchmarks.seed_db import dni_for, seed  # noqa: E402
+
+CORPUS = "benchmarks/e2e_corpus.json"
+LLM_SCRIPT = "benchmarks/e2e_llm_script.json"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(app, env, health_path, extra_args=()):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning", "--timeout-keep-alive", "60", *extra_args]
+    process = subprocess.Popen(cmd, env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            httpx.get(base_url + health_path)
+            return process, base_url, port
+        except httpx.TransportError:
+            if process.poll() is not None:
+                raise RuntimeError(f"{app} terminó al arrancar")
+            time.sleep(0.1)
+    raise RuntimeError(f"{app} no responde")
+
+
+def _memory(pid):
+    """RSS actual y pico (MB) del proceso, de /proc/<pid>/status."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        return None
+    return {"rss_mb": values.get("VmRSS"), "peak_rss_mb": values.get("VmHWM")}
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1)
+
+    return {"count": len(ordered), "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+            "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+async def _run_users(base_url, conversations, users, concurrency, abonados, seed_value):
+    rng = random.Random(seed_value)
+    plan = [(rng.choice(conversations), dni_for(rng.randrange(abonados))) for _ in range(users)]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies, by_conversation, errors = [], {}, {"http": 0, "response": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def user(i, conversation, dni):
+            async with semaphore:
+                session_id = f"e2e-{i}"
+                for turn in conversation["turns"]:
+                    body = {"message": turn.format(dni=dni), "user_role": conversation["role"],
+                            "mode": conversation["mode"], "session_id": session_id}
+                    start = time.perf_counter()
+                    r = await client.post("/api/chat", json=body)
+                    elapsed = time.perf_counter() - start
+                    if r.status_code != 200:
+                        errors["http"] += 1
+                        continue
+                    errors["response"] += r.json().get("type") == "error"
+                    latencies.append(elapsed)
+                    by_conversation.setdefault(conversation["name"], []).append(elapsed)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(i, c, dni) for i, (c, dni) in enumerate(plan)))
+        elapsed = time.perf_counter() - start
+    return latencies, by_conversation, errors, elapsed
+
+
+def _stage_delta(before, after, turns):
+    stages = {}
+    for name, data in after.items():
+        prev = before.get(name, {"count": 0, "total_ms": 0.0})
+        total = data["total_ms"] - prev["total_ms"]
+        stages[name] = {
+            "per_turn_ms": round(total / turns, 2) if turns else 0.0,
+            "calls": data["count"] - prev["count"],
+        }
+    return stages
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _compare(current, baseline):
+    """Diferencias de las métricas principales (actual - referencia)."""
+    def delta(a, b):
+        if a is None or b is None:
+            return None
+        return {"baseline": b, "current": a, "change_pct": round((a - b) / b * 100, 1) if b else None}
+
+    cur, base = current["results"], baseline["results"]
+    report = {"baseline_commit": baseline["meta"]["commit"], "current_commit": current["meta"]["commit"]}
+    report["req_per_s"] = delta(cur["req_per_s"], base["req_per_s"])
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        report[key] = delta(cur["latency"].get(key), base["latency"].get(key))
+    report["stages_per_turn_ms"] = {
+        name: delta(data["per_turn_ms"], base["stages"].get(name, {}).get("per_turn_ms"))
+        for name, data in cur["stages"].items()
+    }
+    report["peak_rss_mb"] = {
+        proc: delta((cur["memory"].get(proc) or {}).get("peak_rss_mb"), (base["memory"].get(proc) or {}).get("peak_rss_mb"))
+        for proc in cur["memory"]
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="Conversaciones a reproducir")
+    parser.add_argument("--concurrency", type=int, default=20, help="Conversaciones simultáneas")
+    parser.add_argument("--abonados", type=int, default=10_000, help="Abonados de la base de datos sembrada")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-script", default=LLM_SCRIPT)
+    parser.add_argument("--output", help="Fichero JSON de resultados (por defecto data/benchmarks/e2e-<commit>.json)")
+    parser.add_argument("--compare", help="Resultado anterior con el que comparar")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding="utf-8") as f:
+        conversations = json.load(f)["conversations"]
+
+    tmp = tempfile.mkdtemp(prefix="bench_e2e_")
+    processes = []
+    try:
+        db_path = os.path.join(tmp, "e2e.db")
+        seeded = seed(db_path, args.abonados, seed_value=args.seed)
+        backend, _, backend_port = _serve("core.backend.server:app", {"DB_PATH": db_path}, "/docs")
+        processes.append(backend)
+        web, web_url, _ = _serve("web.main:app", {
+            "LLM_PROVIDER": "fake",
+            "LLM_FAKE_SCRIPT": args.llm_script,
+            "BACKEND_HOST": "127.0.0.1",
+            "BACKEND_PORT": str(backend_port),
+            "SESSION_BACKEND": "memory",
+            "CONFIG_RELOAD": "false",
+        }, "/api/health")
+        processes.append(web)
+
+        stats_before = httpx.get(web_url + "/api/stats").json()
+        latencies, by_conversation, errors, elapsed = asyncio.run(
+            _run_users(web_url, conversations, args.users, args.concurrency, args.abonados, args.seed)
+        )
+        stats_after = httpx.get(web_url + "/api/stats").json()
+        memory = {"web": _memory(web.pid), "backend": _memory(backend.pid)}
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    turns = len(latencies)
+    commit = _git_commit()
+    result = {
+        "meta": {
+            "commit": commit,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "abonados": seeded["rows"]["abonados"],
+            "llm_script": args.llm_script,
+        },
+        "results": {
+            "turns": turns,
+            "errors": errors,
+            "elapsed_s": round(elapsed, 2),
+            "req_per_s": round(turns / elapsed, 2),
+            "latency": _percentiles(latencies),
+            "by_conversation": {name: _percentiles(values) for name, values in sorted(by_conversation.items())},
+            "stages": _stage_delta(stats_before.get("stages", {}), stats_after.get("stages", {}), turns),
+            "memory": memory,
+            "llm_requests": stats_after["llm"]["requests"] - stats_before["llm"]["requests"],
+        },
+    }
+
+    output = args.output or os.path.join("data", "benchmarks", f"e2e-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"\nResultado guardado en {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(json.dumps(_compare(result, baseline), indent=2))
+
+
+if __name__ == "__main__":
+    main()
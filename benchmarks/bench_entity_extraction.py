@@ -0,0 +1,115 @@
+"""
+Micro-benchmark de extracción de entidades y resolución de referencias.
+
+Compara el método anterior (re.search con el patrón en texto por cada entidad y cada
+referencia, con los ".*" de reference_map.json) con EntityEngine (una sola pasada
+precompilada) sobre un corpus de mensajes reales de clientes, y comprueba que ambos
+extraen exactamente las mismas entidades.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_entity_extraction --iterations 2000
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from core.agent.tools.entity_engine import EntityEngine  # noqa: E402
+
+# reference_map.json tal y como estaba antes de quitar los ".*"
+LEGACY_REFERENCE_MAP = {
+    ".*abonado.*": "dni",
+    ".*cliente.*": "dni",
+    ".*su dirección.*|.*dirección del abonado.*": "direccion",
+    ".*su teléfono.*|.*teléfono del abonado.*": "telefono",
+    ".*el clima.*|.*el tiempo.*|.*weather.*": "direccion",
+}
+
+CORPUS = [
+    "Hola, buenos días. Quería saber cuánto debo, mi DNI es 12345678A.",
+    "¿Me puedes decir las facturas pendientes del abonado 87654321b?",
+    "Necesito el último pago de la póliza POL123, por favor.",
+    "Buenas tardes, tengo un corte de luz en Madrid desde esta mañana y nadie me da solución, el código postal es 28013 y mi teléfono 612345678.",
+    "Marca la factura 42 como pagada para el cliente 12345678A",
+    "¿Cuál es su dirección? Es para enviarle la documentación.",
+    "quiero cambiar el estado de la incidencia de Valencia a resuelto",
+    "¿Qué tiempo hace en la dirección del abonado?",
+    "Hola",
+    "Llevo tres meses pagando de más. He revisado las facturas 17, 18 y 19 y todas tienen el mismo importe incorrecto. Mi póliza es POL456 y el DNI 87654321B. ¿Podéis revisarlo y llamarme al 698765432?",
+    "dame el teléfono del abonado con póliza POL789",
+    "no me funciona el contador, estoy en el 46001",
+]
+
+
+class LegacyExtractor:
+    """Réplica de ContextManager.extract_and_update()/resolve_reference() anteriores."""
+    def __init__(self, patterns, reference_map):
+        self.patterns = patterns
+        self.reference_map = reference_map
+
+    def extract(self, text):
+        context = {}
+        for entity, pattern in self.patterns.items():
+            flags = re.IGNORECASE if entity == "dni" else 0
+            match = re.search(pattern, text, flags)
+            if match:
+                value = match.group()
+                if entity == "dni":
+                    value = value[:-1] + value[-1].upper()
+                context[entity] = value
+        return context
+
+    def resolve_reference(self, text, context):
+        for ref_pattern, entity in self.reference_map.items():
+            if re.search(ref_pattern, text, re.IGNORECASE) and entity in context:
+                return {entity: context[entity]}
+        return {}
+
+
+def _per_message_us(extractor, iterations):
+    context = {"dni": "12345678A", "direccion": "Calle Falsa 123", "telefono": "612345678"}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in CORPUS:
+            extractor.extract(text)
+            extractor.resolve_reference(text, context)
+    return round((time.perf_counter() - start) / (iterations * len(CORPUS)) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open("client_config/entity_patterns.json", encoding="utf-8") as f:
+        patterns = json.load(f)
+    legacy = LegacyExtractor(patterns, LEGACY_REFERENCE_MAP)
+    engine = EntityEngine.from_files("client_config/entity_patterns.json", "client_config/reference_map.json")
+
+    context = {"dni": "12345678A", "direccion": "Calle Falsa 123"}
+    mismatches = [
+        text for text in CORPUS
+        if legacy.extract(text) != engine.extract(text)
+        or legacy.resolve_reference(text, context) != engine.resolve_reference(text, context)
+    ]
+    legacy_us = _per_message_us(legacy, args.iterations)
+    engine_us = _per_message_us(engine, args.iterations)
+    print(json.dumps({
+        "messages": len(CORPUS),
+        "iterations": args.iterations,
+        "legacy_us_per_message": legacy_us,
+        "engine_us_per_message": engine_us,
+        "speedup": round(legacy_us / engine_us, 2),
+        "mismatches": mismatches,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark del atajo por plantillas del modo flexible.
+
+Pasa por ControlMiddleware.aprocess() un corpus de respuestas de agente con resultados
+de herramientas típicos (un solo dato, listas, varios campos, varias herramientas) con
+un LLM simulado, con response_templates.json activado y desactivado. Informa de las
+reescrituras evitadas, de las llamadas al LLM y de la latencia por turno.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_flexible_templates --latency 0.3 --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from benchmarks.stub_llm import AsyncStubLLM  # noqa: E402
+
+DNI = {"dni": "12345678A"}
+
+
+def _result(tool, response, params=DNI):
+    return {"tool": tool, "params": params, "response": response}
+
+
+# (consulta, resultados de las tool calls del turno)
+CORPUS = [
+    ("¿Cuánto debo?", [_result("deuda_total", {"deuda": 0})]),
+    ("¿Existe el abonado 12345678A?", [_result("existe_abonado", {"existe": True})]),
+    ("¿Dónde vive?", [_result("direccion_abonado", {"direccion": "Calle Mayor 1"})]),
+    ("¿Cuál fue mi último pago?", [_result("ultimo_pago", {"ultimo_pago": {"fecha": "2024-05-01", "importe": 60.0}})]),
+    ("Abre una incidencia por avería", [_result("crear_incidencia", {"message": "Incidencia creada exitosamente para el abonado con DNI 12345678A"})]),
+    ("Dame mis facturas", [_result("todas_las_facturas", {"facturas": [
+        {"identificador": i, "fecha": "2024-01-01", "estado": "Pagado", "importe": 50.0} for i in range(8)
+    ]})]),
+    ("¿Cuál es mi correo?", [_result("datos_abonado", {
+        "nombre": "Juan Pérez", "dni": "12345678A", "direccion": "Calle Mayor 1",
+        "correo": "juan@example.com", "telefono": "612345678", "poliza": "POL123"})]),
+    ("¿Cuánto debo y cuál fue mi último pago?", [
+        _result("deuda_total", {"deuda": 120.5}),
+        _result("ultimo_pago", {"ultimo_pago": None}),
+    ]),
+]
+
+
+async def _run(middleware, rounds):
+    latencies = []
+    for _ in range(rounds):
+        for consulta, results in CORPUS:
+            start = time.perf_counter()
+            await middleware.aprocess(consulta, "admin", "flexible", [],
+                                      {"type": "tool_calls", "agent": "bench", "results": results})
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="Latencia de la reescritura con el LLM (s)")
+    args = parser.parse_args()
+
+    middleware = agent.orchestrator.middleware
+    templates = middleware.templates
+    results = {}
+    for label, enabled in (("always_llm", False), ("templates", True)):
+        middleware.async_client = AsyncStubLLM(args.latency)
+        templates.enabled = enabled
+        templates.local = templates.llm = 0
+        latencies = asyncio.run(_run(middleware, args.rounds))
+        results[label] = {
+            "turns": len(latencies),
+            "rendered_locally": templates.local,
+            "llm_calls": middleware.async_client.chat.completions.calls,
+            "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark del cliente HTTP de herramientas.
+
+Levanta un servidor HTTP/1.1 local mínimo y compara la latencia por llamada de
+requests.post() sin sesión (una conexión TCP nueva por llamada, el comportamiento
+anterior) con ToolHttpClient (pool keep-alive), en síncrono y asíncrono.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_http_pool --calls 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.agent.tools.http_client import ToolHttpClient  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # cabeceras y cuerpo van en escrituras separadas
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"deuda": 0}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _per_call_ms(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return round((time.perf_counter() - start) / calls * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/deuda_total"
+    payload = {"dni": "12345678A"}
+
+    client = ToolHttpClient()
+    bare_ms = _per_call_ms(lambda: requests.post(url, json=payload).json(), args.calls)
+    pooled_ms = _per_call_ms(lambda: client.request("POST", url, payload), args.calls)
+
+    async def _async_calls():
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            await client.arequest("POST", url, payload)
+        return round((time.perf_counter() - start) / args.calls * 1000, 3)
+
+    async_pooled_ms = asyncio.run(_async_calls())
+    server.shutdown()
+
+    print(json.dumps({
+        "calls": args.calls,
+        "bare_requests_ms_per_call": bare_ms,
+        "pooled_sync_ms_per_call": pooled_ms,
+        "pooled_async_ms_per_call": async_pooled_ms,
+        "pool_stats": client.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark de las plantillas de intención en modo rígido.
+
+Reproduce un corpus de turnos de soporte (consultas de un solo dato mezcladas con
+peticiones que necesitan al modelo) con un LLM simulado y el backend simulado, con
+intents.json activado y desactivado. Informa de cuántos turnos se sirven sin ninguna
+llamada al modelo, de las llamadas al LLM totales y de la latencia por turno.
+
+Antes comprueba que un DNI mal escrito en el mensaje (sin letra, con un dígito de menos o
+de más) no se sustituye por el DNI de la sesión (MALFORMED); si alguno se sirve con la
+plantilla, termina con error.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_intents --latency 0.2 --backend-latency 0.005
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from benchmarks.stub_llm import install_stub  # noqa: E402
+
+# Turnos de una misma conversación: el DNI del primer mensaje queda en la sesión
+CORPUS = [
+    "¿Cuál es la deuda del 12345678A?",
+    "¿Y cuál fue su último pago?",
+    "¿Existe el abonado 87654321B?",
+    "Dime la dirección del abonado",
+    "¿Cuánto debo? Mi DNI es 12345678A",
+    "Marca la factura 3 como pagada",
+    "Quiero abrir una incidencia por avería en Madrid",
+    "¿Qué tiempo hace en Calle Falsa 123?",
+    "¿Cuál es la deuda del 87654321B?",
+    "hola, ¿qué tal?",
+    "¿Cuál es la deuda del 12345678?",
+]
+
+# Mensajes con un DNI mal escrito: con otro DNI en la sesión, ninguno debe usar la plantilla
+MALFORMED = [
+    "¿Cuál es la deuda del 12345678?",
+    "¿Cuál es la deuda del 123456789?",
+    "¿Cuál es la deuda del 1234567A?",
+    "¿Cuál es la deuda del 123456789A?",
+]
+
+BACKEND = {
+    "deuda_total": {"deuda": 125.4},
+    "ultimo_pago": {"ultimo_pago": {"fecha": "2024-05-01", "importe": 60.0}},
+    "existe_abonado": {"existe": True},
+    "direccion_abonado": {"direccion": "Calle Mayor 1"},
+}
+
+
+def check_malformed(engine):
+    """
+    Raises:
+        SystemExit: Si algún mensaje de MALFORMED se resuelve con el DNI de la sesión.
+    """
+    session = {"dni": "87654321B"}
+    wrong = [message for message in MALFORMED if engine.match(message, session, "rigido")]
+    if wrong:
+        raise SystemExit(f"DNI de la sesión usado con un DNI mal escrito en el mensaje: {wrong}")
+
+
+def _stub_backend(orchestrator, latency):
+    async def endpoint(http_info, args):
+        await asyncio.sleep(latency)
+        return BACKEND.get(http_info["url"].rsplit("/", 1)[-1], {"ok": True})
+
+    for target in orchestrator.agents:
+        target._acall_tool_endpoint = endpoint
+
+
+async def _run(orchestrator, rounds, label):
+    latencies = []
+    for r in range(rounds):
+        for turn in CORPUS:
+            start = time.perf_counter()
+            await orchestrator.aresponder(turn, "admin", "rigido", session_id=f"{label}-{r}")
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="Pasadas sobre el corpus")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia por llamada al LLM (s)")
+    parser.add_argument("--backend-latency", type=float, default=0.005, help="Latencia del backend (s)")
+    args = parser.parse_args()
+
+    check_malformed(agent.build_orchestrator(agent.session_store).intent_engine)
+    results = {}
+    for label, enabled in (("without_intents", False), ("with_intents", True)):
+        orchestrator = agent.build_orchestrator(agent.session_store)
+        _, async_client = install_stub(orchestrator, latency=args.latency, router_answer="factura_agent")
+        _stub_backend(orchestrator, args.backend_latency)
+        orchestrator.tool_cache = None
+        for target in orchestrator.agents:
+            target.tool_cache = None
+        orchestrator.intent_engine.enabled = enabled
+        latencies = asyncio.run(_run(orchestrator, args.rounds, label))
+        turns = len(latencies)
+        local = orchestrator.intent_engine.stats()["local_turns"]
+        results[label] = {
+            "turns": turns,
+            "served_locally": local,
+            "local_rate": round(local / turns, 3),
+            "llm_calls": async_client.chat.completions.calls,
+            "llm_calls_per_turn": round(async_client.chat.completions.calls / turns, 2),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
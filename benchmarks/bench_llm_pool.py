@@ -0,0 +1,137 @@
+"""
+Benchmark del limitador compartido de llamadas al modelo ante ráfagas.
+
+Lanza una ráfaga de peticiones concurrentes contra un proveedor simulado que aplica sus
+propios límites (peticiones en curso y peticiones por minuto) y responde 429 al
+superarlos; el cliente reintenta los 429 con backoff exponencial, como el SDK de Groq.
+Compara las llamadas directas con las que pasan por LLMLimiter configurado con los
+mismos límites: 429 recibidos, peticiones fallidas, latencia p50/p95 y duración total.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_llm_pool --requests 400 --provider-rpm 300 --provider-concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent.llm_pool import LLMLimiter, LLMOverloaded  # noqa: E402
+from benchmarks.stub_llm import AsyncStubLLM  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "¿Cuál es el correo del abonado 12345678A?"}]
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class _Provider:
+    """Proveedor simulado con límite de concurrencia y RPM (cubo que se recarga de forma continua)."""
+    def __init__(self, latency, rpm, concurrency):
+        self.stub = AsyncStubLLM(latency).chat.completions
+        self.rpm = rpm
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.tokens = float(rpm)
+        self.updated = time.monotonic()
+        self.rejected = 0
+
+    async def create(self, **kwargs):
+        now = time.monotonic()
+        self.tokens = min(self.rpm, self.tokens + (now - self.updated) * self.rpm / 60)
+        self.updated = now
+        if self.in_flight >= self.concurrency or self.tokens < 1:
+            self.rejected += 1
+            raise RateLimited("429 Too Many Requests")
+        self.tokens -= 1
+        self.in_flight += 1
+        try:
+            return await self.stub.create(**kwargs)
+        finally:
+            self.in_flight -= 1
+
+
+class _RetryingClient:
+    """Reintentos de 429 con backoff exponencial (0.5 s, 1 s), como el SDK de Groq."""
+    def __init__(self, provider, max_retries=2):
+        self.provider = provider
+        self.max_retries = max_retries
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.provider.create(**kwargs)
+            except RateLimited:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+async def _burst(client, n):
+    latencies, failures, overloaded = [], 0, 0
+
+    async def one():
+        nonlocal failures, overloaded
+        start = time.perf_counter()
+        try:
+            await client.chat.completions.create(model="bench-model", messages=MESSAGES, max_completion_tokens=256)
+            latencies.append(time.perf_counter() - start)
+        except LLMOverloaded:
+            overloaded += 1
+        except RateLimited:
+            failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return latencies, failures, overloaded, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia del proveedor (s)")
+    parser.add_argument("--provider-rpm", type=int, default=300)
+    parser.add_argument("--provider-concurrency", type=int, default=20)
+    parser.add_argument("--queue-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    results = {}
+    for label in ("direct", "limiter"):
+        provider = _Provider(args.latency, args.provider_rpm, args.provider_concurrency)
+        client = _RetryingClient(provider)
+        limiter = None
+        if label == "limiter":
+            limiter = LLMLimiter({
+                "max_concurrency": args.provider_concurrency,
+                "rpm": args.provider_rpm,
+                "max_queue": args.requests,
+                "queue_timeout": args.queue_timeout,
+            })
+            client = limiter.wrap_async(client)
+        latencies, failures, overloaded, elapsed = asyncio.run(_burst(client, args.requests))
+        results[label] = {
+            "ok": len(latencies),
+            "failed_429": failures,
+            "rejected_overloaded": overloaded,
+            "provider_429": provider.rejected,
+            "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+            "p95_ms": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None,
+            "elapsed_s": round(elapsed, 2),
+            "limiter": limiter.stats() if limiter else None,
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
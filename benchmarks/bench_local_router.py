@@ -0,0 +1,70 @@
+"""
+Benchmark del enrutado local.
+
+Clasifica un corpus de consultas reales de clientes y mide el coste por consulta
+y qué fracción se resuelve sin llamar al router LLM.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_local_router --iterations 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+
+# (consulta, agente esperado o None si debe decidir el router LLM)
+CORPUS = [
+    ("¿Cuál es la deuda del 12345678A?", "factura_agent"),
+    ("facturas pendientes de 87654321B", "factura_agent"),
+    ("¿Cuándo fue el último pago de 12345678A?", "factura_agent"),
+    ("Marca la factura 3 como pagada", "factura_agent"),
+    ("Quiero abrir una incidencia por avería en Madrid", "incidencia_agent"),
+    ("¿Qué incidencias tiene Juan Pérez?", "incidencia_agent"),
+    ("Hay un corte de suministro en Valencia", "incidencia_agent"),
+    ("¿Cuál es el correo de 12345678A?", "datos_agent"),
+    ("Dame el teléfono del abonado con póliza POL123", "datos_agent"),
+    ("¿Existe el abonado 87654321B?", "datos_agent"),
+    ("¿Qué tiempo hace en Calle Falsa 123?", "weather_foo_agent"),
+    ("dame un for en python", None),
+    ("hola, ¿qué tal?", None),
+    ("explícame programación", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10000, help="Pasadas sobre el corpus")
+    args = parser.parse_args()
+
+    router = agent.orchestrator.local_router
+    wrong = [(q, expected, router.classify(q)) for q, expected in CORPUS]
+    wrong = [w for w in wrong if w[1] is not None and w[2] not in (None, w[1])]
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for query, _expected in CORPUS:
+            router.rank(query)
+    elapsed = time.perf_counter() - start
+
+    routed = sum(1 for q, _ in CORPUS if router.classify(q))
+    print(json.dumps({
+        "queries": len(CORPUS),
+        "routed_locally": routed,
+        "local_hit_rate": round(routed / len(CORPUS), 3),
+        "misrouted": wrong,
+        "us_per_query": round(elapsed / (args.iterations * len(CORPUS)) * 1e6, 2),
+        "stats": router.stats(),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Coste del logging por turno.
+
+Ejecuta los mismos turnos del Orchestrator (aresponder, modo flexible, FakeProvider sin
+latencia y backend local; ver bench_metrics.build_orchestrator) con varias
+configuraciones de logging, cada una en un proceso nuevo porque el logging se configura
+al importar core.agent.agent:
+  - off:        LOG_LEVEL=CRITICAL (nada se escribe).
+  - info:       configuración por defecto: INFO, JSON y QueueListener.
+  - info_sync:  INFO y JSON escribiendo el fichero en el hilo de la petición.
+  - debug:      DEBUG (respuestas y mensajes completos del modelo) con QueueListener.
+  - debug_sync: DEBUG y texto escribiendo en el hilo de la petición, como el antiguo
+                logging.basicConfig(level=DEBUG) salvo por el formato perezoso.
+Se informa del tiempo por turno, del tiempo de CPU por turno del hilo de las peticiones
+(lo que el logging añade en el camino de la petición; con la cola, el formato y la
+escritura corren en el hilo del listener, que con una sola CPU compite con las
+peticiones), de la diferencia con "off" y del tamaño del log.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_logging --turns 1000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+VARIANTS = {
+    "off": {"LOG_LEVEL": "CRITICAL"},
+    "info": {"LOG_LEVEL": "INFO"},
+    "info_sync": {"LOG_LEVEL": "INFO", "LOG_QUEUE": "false"},
+    "debug": {"LOG_LEVEL": "DEBUG"},
+    "debug_sync": {"LOG_LEVEL": "DEBUG", "LOG_QUEUE": "false", "LOG_FORMAT": "text"},
+}
+
+
+def _child(turns):
+    import logging
+
+    from benchmarks.bench_metrics import build_orchestrator, time_turns
+    from core import log
+
+    turn_us, request_cpu_us = time_turns(build_orchestrator(), turns)
+    log.stop_logging()  # vacía la cola antes de medir el fichero
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    return {"turn_us": turn_us, "request_thread_cpu_us": request_cpu_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args.turns)))
+        return
+
+    results = {}
+    for label, env in VARIANTS.items():
+        log_dir = tempfile.mkdtemp(prefix="bench_logging_")
+        try:
+            out = subprocess.check_output(
+                [sys.executable, "-m", "benchmarks.bench_logging", "--child", "--turns", str(args.turns)],
+                env={**os.environ, **env, "LOG_DIR": log_dir, "LOG_OUTPUT": "file", "GROQ_API_KEY": "benchmark"},
+                text=True,
+            )
+            result = json.loads(out.strip().splitlines()[-1])
+            result["log_bytes_per_turn"] = round(
+                sum(os.path.getsize(os.path.join(log_dir, f)) for f in os.listdir(log_dir)) / (2 * args.turns)
+            )
+        finally:
+            shutil.rmtree(log_dir, ignore_errors=True)
+        results[label] = result
+    for label, result in results.items():
+        result["overhead_us"] = round(result["turn_us"] - results["off"]["turn_us"], 1)
+        result["request_thread_overhead_us"] = round(result["request_thread_cpu_us"] - results["off"]["request_thread_cpu_us"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Coste de las métricas de /metrics en el camino de cada turno.
+
+Ejecuta el mismo número de turnos del Orchestrator (aresponder, modo flexible) con
+METRICS_ENABLED=true y con METRICS_ENABLED=false, cada uno en un proceso nuevo porque las
+métricas se crean al importar. El modelo es el FakeProvider con latencia 0 y el backend
+una función local, de modo que el tiempo por turno es casi todo CPU del pipeline y la
+diferencia entre ambos es el coste de la instrumentación. También mide el coste de una
+observación de histograma y de un incremento de contador activos y desactivados.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_metrics --turns 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+SCRIPT = "benchmarks/fake_llm_script.json"
+
+CORPUS = [
+    "¿Cuánto debo? Mi DNI es 12345678A",
+    "¿Cuál es el correo del abonado 12345678A?",
+    "¿Qué incidencias tiene el 12345678A?",
+    "hola, ¿qué tal?",
+]
+
+
+def build_orchestrator():
+    """
+    Orchestrator con el FakeProvider sin latencia, backend local y sin cachés: cada turno
+    recorre el pipeline completo (enrutado, agente, herramienta, middleware).
+    """
+    from benchmarks.bench_providers import _install
+    from core.agent import agent
+    from core.agent.providers import FakeProvider
+
+    with open(SCRIPT, encoding="utf-8") as f:
+        script = json.load(f)
+    for rule in script["rules"]:
+        rule.pop("latency", None)
+    orchestrator = agent.build_orchestrator(agent.session_store)
+    _install(orchestrator, FakeProvider(script, latency=0))
+    orchestrator.intent_engine.enabled = False
+    orchestrator.router_cache = None
+    orchestrator.tool_cache = None
+
+    async def endpoint(http_info, args):
+        return {"facturas": [{"fecha": "2024-01-01", "estado": "Pendiente", "importe": 10.0}]}
+
+    for target in orchestrator.agents:
+        target._acall_tool_endpoint = endpoint
+        target.tool_cache = None
+    return orchestrator
+
+
+def time_turns(orchestrator, turns):
+    """
+    Returns:
+        tuple: (microsegundos por turno, microsegundos de CPU por turno del hilo que
+        ejecuta los turnos), tras una pasada de calentamiento.
+    """
+    async def run():
+        for i in range(turns):
+            await orchestrator.aresponder(CORPUS[i % len(CORPUS)], "admin", "flexible", session_id=f"m-{i % 50}")
+
+    asyncio.run(run())  # calentamiento
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    asyncio.run(run())
+    cpu = time.thread_time() - cpu_start
+    return round((time.perf_counter() - start) / turns * 1e6, 1), round(cpu / turns * 1e6, 1)
+
+
+def _child(turns):
+    from core import metrics
+
+    turn_us, _ = time_turns(build_orchestrator(), turns)
+    histogram, counter = metrics.STAGE_SECONDS, metrics.ERRORS
+    n = 200_000
+    return {
+        "enabled": metrics.registry.enabled,
+        "turn_us": turn_us,
+        "observe_ns": round(timeit.timeit(lambda: histogram.observe(0.01, "agent"), number=n) / n * 1e9, 1),
+        "inc_ns": round(timeit.timeit(lambda: counter.inc("agent"), number=n) / n * 1e9, 1),
+        "exposition_bytes": len(metrics.registry.render()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args.turns)))
+        return
+
+    results = {}
+    for label, enabled in (("off", "false"), ("on", "true")):
+        out = subprocess.check_output(
+            [sys.executable, "-m", "benchmarks.bench_metrics", "--child", "--turns", str(args.turns)],
+            env={**os.environ, "METRICS_ENABLED": enabled, "GROQ_API_KEY": "benchmark"}, text=True,
+        )
+        results[label] = json.loads(out.strip().splitlines()[-1])
+    results["overhead_us_per_turn"] = round(results["on"]["turn_us"] - results["off"]["turn_us"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark de ejecución de varias tool calls en un mismo turno.
+
+El LLM simulado pide datos_abonado + existe_abonado + todas_las_facturas y el backend
+simulado tarda --backend-latency segundos por llamada. Se compara la ejecución en serie
+(max_parallel_tools=1) con la ejecución en paralelo, en el camino síncrono y el asíncrono.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_parallel_tools --turns 20 --backend-latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from core.agent.agents.agent_base import AgentBase  # noqa: E402
+from benchmarks.stub_llm import install_stub  # noqa: E402
+
+TOOL_CALLS = [
+    ("datos_abonado", {"dni": "12345678A"}),
+    ("existe_abonado", {"dni": "12345678A"}),
+    ("todas_las_facturas", {"dni": "12345678A"}),
+]
+MESSAGE = "Dame los datos y las facturas del abonado 12345678A"
+
+
+def _patch_backend(latency):
+    def call(self, http_info, args):
+        time.sleep(latency)
+        return {"ok": True}
+
+    async def acall(self, http_info, args):
+        await asyncio.sleep(latency)
+        return {"ok": True}
+
+    AgentBase._call_tool_endpoint = call
+    AgentBase._acall_tool_endpoint = acall
+
+
+def _set_parallelism(n):
+    for a in agent.orchestrator.agents:
+        a.max_parallel_tools = n
+        a.tool_cache = None  # medir el backend, no la caché
+
+
+async def _aturns(turns):
+    for _ in range(turns):
+        await agent.aresponder(MESSAGE, "admin", "rigido")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--backend-latency", type=float, default=0.05)
+    parser.add_argument("--parallel", type=int, default=4, help="max_parallel_tools del caso paralelo")
+    args = parser.parse_args()
+
+    install_stub(agent.orchestrator, latency=0, router_answer="datos_agent", tool_calls=TOOL_CALLS)
+    _patch_backend(args.backend_latency)
+    results = {}
+    for label, parallel in (("serial", 1), ("parallel", args.parallel)):
+        _set_parallelism(parallel)
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            agent.responder(MESSAGE, "admin", "rigido")
+        sync_ms = (time.perf_counter() - start) / args.turns * 1000
+        start = time.perf_counter()
+        asyncio.run(_aturns(args.turns))
+        async_ms = (time.perf_counter() - start) / args.turns * 1000
+        results[label] = {"sync_ms_per_turn": round(sync_ms, 1), "async_ms_per_turn": round(async_ms, 1)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark del camino de error de formato de una tool call.
+
+Ejecuta tool calls con un DNI mal escrito con un LLM simulado y compara la redacción
+del error con el modelo (llm_phrasing, como antes) frente a los mensajes por plantilla
+de validation_messages.json: latencia por turno y llamadas al LLM.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_pattern_errors --turns 20 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from benchmarks.stub_llm import AsyncStubLLM, _tool_calls  # noqa: E402
+
+TOOL_CALLS = _tool_calls([("datos_abonado", {"dni": "1234567A"})])
+
+
+async def _run(target, turns):
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        result = await target._aprocess_tool_calls(TOOL_CALLS, None, {})
+        latencies.append(time.perf_counter() - start)
+    return latencies, result[0]["error"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia por llamada al LLM (s)")
+    args = parser.parse_args()
+
+    target = next(a for a in agent.orchestrator.agents if a.name == "datos_agent")
+    messages = agent.orchestrator.tool_registry.messages
+    results = {}
+    for label, llm_phrasing in (("llm_phrasing", True), ("templates", False)):
+        target.async_client = AsyncStubLLM(args.latency, agent_answer="El DNI no tiene el formato correcto.")
+        messages.llm_phrasing = llm_phrasing
+        latencies, error = asyncio.run(_run(target, args.turns))
+        results[label] = {
+            "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+            "llm_calls": target.async_client.chat.completions.calls,
+            "message": error,
+        }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
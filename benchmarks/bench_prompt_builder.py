@@ -0,0 +1,100 @@
+"""
+Benchmark del prompt de reescritura del modo flexible.
+
+Compara el prompt anterior (json.dumps con indent=2 de todos los resultados) con el
+PromptBuilder (JSON compacto, proyección de campos, filas acotadas y presupuesto de
+tokens) para resultados de distinto tamaño de /todas_las_facturas, /incidencias_por_dni
+y /datos_abonado: tokens estimados del prompt y coste de construirlo.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_prompt_builder --rows 5,50,500
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from core.agent.middleware.prompt_builder import INSTRUCCIONES, PromptBuilder, estimate_tokens  # noqa: E402
+from core.config.config import config_manager  # noqa: E402
+
+HISTORY = [
+    {"role": "user", "content": "Hola, soy el abonado 12345678A"},
+    {"role": "assistant", "content": "Hola, ¿en qué puedo ayudarte?"},
+]
+
+
+def legacy_prompt(consulta, results, contexto_publico):
+    """Réplica de ControlMiddleware._construir_prompt_flexible() anterior."""
+    prompt = ""
+    if contexto_publico:
+        prompt += "Historial reciente:\n"
+        for m in contexto_publico[-2:]:
+            prompt += f"- {m['role']}: {m['content']}\n"
+    prompt += f"\nConsulta del usuario: {consulta}\n\nResultados de herramientas (JSON):\n{json.dumps(results, ensure_ascii=False, indent=2)}\n\n"
+    return prompt + INSTRUCCIONES
+
+
+def _facturas(n):
+    return {"tool": "todas_las_facturas", "params": {"dni": "12345678A"}, "response": {"facturas": [
+        {"identificador": i, "fecha": f"2024-{i % 12 + 1:02d}-01", "estado": "Pagado" if i % 3 else "Pendiente", "importe": 40.5 + i}
+        for i in range(n)
+    ]}}
+
+
+def _incidencias(n):
+    return {"tool": "incidencias_por_dni", "params": {"dni": "12345678A"}, "response": {"incidencias": [
+        {"ubicacion": "Madrid", "descripcion": f"Corte de suministro en el portal {i}, el vecino avisa de que lleva horas sin luz", "estado": "pendiente"}
+        for i in range(n)
+    ]}}
+
+
+def _datos():
+    return {"tool": "datos_abonado", "params": {"dni": "12345678A"}, "response": {
+        "nombre": "Juan Pérez", "dni": "12345678A", "direccion": "Calle Mayor 1, Madrid",
+        "correo": "juan@example.com", "telefono": "612345678", "poliza": "POL123"}}
+
+
+def _measure(build, consulta, results, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        prompt = build(consulta, results, HISTORY)
+    return estimate_tokens(prompt), round((time.perf_counter() - start) / iterations * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="5,50,500", help="Filas de los resultados de lista")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with open("client_config/tools_schema.json", encoding="utf-8") as f:
+        tools_schema = json.load(f)
+    builder = PromptBuilder(tools_schema, config_manager.get_prompt_config())
+    cases = [("¿Cuál es mi teléfono?", "datos_abonado", [_datos()])]
+    for n in (int(r) for r in args.rows.split(",")):
+        cases.append(("¿Cuánto he pagado en total?", f"todas_las_facturas x{n}", [_facturas(n)]))
+        cases.append(("¿Qué incidencias tengo abiertas?", f"incidencias_por_dni x{n}", [_incidencias(n)]))
+
+    report = []
+    for consulta, label, results in cases:
+        legacy_tokens, legacy_us = _measure(legacy_prompt, consulta, results, args.iterations)
+        built_tokens, built_us = _measure(builder.build, consulta, results, args.iterations)
+        report.append({
+            "case": label,
+            "legacy_tokens": legacy_tokens,
+            "builder_tokens": built_tokens,
+            "reduction": round(1 - built_tokens / legacy_tokens, 3),
+            "legacy_us": legacy_us,
+            "builder_us": built_us,
+        })
+    print(json.dumps({"max_input_tokens": builder.max_input_tokens, "cases": report}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark de proveedores de modelos sin red externa.
+
+Ejecuta el Orchestrator completo (aresponder) bajo carga con cada proveedor:
+  - fake:   FakeProvider en el propio proceso (sin HTTP).
+  - openai: OpenAICompatibleProvider contra un servidor local compatible con OpenAI.
+  - groq:   GroqProvider (SDK de Groq) contra el mismo servidor local (base_url).
+El servidor local responde con el mismo guion que el FakeProvider, así que las
+diferencias de latencia y throughput son el coste de cada cliente y del transporte HTTP.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_providers --requests 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+from core.agent import agent  # noqa: E402
+from core.agent.providers import FakeProvider, GroqProvider, OpenAICompatibleProvider  # noqa: E402
+from core.agent.providers.base import to_dict  # noqa: E402
+
+SCRIPT = "benchmarks/fake_llm_script.json"
+
+CORPUS = [
+    "¿Cuánto debo? Mi DNI es 12345678A",
+    "Dame mis facturas, DNI 12345678A",
+    "¿Cuál es el correo del abonado 12345678A?",
+    "¿Qué incidencias tiene el 12345678A?",
+    "Tengo un problema con el pago de la factura",
+    "hola, ¿qué tal?",
+]
+
+
+def _start_server(script, port):
+    """Servidor compatible con /v1/chat/completions (y la ruta de Groq) en un hilo."""
+    fake = FakeProvider(script)
+    app = FastAPI()
+
+    async def completions(request: Request):
+        body = await request.json()
+        if body.pop("stream", False):
+            async def events():
+                async for chunk in fake.astream(**body):
+                    yield f"data: {json.dumps(to_dict(chunk))}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+        resp = await fake.acomplete(**body)
+        data = to_dict(resp)
+        return {"id": "bench", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"), **data}
+
+    app.post("/v1/chat/completions")(completions)
+    app.post("/openai/v1/chat/completions")(completions)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _install(orchestrator, provider):
+    targets = [orchestrator, orchestrator.middleware, orchestrator.router_agent] + list(orchestrator.agents)
+    for target in targets:
+        if target is not None:
+            target.client = provider.client
+            target.async_client = provider.async_client
+
+
+def _stub_backend(orchestrator):
+    async def endpoint(http_info, args):
+        await asyncio.sleep(0.005)
+        return {"ok": True, "dni": args.get("dni")}
+
+    for target in orchestrator.agents:
+        target._acall_tool_endpoint = endpoint
+
+
+async def _load(orchestrator, n, concurrency, label):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            resp = await orchestrator.aresponder(CORPUS[i % len(CORPUS)], "admin", "rigido", session_id=f"{label}-{i}")
+            latencies.append(time.perf_counter() - start)
+            errors += resp.get("type") == "error"
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = _start_server(SCRIPT, port)
+    providers = {
+        "fake": lambda: FakeProvider(SCRIPT),
+        "openai": lambda: OpenAICompatibleProvider(base_url=f"http://127.0.0.1:{port}/v1", pool_size=args.concurrency),
+        "groq": lambda: GroqProvider(api_key="benchmark", base_url=f"http://127.0.0.1:{port}", pool_size=args.concurrency),
+    }
+    results = {}
+    for label, factory in providers.items():
+        provider = factory()
+        orchestrator = agent.build_orchestrator(agent.session_store)
+        _install(orchestrator, provider)
+        _stub_backend(orchestrator)
+        orchestrator.intent_engine.enabled = False
+        orchestrator.router_cache = None
+        latencies, errors, elapsed = asyncio.run(_load(orchestrator, args.requests, args.concurrency, label))
+        latencies.sort()
+        results[label] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "req_per_s": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+        }
+    server.should_exit = True
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Escalado del servicio web con varios workers.
+
+Siembra la base de datos, levanta el backend una vez y, para cada número de workers
+(uvicorn --workers N, el mismo modelo de procesos que gunicorn con UvicornWorker),
+levanta web/main.py con el proveedor simulado y el estado compartido en SQLite
+(SESSION_BACKEND, CACHE_BACKEND y LLM_LIMIT_BACKEND = sqlite en un directorio temporal),
+calienta y recorre el corpus de e2e_corpus.json con usuarios concurrentes (ver
+bench_e2e). Las conversaciones de varios turnos van repartidas entre workers, así que
+cualquier error de sesión o de caché compartida aparece como error. Informa de
+peticiones por segundo, latencia y eficiencia de escalado frente a un worker
+(req/s con N workers / (N x req/s con uno)).
+
+El escalado está acotado por las CPU de la máquina (se incluyen en el resultado) y por
+el backend, que es el mismo en todas las pasadas: con una sola CPU, N workers se reparten
+el mismo núcleo y la eficiencia cae como 1/N aunque no haya contención. Para separar ese
+límite del coste del estado compartido, --state memory repite la medición con sesiones,
+cachés y límites en memoria de cada worker (sin SQLite; las conversaciones que cambian de
+worker pierden el contexto, así que solo sirve como referencia de rendimiento).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_scaling --workers 1 2 4 --users 200 --concurrency 64
+    python -m benchmarks.bench_scaling --state memory
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_e2e import CORPUS, LLM_SCRIPT, _memory, _percentiles, _run_users, _serve  # noqa: E402
+from benchmarks.seed_db import seed  # noqa: E402
+
+
+def _children(pid):
+    """PIDs de los workers de un proceso uvicorn --workers."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--users", type=int, default=200, help="Conversaciones a reproducir por pasada")
+    parser.add_argument("--concurrency", type=int, default=64, help="Conversaciones simultáneas")
+    parser.add_argument("--warmup", type=int, default=40, help="Conversaciones de calentamiento por pasada")
+    parser.add_argument("--abonados", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-script", default=LLM_SCRIPT)
+    parser.add_argument("--backend-workers", type=int, default=1)
+    parser.add_argument("--state", choices=("sqlite", "memory"), default="sqlite",
+                        help="Backend de sesiones, cachés y límites de los workers")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding="utf-8") as f:
+        conversations = json.load(f)["conversations"]
+
+    tmp = tempfile.mkdtemp(prefix="bench_scaling_")
+    processes = []
+    runs = {}
+    try:
+        db_path = os.path.join(tmp, "scaling.db")
+        seed(db_path, args.abonados, seed_value=args.seed)
+        backend, _, backend_port = _serve(
+            "core.backend.server:app", {"DB_PATH": db_path}, "/docs",
+            extra_args=["--workers", str(args.backend_workers)]
+        )
+        processes.append(backend)
+
+        for workers in args.workers:
+            state = os.path.join(tmp, f"state-{workers}")
+            web, web_url, _ = _serve("web.main:app", {
+                "LLM_PROVIDER": "fake",
+                "LLM_FAKE_SCRIPT": args.llm_script,
+                "BACKEND_HOST": "127.0.0.1",
+                "BACKEND_PORT": str(backend_port),
+                "SESSION_BACKEND": args.state,
+                "SESSION_DB_PATH": os.path.join(state, "sessions.db"),
+                "CACHE_BACKEND": args.state,
+                "LLM_LIMIT_BACKEND": args.state,
+                "SHARED_STORE_PATH": os.path.join(state, "shared.db"),
+                "CONFIG_RELOAD": "false",
+                "LOG_OUTPUT": "stderr",
+                "LOG_LEVEL": "WARNING",
+            }, "/api/health", extra_args=["--workers", str(workers)])
+            processes.append(web)
+            try:
+                # El calentamiento usa otra semilla para no precargar las cachés de la medición
+                asyncio.run(_run_users(web_url, conversations, args.warmup, args.concurrency,
+                                       args.abonados, args.seed + 1))
+                latencies, _, errors, elapsed = asyncio.run(
+                    _run_users(web_url, conversations, args.users, args.concurrency, args.abonados, args.seed)
+                )
+                worker_pids = _children(web.pid) or [web.pid]
+                runs[workers] = {
+                    "turns": len(latencies),
+                    "errors": errors,
+                    "req_per_s": round(len(latencies) / elapsed, 2),
+                    "latency": _percentiles(latencies),
+                    "rss_mb": round(sum((_memory(pid) or {}).get("rss_mb") or 0 for pid in worker_pids), 1),
+                }
+            finally:
+                web.terminate()
+                web.wait()
+                processes.remove(web)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    base = runs.get(1) or runs[min(runs)]
+    base_workers = 1 if 1 in runs else min(runs)
+    for workers, run in runs.items():
+        speedup = run["req_per_s"] / base["req_per_s"]
+        run["speedup"] = round(speedup, 2)
+        run["efficiency"] = round(speedup * base_workers / workers, 2)
+    print(json.dumps({
+        "meta": {"cpus": len(os.sched_getaffinity(0)), "state": args.state, "users": args.users, "concurrency": args.concurrency,
+                 "backend_workers": args.backend_workers, "llm_script": args.llm_script},
+        "workers": runs,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
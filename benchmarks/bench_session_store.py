@@ -0,0 +1,73 @@
+"""
+Benchmark del almacén de sesiones.
+
+Crea muchas más sesiones de las que admite el almacén y mide memoria retenida,
+tamaño final y coste por operación load()/save(), comprobando que el límite LRU
+mantiene el crecimiento acotado.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_session_store --sessions 200000 --max-sessions 100000
+    python -m benchmarks.bench_session_store --backend sqlite --sessions 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.agent.session_store import InMemorySessionStore, SQLiteSessionStore, SessionState  # noqa: E402
+
+
+def _state(i):
+    state = SessionState(mode="rigido", entities={"dni": f"{i % 100000000:08d}A"})
+    state.add_message("user", "¿Cuál es la deuda del abonado?")
+    state.add_message("assistant", "La deuda total es de 120,50 €")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--sessions", type=int, default=200_000, help="Sesiones distintas a crear")
+    parser.add_argument("--max-sessions", type=int, default=100_000, help="Límite del almacén")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    if args.backend == "sqlite":
+        store = SQLiteSessionStore(os.path.join(tmpdir, "sessions.db"), max_sessions=args.max_sessions)
+    else:
+        store = InMemorySessionStore(max_sessions=args.max_sessions)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        sid = f"s{i}"
+        state = store.load(sid)
+        state.entities.update(_state(i).entities)
+        state.history = _state(i).history
+        store.save(sid, state)
+    elapsed = time.perf_counter() - start
+    if args.backend == "sqlite":
+        store.sweep()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        "backend": args.backend,
+        "sessions_created": args.sessions,
+        "sessions_retained": len(store),
+        "retained_mb": round(current / 1e6, 1),
+        "peak_mb": round(peak / 1e6, 1),
+        "us_per_turn": round(elapsed / args.sessions * 1e6, 1),
+        "stats": store.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
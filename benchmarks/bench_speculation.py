@@ -0,0 +1,98 @@
+"""
+Benchmark del enrutado especulativo.
+
+Reproduce consultas ambiguas (el enrutado local tiene candidato pero sin confianza
+suficiente, así que decide el router LLM) con un LLM simulado, con la especulación
+activada y desactivada. En cada consulta el router simulado responde el agente indicado
+en el corpus, que coincide o no con el candidato local. Informa de la tasa de aciertos,
+la latencia ahorrada por acierto (p50/p95), los tokens gastados en especulaciones
+descartadas y la latencia por turno.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_speculation --latency 0.2 --router-latency 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from benchmarks.stub_llm import install_stub  # noqa: E402
+
+# (consulta, agente que elige el router LLM); en comentario, el candidato local (en los
+# empates depende del orden de puntuación, así que puede acertar o fallar)
+CORPUS = [
+    ("Tengo un problema con el pago de la factura", "factura_agent"),            # factura_agent
+    ("¿Qué datos tiene la factura pendiente?", "factura_agent"),                # datos_agent
+    ("El correo de la incidencia", "datos_agent"),                              # empate datos/incidencia
+    ("Quiero saber el importe y el telefono", "datos_agent"),                   # empate datos/factura
+    ("cambia mi direccion por un problema", "datos_agent"),                     # empate incidencia/datos
+    ("Quiero reclamar el cobro de un recibo por un corte de suministro", "incidencia_agent"),  # empate incidencia/factura
+    ("¿Hay alguna avería o deuda pendiente en mi poliza?", "factura_agent"),    # empate factura/incidencia
+    ("Necesito ayuda con mi cuenta", "datos_agent"),                            # sin candidato
+]
+
+
+def _slow_router(completions, router_latency):
+    """El router responde con su propia latencia (modelo más pequeño que el de los agentes)."""
+    create = completions.create
+
+    async def routed(**kwargs):
+        if kwargs.get("max_completion_tokens") == 10:
+            await asyncio.sleep(router_latency)
+            return completions._answer(kwargs)
+        return await create(**kwargs)
+
+    completions.create = routed
+
+
+async def _run(orchestrator, completions, rounds, label):
+    latencies = []
+    for r in range(rounds):
+        for i, (turn, router_answer) in enumerate(CORPUS):
+            completions.router_answer = router_answer
+            start = time.perf_counter()
+            await orchestrator.aresponder(turn, "admin", "rigido", session_id=f"{label}-{r}-{i}")
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="Pasadas sobre el corpus")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia de las llamadas de agente (s)")
+    parser.add_argument("--router-latency", type=float, default=0.15, help="Latencia del router LLM (s)")
+    args = parser.parse_args()
+
+    results = {}
+    for label, enabled in (("sequential", False), ("speculative", True)):
+        orchestrator = agent.build_orchestrator(agent.session_store)
+        _, async_client = install_stub(orchestrator, latency=args.latency, agent_answer="Respuesta simulada del agente")
+        completions = async_client.chat.completions
+        _slow_router(completions, args.router_latency)
+        # Sin caché del router ni intenciones: cada turno pasa por el router LLM
+        orchestrator.router_cache = None
+        orchestrator.intent_engine.enabled = False
+        orchestrator.speculation.enabled = enabled
+        latencies = asyncio.run(_run(orchestrator, completions, args.rounds, label))
+        results[label] = {
+            "turns": len(latencies),
+            "llm_calls": completions.calls,
+            "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "speculation": orchestrator.speculation.stats(),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
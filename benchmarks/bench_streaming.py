@@ -0,0 +1,75 @@
+"""
+Benchmark de latencia percibida del chat en streaming con un LLM simulado.
+
+Compara, para una misma respuesta, el tiempo hasta la respuesta completa de
+aresponder() con el tiempo hasta el primer evento (agente elegido) y hasta el primer
+token de astream() cuando el modelo genera la respuesta fragmento a fragmento.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_streaming --turns 20 --latency 0.2 --token-interval 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from core.agent import agent  # noqa: E402
+from benchmarks.stub_llm import install_stub  # noqa: E402
+
+MESSAGE = "¿Qué datos tengo registrados?"
+ANSWER = " ".join(["palabra"] * 60)
+
+
+async def _complete():
+    start = time.perf_counter()
+    await agent.aresponder(MESSAGE, "admin", "rigido", session_id="bench")
+    return {"total": time.perf_counter() - start}
+
+
+async def _stream():
+    start = time.perf_counter()
+    timings = {}
+    async for event in agent.astream_responder(MESSAGE, "admin", "rigido", session_id="bench"):
+        elapsed = time.perf_counter() - start
+        timings.setdefault("first_event", elapsed)
+        if event["event"] == "token":
+            timings.setdefault("first_token", elapsed)
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+async def _run(handler, turns):
+    return [await handler() for _ in range(turns)]
+
+
+def _summary(samples):
+    keys = samples[0].keys()
+    return {key: round(statistics.median(s[key] for s in samples) * 1000, 1) for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20, help="Turnos por variante")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia hasta el primer token por llamada al LLM (s)")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="Pausa entre fragmentos (s)")
+    args = parser.parse_args()
+
+    install_stub(agent.orchestrator, latency=args.latency, agent_answer=ANSWER, token_interval=args.token_interval)
+    results = {
+        "aresponder_ms": _summary(asyncio.run(_run(_complete, args.turns))),
+        "astream_ms": _summary(asyncio.run(_run(_stream, args.turns))),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Varias herramientas por turno: una petición HTTP por herramienta vs POST /batch.
+
+Siembra una base de datos SQLite, levanta core/backend/server.py (uvicorn) y lanza turnos
+con varias llamadas simultáneas, como las tool calls paralelas de un agente:
+  - turn:  cuatro herramientas de un mismo DNI (deuda, facturas pendientes, último pago
+           y datos del abonado).
+  - admin: la misma herramienta (deuda_total) para diez DNIs distintos.
+Cada escenario se ejecuta con ToolHttpClient.arequest() por herramienta (individual) y
+con ToolBatcher (batch: una petición /batch con una transacción de lectura y consultas IN (...)).
+Se informa de la latencia por turno (p50/p95), del tiempo total, de las peticiones HTTP
+por turno y de las consultas SQLite por turno (de /metrics del backend).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_tool_batch --turns 500 --concurrency 1,16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_e2e import _percentiles, _serve  # noqa: E402
+from benchmarks.seed_db import dni_for, seed  # noqa: E402
+from core.agent.tools.http_client import ToolHttpClient  # noqa: E402
+from core.agent.tools.tool_batcher import ToolBatcher  # noqa: E402
+from core.agent.tools.tool_registry import build_http_info  # noqa: E402
+
+SCENARIOS = {
+    "turn": lambda rng, abonados: [
+        (tool, {"dni": dni})
+        for dni in [dni_for(rng.randrange(abonados))]
+        for tool in ("deuda_total", "facturas_pendientes", "ultimo_pago", "datos_abonado")
+    ],
+    "admin": lambda rng, abonados: [("deuda_total", {"dni": dni_for(rng.randrange(abonados))}) for _ in range(10)],
+}
+
+_DB_COUNT_RE = re.compile(r'^\w+_db_query_seconds_count\{[^}]*\} (\S+)$', re.MULTILINE)
+
+
+def _db_queries(backend_url):
+    """Consultas SQLite ejecutadas por el backend (suma del histograma de /metrics)."""
+    return sum(float(v) for v in _DB_COUNT_RE.findall(httpx.get(backend_url + "/metrics").text))
+
+
+async def _run(call, calls_per_turn, turns, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def turn(calls):
+        async with semaphore:
+            start = time.perf_counter()
+            await asyncio.gather(*(call(name, args) for name, args in calls))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(turn(calls) for calls in calls_per_turn[:turns]))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--concurrency", default="1,16", help="Turnos simultáneos (lista separada por comas)")
+    parser.add_argument("--abonados", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open("client_config/tools_schema.json", encoding="utf-8") as f:
+        schemas = {tool["function"]["name"]: tool for tool in json.load(f)}
+
+    tmp = tempfile.mkdtemp(prefix="bench_tool_batch_")
+    backend = None
+    results = {}
+    try:
+        db_path = os.path.join(tmp, "tools.db")
+        seed(db_path, args.abonados, seed_value=args.seed)
+        backend, backend_url, _ = _serve("core.backend.server:app", {"DB_PATH": db_path, "LOG_LEVEL": "WARNING"}, "/docs")
+        http_info = {name: build_http_info(schema, backend_url) for name, schema in schemas.items()}
+
+        for scenario, make_calls in SCENARIOS.items():
+            rng = random.Random(args.seed)
+            calls_per_turn = [make_calls(rng, args.abonados) for _ in range(args.turns)]
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                for mode in ("individual", "batch"):
+                    async def measure():
+                        client = ToolHttpClient(pool_size=max(concurrency * 10, 20))
+                        batcher = ToolBatcher(client)
+
+                        async def call(name, call_args):
+                            info = http_info[name]
+                            if mode == "batch":
+                                return await batcher.call(info, call_args)
+                            return await client.arequest(info["method"], info["url"], call_args, idempotent=info["idempotent"])
+
+                        await _run(call, calls_per_turn, min(50, args.turns), concurrency)  # calentamiento
+                        requests_before, queries_before = client.requests, _db_queries(backend_url)
+                        latencies, elapsed = await _run(call, calls_per_turn, args.turns, concurrency)
+                        requests = client.requests - requests_before
+                        queries = _db_queries(backend_url) - queries_before
+                        await client.aclose()
+                        return latencies, elapsed, requests, queries
+
+                    latencies, elapsed, requests, queries = asyncio.run(measure())
+                    results[f"{scenario}/c{concurrency}/{mode}"] = {
+                        "latency": _percentiles(latencies),
+                        "elapsed_s": round(elapsed, 2),
+                        "turns_per_s": round(args.turns / elapsed, 1),
+                        "http_requests_per_turn": round(requests / args.turns, 2),
+                        "db_queries_per_turn": round(queries / args.turns, 2),
+                    }
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(json.dumps({
+        "meta": {"turns": args.turns, "abonados": args.abonados, "cpus": os.cpu_count()},
+        "results": results,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
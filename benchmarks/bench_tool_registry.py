@@ -0,0 +1,106 @@
+"""
+Benchmark de CPU del camino de una tool call.
+
+Mide el coste por turno de seleccionar las herramientas del agente, parsear, validar
+(jsonschema + patrones de formato) y resolver la URL de tres tool calls, con el backend
+simulado (respuesta inmediata) y sin caché. Compara el camino anterior (lee
+entity_patterns.json en cada turno, filtra tools_schema entero, construye el validador
+jsonschema en cada llamada) con el ToolRegistry compilado al arrancar.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_tool_registry --turns 2000
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from jsonschema import ValidationError, validate  # noqa: E402
+
+from core.agent import agent  # noqa: E402
+from core.agent.agents.agent_base import AgentBase  # noqa: E402
+from core.agent.tools.tool_registry import build_http_info  # noqa: E402
+from benchmarks.stub_llm import _tool_calls  # noqa: E402
+
+TOOL_CALLS = _tool_calls([
+    ("datos_abonado", {"dni": "12345678A"}),
+    ("todas_las_facturas", {}),
+    ("existe_abonado", {"dni": "12345678A"}),
+])
+ENTIDADES = {"dni": "12345678A"}
+
+
+class LegacyAgent(AgentBase):
+    """Réplica del camino de tool calls anterior al registro."""
+    def _select_tools(self, tools_schema):
+        return [t for t in tools_schema if t["function"]["name"] in self.tools] if tools_schema else []
+
+    def _process_tool_calls(self, tool_calls, tools_to_use, entidades):
+        with open("client_config/entity_patterns.json", 'r', encoding='utf-8') as f:
+            entity_patterns = json.load(f)
+        return [self._legacy_execute(call, tools_to_use, entidades, entity_patterns) for call in tool_calls]
+
+    def _legacy_execute(self, call, tools_to_use, entidades, entity_patterns):
+        name = call.function.name
+        args = json.loads(call.function.arguments)
+        tool_schema = next((t for t in tools_to_use if t["function"]["name"] == name), None)
+        args = self._fill_missing_args(args, tool_schema, entidades)
+        try:
+            validate(instance=args, schema=tool_schema["function"]["parameters"])
+        except ValidationError as e:
+            return {"tool": name, "error": f"validación fallida: {e.message}"}
+        for arg_name, arg_value in args.items():
+            if arg_name in entity_patterns and not re.fullmatch(entity_patterns[arg_name], str(arg_value)):
+                return {"tool": name, "error": "formato"}
+        out = self._call_tool_endpoint(build_http_info(tool_schema), args)
+        return {"tool": name, "params": args, "response": out}
+
+
+def _stub_backend(target):
+    target._call_tool_endpoint = lambda http_info, args: {"ok": True}
+    target.tool_cache = None
+    target.max_parallel_tools = 1
+
+
+def _us_per_turn(target, tools_schema, turns):
+    start = time.perf_counter()
+    for _ in range(turns):
+        tools_to_use = target._select_tools(tools_schema)
+        target._process_tool_calls(TOOL_CALLS, tools_to_use, ENTIDADES)
+    return round((time.perf_counter() - start) / turns * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    orchestrator = agent.orchestrator
+    registry_agent = next(a for a in orchestrator.agents if a.name == "datos_agent")
+    legacy_agent = LegacyAgent(registry_agent.name, registry_agent.system_prompt,
+                               registry_agent.specialization, registry_agent.tools)
+    for target in (registry_agent, legacy_agent):
+        _stub_backend(target)
+
+    tools_schema = orchestrator.tools_schema
+    legacy_us = _us_per_turn(legacy_agent, tools_schema, args.turns)
+    registry_us = _us_per_turn(registry_agent, tools_schema, args.turns)
+    print(json.dumps({
+        "tool_calls_per_turn": len(TOOL_CALLS),
+        "turns": args.turns,
+        "legacy_us_per_turn": legacy_us,
+        "registry_us_per_turn": registry_us,
+        "speedup": round(legacy_us / registry_us, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
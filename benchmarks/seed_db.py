@@ -0,0 +1,130 @@
+"""
+Generador de datos sintéticos para el backend de herramientas.
+
+Crea (o amplía) una base de datos con el esquema de core/backend/migrations.py y la
+llena con abonados, facturas e incidencias deterministas; después aplica las
+migraciones para que los índices se construyan una sola vez sobre los datos cargados.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.seed_db data/big.db --abonados 1000000 --facturas-por-abonado 5
+    DB_PATH=data/big.db python -m uvicorn core.backend.server:app --port 8000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.backend.migrations import SCHEMA, migrate  # noqa: E402
+
+NOMBRES = ["Juan", "Ana", "Luis", "María", "Carlos", "Lucía", "Pedro", "Elena", "Jorge", "Sofía"]
+APELLIDOS = ["Pérez", "López", "García", "Martín", "Sánchez", "Gómez", "Ruiz", "Díaz", "Moreno", "Álvarez"]
+CIUDADES = ["Madrid", "Barcelona", "Valencia", "Sevilla", "Bilbao", "Zaragoza", "Málaga", "Murcia"]
+ESTADOS_FACTURA = ["Pagado", "Pagado", "Pagado", "Pendiente", "Vencido"]
+ESTADOS_INCIDENCIA = ["Pendiente", "Abierto", "Resuelto"]
+DNI_LETTERS = "TRWAGMYFPDXBNJZSQVHLCKE"
+BATCH = 50_000
+
+
+def dni_for(i):
+    """DNI sintético (con letra de control válida) del abonado número i."""
+    number = 10_000_000 + i
+    return f"{number:08d}{DNI_LETTERS[number % 23]}"
+
+
+def poliza_for(i):
+    return f"POL{i:07d}"
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(db_path, abonados, facturas_por_abonado=5, incidencias_por_abonado=1, seed_value=0):
+    """
+    Inserta los abonados [0, abonados) que falten, con sus facturas e incidencias.
+
+    Returns:
+        dict: Filas por tabla y segundos empleados en la carga y en los índices.
+    """
+    rng = random.Random(seed_value)
+    conn = sqlite3.connect(db_path)
+    # Carga masiva: sin diario ni fsync; la base de datos se descarta si se interrumpe
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    for statement in SCHEMA:
+        conn.execute(statement)
+    start_id = conn.execute("SELECT COUNT(*) FROM abonados").fetchone()[0]
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM abonados").fetchone()[0]
+    start = time.perf_counter()
+
+    def abonado_rows():
+        for i in range(start_id, abonados):
+            nombre = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}"
+            yield (nombre, dni_for(i), f"Calle {i % 997} nº {i % 131}, {rng.choice(CIUDADES)}",
+                   f"abonado{i}@example.com", f"6{i % 100_000_000:08d}", poliza_for(i))
+
+    def factura_rows():
+        for i in range(start_id, abonados):
+            dni = dni_for(i)
+            for k in range(facturas_por_abonado):
+                fecha = f"{2020 + k // 12 % 6}-{k % 12 + 1:02d}-{rng.randint(1, 28):02d}"
+                yield (dni, fecha, rng.choice(ESTADOS_FACTURA), round(rng.uniform(20, 300), 2))
+
+    def incidencia_rows():
+        for i in range(start_id, abonados):
+            for _ in range(incidencias_por_abonado):
+                # usuario_id es el id autoincremental que recibe el abonado i
+                yield (last_id + i - start_id + 1, rng.choice(CIUDADES), "Incidencia generada", rng.choice(ESTADOS_INCIDENCIA))
+
+    inserts = [
+        ("INSERT INTO abonados (nombre, dni, direccion, email, telefono, poliza) VALUES (?, ?, ?, ?, ?, ?)", abonado_rows()),
+        ("INSERT INTO facturas (dni_abonado, fecha, estado, importe) VALUES (?, ?, ?, ?)", factura_rows()),
+        ("INSERT INTO incidencias (usuario_id, ubicacion, descripcion, estado) VALUES (?, ?, ?, ?)", incidencia_rows()),
+    ]
+    for query, rows in inserts:
+        for batch in _batches(rows):
+            conn.executemany(query, batch)
+            conn.commit()
+    load_seconds = time.perf_counter() - start
+    counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("abonados", "facturas", "incidencias")}
+    conn.close()
+
+    start = time.perf_counter()
+    migrate(db_path)
+    return {
+        "rows": counts,
+        "load_seconds": round(load_seconds, 1),
+        "index_seconds": round(time.perf_counter() - start, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path", help="Base de datos a crear o ampliar")
+    parser.add_argument("--abonados", type=int, default=1_000_000)
+    parser.add_argument("--facturas-por-abonado", type=int, default=5)
+    parser.add_argument("--incidencias-por-abonado", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db_path)), exist_ok=True)
+    result = seed(args.db_path, args.abonados, args.facturas_por_abonado, args.incidencias_por_abonado, args.seed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Cliente LLM simulado para benchmarks.
+
+Imita la interfaz ``client.chat.completions.create(...)`` del SDK de Groq (síncrona y
+asíncrona) devolviendo respuestas deterministas tras una latencia configurable, de
+modo que el pipeline completo se puede medir sin red ni API key.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+
+def _completion(content, tool_calls=None, prompt=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls)
+    # Uso de tokens aproximado (~4 caracteres por token), con la forma de resp.usage de Groq
+    prompt_tokens = len(json.dumps(prompt or [], ensure_ascii=False, default=str)) // 4
+    completion_tokens = len(content or "") // 4 + (16 * len(tool_calls) if tool_calls else 0)
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                            total_tokens=prompt_tokens + completion_tokens)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _tool_calls(calls):
+    return [
+        SimpleNamespace(id=f"call_{i}", type="function",
+                        function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+        for i, (name, args) in enumerate(calls)
+    ]
+
+
+class _Completions:
+    def __init__(self, latency, router_answer, agent_answer, tool_calls, token_interval=0.0):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.router_answer = router_answer
+        self.agent_answer = agent_answer
+        self.tool_calls = tool_calls
+        self.calls = 0
+
+    def _answer(self, kwargs):
+        self.calls += 1
+        # El router es la única llamada con max_completion_tokens=10
+        prompt = [kwargs.get("messages"), kwargs.get("tools")]
+        if kwargs.get("max_completion_tokens") == 10:
+            return _completion(self.router_answer, prompt=prompt)
+        if self.tool_calls and kwargs.get("tools"):
+            return _completion(None, _tool_calls(self.tool_calls), prompt=prompt)
+        return _completion(self.agent_answer, prompt=prompt)
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        return self._answer(kwargs)
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, stream=False, **kwargs):
+        await asyncio.sleep(self.latency)
+        answer = self._answer(kwargs)
+        if stream:
+            return self._stream(answer.choices[0].message)
+        # Sin streaming la respuesta llega cuando se ha generado entera
+        await asyncio.sleep(self.token_interval * len((answer.choices[0].message.content or "").split()))
+        return answer
+
+    async def _stream(self, message):
+        """
+        Devuelve la respuesta en fragmentos con la forma de los chunks de Groq
+        (choices[0].delta): una palabra por chunk y las tool calls en un único chunk.
+        """
+        for i, word in enumerate((message.content or "").split(" ")):
+            await asyncio.sleep(self.token_interval)
+            delta = SimpleNamespace(content=word if i == 0 else " " + word, tool_calls=None)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        if message.tool_calls:
+            deltas = [
+                SimpleNamespace(index=i, id=tc.id, function=tc.function)
+                for i, tc in enumerate(message.tool_calls)
+            ]
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=deltas))])
+
+
+class StubLLM:
+    """
+    Sustituto síncrono de ``Groq``. Si se indica tool_calls (lista de (nombre, args)),
+    las llamadas de agente con herramientas devuelven esas tool calls.
+    """
+    def __init__(self, latency=0.05, router_answer="datos_agent", agent_answer="Respuesta simulada", tool_calls=None):
+        self.chat = SimpleNamespace(completions=_Completions(latency, router_answer, agent_answer, tool_calls))
+
+
+class AsyncStubLLM:
+    """
+    Sustituto asíncrono de ``AsyncGroq``. Admite stream=True; token_interval es la
+    pausa entre fragmentos (la latencia inicial equivale al tiempo hasta el primer token).
+    """
+    def __init__(self, latency=0.05, router_answer="datos_agent", agent_answer="Respuesta simulada", tool_calls=None, token_interval=0.0):
+        self.chat = SimpleNamespace(completions=_AsyncCompletions(latency, router_answer, agent_answer, tool_calls, token_interval))
+
+
+def install_stub(orchestrator, latency=0.05, **answers):
+    """
+    Sustituye los clientes de Groq del orquestador, su middleware y todos sus agentes
+    por clientes simulados con la latencia indicada (en segundos).
+    """
+    token_interval = answers.pop("token_interval", 0.0)
+    sync_client = StubLLM(latency, **answers)
+    async_client = AsyncStubLLM(latency, token_interval=token_interval, **answers)
+    targets = [orchestrator, orchestrator.middleware, orchestrator.router_agent] + list(orchestrator.agents)
+    for target in targets:
+        if target is None:
+            continue
+        target.client = sync_client
+        target.async_client = async_client
+    return sync_client, async_client
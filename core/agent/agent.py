@@ -1,25 +1,17 @@
-import logging
 import os
 import json
 from core.agent.tools.context_manager import ContextManager
 from core.agent.agents.agent_base import AgentBase
 from core.agent.orchestrator import Orchestrator
+from core.agent.config_reloader import ConfigReloader
+from core.agent.session_store import create_session_store
+from core.config.config import config_manager
+from core.log import setup_logging
 
-# Asegurar que la carpeta logs existe
-log_dir = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
-os.makedirs(log_dir, exist_ok=True)
-log_path = os.path.join(log_dir, "agent_debug.log")
-logging.basicConfig(filename=log_path, level=logging.DEBUG)
+# Logging JSON en logs/agent.log, con el nivel de LOG_LEVEL y escritura en un hilo aparte
+setup_logging(config_manager.get_logging_config(), "agent.log")
 
-# Cargar tools desde archivo local - AHORA DESDE client_config
-with open("client_config/tools_schema.json", "r", encoding="utf-8") as f:
-    tools = json.load(f)
-
-patterns_path = "client_config/entity_patterns.json"
-reference_map_path = "client_config/reference_map.json"
-patterns_path = "client_config/entity_patterns.json"
-reference_map_path = "client_config/reference_map.json"
-context_manager = ContextManager(patterns_path, reference_map_path)
+CONFIG_DIR = "client_config"
 
 # Cargar agentes dinámicamente desde client_config/agents_config.json
 def load_agents_from_config(config_path):
@@ -37,17 +29,67 @@ def load_agents_from_config(config_path):
     # No añadir allowed_roles por defecto, solo usar lo que venga en el JSON
     return [AgentBase(**cfg) for cfg in configs]
 
-agents_config_path = "client_config/agents_config.json"
-agents = load_agents_from_config(agents_config_path)
+def build_orchestrator(session_store, config_dir=CONFIG_DIR, previous=None):
+    """
+    Construye un orquestador completo (herramientas, patrones, agentes, enrutado y modos)
+    a partir de los JSON de client_config.
+
+    Args:
+        session_store (SessionStore): Almacén de sesiones, compartido entre recargas.
+        config_dir (str, opcional): Carpeta de configuración.
+        previous (Orchestrator, opcional): Orquestador al que sustituye (recarga en caliente).
+
+    Returns:
+        Orchestrator: Orquestador listo para atender peticiones.
+    """
+    # Las lecturas cacheadas por ConfigManager (límites de herramientas...) también se renuevan
+    config_manager.reload_config()
+    with open(os.path.join(config_dir, "tools_schema.json"), "r", encoding="utf-8") as f:
+        tools = json.load(f)
+    context_manager = ContextManager(os.path.join(config_dir, "entity_patterns.json"),
+                                     os.path.join(config_dir, "reference_map.json"))
+    agents = load_agents_from_config(os.path.join(config_dir, "agents_config.json"))
+    # Identificar router_agent y agentes normales
+    router_agent = next((a for a in agents if a.name == "router_agent"), None)
+    user_agents = [a for a in agents if a.name != "router_agent"]
+    return Orchestrator(user_agents, router_agent, tools, context_manager, session_store,
+                        config_dir=config_dir, previous=previous)
 
-# Identificar router_agent y agentes normales
-router_agent = next((a for a in agents if a.name == "router_agent"), None)
-user_agents = [a for a in agents if a.name != "router_agent"]
+# Almacén de sesiones (memoria o SQLite compartido entre workers, según SESSION_BACKEND)
+session_store = create_session_store(config_manager.get_session_config())
 
 # Crear el orquestador
-orchestrator = Orchestrator(user_agents, router_agent, tools, context_manager)
+orchestrator = build_orchestrator(session_store)
+
+def _swap_orchestrator(new_orchestrator):
+    """
+    Publica el orquestador recargado. Es una única asignación: cada petición usa el
+    orquestador que había al empezar, así que las que están en curso terminan con el anterior.
+    """
+    global orchestrator
+    orchestrator = new_orchestrator
+
+def reload_orchestrator():
+    """
+    Reconstruye el orquestador desde client_config y lo publica.
+    Returns:
+        bool: True si la configuración nueva era válida y se ha aplicado.
+    """
+    return config_reloader.reload()
+
+# Recarga en caliente: un hilo vigila client_config y sustituye el orquestador al cambiar
+reload_config = config_manager.get_reload_config()
+config_reloader = ConfigReloader(
+    CONFIG_DIR,
+    build=lambda: build_orchestrator(session_store, previous=orchestrator),
+    on_swap=_swap_orchestrator,
+    interval=reload_config["interval"],
+    debounce=reload_config["debounce"],
+)
+if reload_config["enabled"]:
+    config_reloader.start()
 
-def responder(user_input: str, user_role: str = "cliente", requested_mode: str = "") -> dict:
+def responder(user_input: str, user_role: str = "cliente", requested_mode: str = "", session_id: str = None) -> dict:
     """
     Función principal de entrada para procesar la petición del usuario.
     Llama al orquestador para obtener la respuesta adecuada según el rol, la entrada y el modo.
@@ -56,8 +98,32 @@ def responder(user_input: str, user_role: str = "cliente", requested_mode: str =
         user_input (str): Entrada del usuario.
         user_role (str, opcional): Rol del usuario. Por defecto es 'cliente'.
         requested_mode (str, opcional): Modo solicitado ('rigido' o 'flexible').
+        session_id (str, opcional): Identificador de la conversación.
     
     Returns:
         dict: Respuesta generada por el orquestador.
     """
-    return orchestrator.responder(user_input, user_role=user_role, requested_mode=requested_mode)
+    return orchestrator.responder(user_input, user_role=user_role, requested_mode=requested_mode, session_id=session_id)
+
+async def aresponder(user_input: str, user_role: str = "cliente", requested_mode: str = "", session_id: str = None) -> dict:
+    """
+    Versión asíncrona de responder() para servidores ASGI: no bloquea el event loop
+    mientras se espera al modelo o a las herramientas.
+    """
+    return await orchestrator.aresponder(user_input, user_role=user_role, requested_mode=requested_mode, session_id=session_id)
+
+async def astream_responder(user_input: str, user_role: str = "cliente", requested_mode: str = "", session_id: str = None):
+    """
+    Igual que aresponder() pero va devolviendo los eventos del turno (agente elegido,
+    herramientas, tokens) a medida que se producen; el último evento es "done" o "error".
+    """
+    async for event in orchestrator.astream(user_input, user_role=user_role, requested_mode=requested_mode, session_id=session_id):
+        yield event
+
+def get_stats() -> dict:
+    """
+    Devuelve las métricas internas del orquestador activo y de la recarga de configuración.
+    """
+    stats = orchestrator.get_stats()
+    stats["config_reload"] = config_reloader.stats()
+    return stats
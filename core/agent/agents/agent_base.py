@@ -1,11 +1,19 @@
+import asyncio
 import logging
 import json
+import time
 import requests
-from groq import Groq
-from core.config.config import GROQ_API_KEY, GROQ_MODEL, SERVER_URL
-from jsonschema import validate, ValidationError
-import os
-import re
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from core.config.config import GROQ_MODEL, config_manager
+from core.agent.llm_pool import LLMOverloaded, shared_llm_clients
+from core.agent.stages import StageTimer
+from core.agent.tools.http_client import default_http_client
+from core.agent.streaming import astream_completion
+from core.agent.tools.entity_engine import load_engine
+from core.agent.tools.tool_registry import ToolRegistry
+from core.agent.tools.validation_messages import ValidationMessages
+from core.metrics import TOOL_ERRORS, TOOL_SECONDS
 
 class AgentBase:
     """
@@ -29,7 +37,42 @@ class AgentBase:
         self.specialization = specialization
         self.tools = tools
         self.allowed_roles = allowed_roles if allowed_roles is not None else ["cliente", "admin", "soporte"]
-        self.client = Groq(api_key=GROQ_API_KEY)
+        # Clientes del modelo: el orquestador inyecta los suyos; si no, se crean al primer uso
+        self._client = None
+        self._async_client = None
+        # Registro de herramientas, caché de respuestas y cliente HTTP, compartidos y asignados por el orquestador
+        self.tool_registry = None
+        self.tool_cache = None
+        self.tool_inflight = None
+        self.http_client = None
+        self.tool_batcher = None
+        # Tiempo por etapa (agente y herramientas); el orquestador asigna el suyo
+        self.stages = StageTimer()
+        # Límites de ejecución de herramientas por turno
+        tools_config = config_manager.get_tools_config()
+        self.tool_timeout = tools_config["tool_timeout"]
+        self.max_tool_calls = tools_config["max_tool_calls"]
+        self.max_parallel_tools = tools_config["max_parallel_tools"]
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = shared_llm_clients()[0]
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = shared_llm_clients()[1]
+        return self._async_client
+
+    @async_client.setter
+    def async_client(self, value):
+        self._async_client = value
 
     def handle(self, user_input, entidades, context, tools_schema=None):
         """
@@ -38,8 +81,32 @@ class AgentBase:
         messages = self._build_messages(user_input, entidades)
         tools_to_use = self._select_tools(tools_schema)
         try:
-            resp = self._call_model(messages, tools_to_use)
+            with self.stages.stage("agent"):
+                resp = self._call_model(messages, tools_to_use)
             return self._process_model_response(resp, tools_to_use, entidades)
+        except LLMOverloaded:
+            raise  # no es un fallo del agente: lo gestiona quien llama (503, reintentos)
+        except Exception as e:
+            return self._handle_error(e)
+
+    async def ahandle(self, user_input, entidades, context, tools_schema=None, on_event=None, planned=None):
+        """
+        Versión asíncrona de handle(): usa el cliente asíncrono de Groq y un cliente HTTP
+        asíncrono para las herramientas, de modo que no bloquea el event loop.
+        Si se indica on_event, la respuesta del modelo se recibe en streaming y se emiten
+        eventos de tokens y de progreso de herramientas. Si se indica planned (llamada al
+        modelo lanzada por adelantado con los mismos mensajes), se usa su respuesta.
+        """
+        tools_to_use = self._select_tools(tools_schema)
+        try:
+            with self.stages.stage("agent"):
+                if planned is not None:
+                    resp = await planned
+                else:
+                    resp = await self._acall_model(self._build_messages(user_input, entidades), tools_to_use, on_event)
+            return await self._aprocess_model_response(resp, tools_to_use, entidades, on_event)
+        except LLMOverloaded:
+            raise  # no es un fallo del agente: lo gestiona quien llama (503, reintentos)
         except Exception as e:
             return self._handle_error(e)
 
@@ -51,7 +118,22 @@ class AgentBase:
             tool_choice="auto",
             max_completion_tokens=1024
         )
-        logging.debug(f"[{self.name}] Respuesta cruda: {resp!r}")
+        logging.debug("[%s] Respuesta cruda: %r", self.name, resp, extra={"event": "llm_response"})
+        return resp
+
+    async def _acall_model(self, messages, tools_to_use, on_event=None):
+        kwargs = dict(
+            model=GROQ_MODEL, # type: ignore
+            messages=messages,
+            tools=tools_to_use,
+            tool_choice="auto",
+            max_completion_tokens=1024
+        )
+        if on_event is not None:
+            resp = await astream_completion(self.async_client, on_event, **kwargs)
+        else:
+            resp = await self.async_client.chat.completions.create(**kwargs)
+        logging.debug("[%s] Respuesta cruda: %r", self.name, resp, extra={"event": "llm_response"})
         return resp
 
     def _process_model_response(self, resp, tools_to_use, entidades):
@@ -59,6 +141,16 @@ class AgentBase:
         if getattr(msg, "tool_calls", None):
             resultados = self._process_tool_calls(msg.tool_calls, tools_to_use, entidades)
             return {"type": "tool_calls", "agent": self.name, "results": resultados}
+        return self._chat_response(msg)
+
+    async def _aprocess_model_response(self, resp, tools_to_use, entidades, on_event=None):
+        msg = resp.choices[0].message
+        if getattr(msg, "tool_calls", None):
+            resultados = await self._aprocess_tool_calls(msg.tool_calls, tools_to_use, entidades, on_event)
+            return {"type": "tool_calls", "agent": self.name, "results": resultados}
+        return self._chat_response(msg)
+
+    def _chat_response(self, msg):
         if msg.content is not None:
             try:
                 parsed = json.loads(msg.content)
@@ -69,7 +161,7 @@ class AgentBase:
         return {"type": "chat", "agent": self.name, "response": msg.content}
 
     def _handle_error(self, e):
-        logging.error(f"[{self.name}] Error en la llamada a la API: {e}")
+        logging.error("[%s] Error en la llamada a la API: %s", self.name, e)
         if "tool_use_failed" in str(e) or "Failed to call a function" in str(e):
             return {"type": "chat", "agent": self.name, "response": "Lo siento, no puedo ayudarte con esa consulta. ¿Hay algo específico sobre mi especialización en lo que pueda asistirte?"}
         return {"type": "error", "agent": self.name, "error": f"Error procesando la solicitud: {str(e)}"}
@@ -83,99 +175,279 @@ class AgentBase:
                 "content": f"Entidades detectadas: {json.dumps(entidades)}"
             })
         messages.append({"role": "user", "content": user_input})
-        logging.debug(f"[{self.name}] Mensajes enviados: {messages}")
+        logging.debug("[%s] Mensajes enviados: %s", self.name, messages, extra={"event": "llm_messages"})
         return messages
 
     def _select_tools(self, tools_schema):
-        if tools_schema is None:
-            tools_schema = []
-        return [t for t in tools_schema if t["function"]["name"] in self.tools] if tools_schema else []
+        return self._get_registry(tools_schema).tools_for(self.tools)
+
+    def _get_registry(self, tools_schema=None):
+        """
+        Devuelve el registro de herramientas compartido. Si el agente se usa sin orquestador
+        (o con otro esquema de herramientas), construye uno propio la primera vez.
+        """
+        registry = self.tool_registry
+        if registry is None or (tools_schema is not None and tools_schema is not registry.source):
+            patterns = load_engine("client_config/entity_patterns.json").patterns
+            messages = ValidationMessages.from_file("client_config/validation_messages.json",
+                                                    config_manager.get_validation_config()["locale"])
+            registry = self.tool_registry = ToolRegistry(tools_schema or [], patterns, messages=messages)
+        return registry
+
+    def _prepare_tool_call(self, call, entidades):
+        """
+        Parsea, completa y valida los argumentos de una tool call.
+        Si algo falla devuelve el resultado de error (dict); si no, devuelve
+        (name, args, tool_schema, pattern_errors).
+        """
+        name = call.function.name
+        try:
+            args = json.loads(call.function.arguments)
+        except Exception:
+            logging.exception("[%s] Error parseando arguments para %s", self.name, name)
+            return {"tool": name, "error": "args invalidos"}
+        # Solo se valida contra el esquema si la herramienta es de este agente
+        tool_schema = self._get_registry().get(name) if name in self.tools else None
+        args = self._fill_missing_args(args, tool_schema, entidades)
+        errores = []
+        if not self._validate_args(args, tool_schema, name, errores):
+            return errores[0]
+        pattern_errors = self._validate_patterns(args)
+        return name, args, tool_schema, pattern_errors
+
+    def _split_tool_calls(self, tool_calls):
+        """
+        Aplica el límite max_tool_calls: devuelve (llamadas a ejecutar, resultados de las descartadas).
+        """
+        tool_calls = list(tool_calls)
+        descartadas = [
+            {"tool": call.function.name, "error": "límite de herramientas por turno alcanzado"}
+            for call in tool_calls[self.max_tool_calls:]
+        ]
+        if descartadas:
+            logging.warning("[%s] %s tool calls descartadas por max_tool_calls=%s", self.name, len(descartadas), self.max_tool_calls)
+        return tool_calls[:self.max_tool_calls], descartadas
 
     def _process_tool_calls(self, tool_calls, tools_to_use, entidades):
-        patterns_path = "client_config/entity_patterns.json"
+        """
+        Ejecuta las tool calls de un turno. Las llamadas independientes se lanzan en paralelo
+        (como mucho max_parallel_tools a la vez) y los resultados conservan el orden original.
+        """
+        calls, descartadas = self._split_tool_calls(tool_calls)
+
+        def execute(call):
+            return self._execute_tool_call(call, entidades)
+
+        with self.stages.stage("tools"):
+            if len(calls) <= 1:
+                return [execute(call) for call in calls] + descartadas
+            with ThreadPoolExecutor(max_workers=min(len(calls), self.max_parallel_tools)) as pool:
+                return list(pool.map(execute, calls)) + descartadas
+
+    async def _aprocess_tool_calls(self, tool_calls, tools_to_use, entidades, on_event=None):
+        calls, descartadas = self._split_tool_calls(tool_calls)
+        # Con el ToolBatcher las llamadas simultáneas viajan en una sola petición /batch, así
+        # que se lanzan todas a la vez (max_tool_calls sigue acotando cuántas hay)
+        semaphore = asyncio.Semaphore(max(len(calls), 1) if self.tool_batcher is not None else self.max_parallel_tools)
+
+        async def execute(call):
+            async with semaphore:
+                result = await self._aexecute_tool_call(call, entidades)
+            if on_event is not None:
+                await on_event({"event": "tool", "tool": result["tool"], "status": "error" if "error" in result else "ok"})
+            return result
+
+        with self.stages.stage("tools"):
+            return list(await asyncio.gather(*(execute(call) for call in calls))) + descartadas
+
+    def _execute_tool_call(self, call, entidades):
+        prepared = self._prepare_tool_call(call, entidades)
+        if isinstance(prepared, dict):
+            return prepared
+        name, args, tool_schema, pattern_errors = prepared
+        if pattern_errors:
+            return self._tool_pattern_error(name, pattern_errors)
+        return self._invoke_tool(name, tool_schema, args)
+
+    def _invoke_tool(self, name, tool_schema, args):
+        """
+        Llama a la herramienta ya validada y convierte timeouts y fallos del backend en resultados de error.
+        """
+        start = time.perf_counter()
         try:
-            with open(patterns_path, 'r', encoding='utf-8') as f:
-                entity_patterns = json.load(f)
+            out = self._call_tool(name, tool_schema, args)
+        except requests.Timeout:
+            logging.error("[%s] Timeout (%ss) llamando al backend para %s", self.name, self.tool_timeout, name)
+            return self._tool_failure(name, "timeout", start)
         except Exception:
-            entity_patterns = {}
-        resultados = []
-        for call in tool_calls: # type: ignore
-            name = call.function.name
-            try:
-                args = json.loads(call.function.arguments)
-            except Exception:
-                logging.exception(f"[{self.name}] Error parseando arguments para {name}")
-                resultados.append({"tool": name, "error": "args invalidos"})
-                continue
-            tool_schema = next((t for t in tools_to_use if t["function"]["name"] == name), None)
-            args = self._fill_missing_args(args, tool_schema, entidades)
-            if not self._validate_args(args, tool_schema, name, resultados):
-                continue
-            pattern_errors = self._validate_patterns(args, entity_patterns)
-            if pattern_errors:
-                resultados.append(self._tool_pattern_error(name, pattern_errors))
-                continue
-            http_info = self._get_http_info(tool_schema)
-            try:
-                out = self._call_tool_endpoint(http_info, args)
-            except Exception:
-                logging.exception(f"[{self.name}] Error al llamar al backend para {name}")
-                resultados.append({"tool": name, "error": "backend failure"})
-                continue
-            resultados.append({"tool": name, "params": args, "response": out})
-        return resultados
-
-    def _validate_patterns(self, args, entity_patterns):
-        pattern_errors = []
-        for arg_name, arg_value in args.items():
-            if arg_name in entity_patterns:
-                pattern = entity_patterns[arg_name]
-                if not re.fullmatch(pattern, str(arg_value)):
-                    pattern_errors.append(f"El valor '{arg_value}' para '{arg_name}' no cumple el formato requerido.")
-        return pattern_errors
+            logging.exception("[%s] Error al llamar al backend para %s", self.name, name)
+            return self._tool_failure(name, "backend failure", start)
+        TOOL_SECONDS.observe(time.perf_counter() - start, name)
+        return {"tool": name, "params": args, "response": out}
 
-    def _tool_pattern_error(self, name, pattern_errors):
-        logging.warning(f"[{self.name}] Validación de patrón fallida para {name}: {pattern_errors}")
-        error_messages = [
+    async def _aexecute_tool_call(self, call, entidades):
+        prepared = self._prepare_tool_call(call, entidades)
+        if isinstance(prepared, dict):
+            return prepared
+        name, args, tool_schema, pattern_errors = prepared
+        if pattern_errors:
+            return await self._atool_pattern_error(name, pattern_errors)
+        return await self._ainvoke_tool(name, tool_schema, args)
+
+    async def _ainvoke_tool(self, name, tool_schema, args):
+        start = time.perf_counter()
+        try:
+            out = await asyncio.wait_for(self._acall_tool(name, tool_schema, args), timeout=self.tool_timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            logging.error("[%s] Timeout (%ss) llamando al backend para %s", self.name, self.tool_timeout, name)
+            return self._tool_failure(name, "timeout", start)
+        except Exception:
+            logging.exception("[%s] Error al llamar al backend para %s", self.name, name)
+            return self._tool_failure(name, "backend failure", start)
+        TOOL_SECONDS.observe(time.perf_counter() - start, name)
+        return {"tool": name, "params": args, "response": out}
+
+    def _tool_failure(self, name, error, start):
+        TOOL_SECONDS.observe(time.perf_counter() - start, name)
+        TOOL_ERRORS.inc(name, error)
+        return {"tool": name, "error": error}
+
+    def _check_tool_args(self, name, args):
+        """
+        Validación de run_tool(): esquema y formatos, sin llamar al modelo.
+        Returns:
+            tuple: (esquema de la herramienta, resultado de error o None).
+        """
+        registry = self._get_registry()
+        tool_schema = registry.get(name)
+        message = registry.validate_args(name, args) if tool_schema else None
+        if message is not None:
+            return tool_schema, {"tool": name, "error": f"validación fallida: {message}"}
+        pattern_errors = registry.validate_patterns(args)
+        if pattern_errors:
+            return tool_schema, {"tool": name, "error": " ".join(pattern_errors)}
+        return tool_schema, None
+
+    def run_tool(self, name, args):
+        """
+        Ejecuta directamente una herramienta con argumentos ya conocidos (sin pasar por el
+        modelo), con la misma validación, caché y gestión de errores que una tool call.
+        Returns:
+            dict: {"tool", "params", "response"} o {"tool", "error"}.
+        """
+        tool_schema, error = self._check_tool_args(name, args)
+        if error is not None:
+            return error
+        with self.stages.stage("tools"):
+            return self._invoke_tool(name, tool_schema, args)
+
+    async def arun_tool(self, name, args):
+        """
+        Versión asíncrona de run_tool().
+        """
+        tool_schema, error = self._check_tool_args(name, args)
+        if error is not None:
+            return error
+        with self.stages.stage("tools"):
+            return await self._ainvoke_tool(name, tool_schema, args)
+
+    def _validate_patterns(self, args):
+        return self._get_registry().validate_patterns(args)
+
+    def _pattern_error_messages(self, name, pattern_errors):
+        return [
             {"role": "system", "content": "Eres un asistente amable y conciso. Si el usuario comete un error de formato, explica el error de forma clara, breve y directa, sin explicaciones largas ni ejemplos extensos. Solo indica el campo, el valor y que revise el formato."},
             {"role": "user", "content": f"El usuario intentó consultar '{name}' pero: {'; '.join(pattern_errors)} Por favor, indícale el error de forma breve y concreta."}
         ]
+
+    def _pattern_error_result(self, name, pattern_errors):
+        """
+        Error de formato con los mensajes configurados, sin llamar al modelo.
+        Returns:
+            dict | None: El resultado de error, o None si la redacción con el modelo está activada (llm_phrasing).
+        """
+        logging.warning("[%s] Validación de patrón fallida para %s: %s", self.name, name, pattern_errors)
+        if self._get_registry().messages.llm_phrasing:
+            return None
+        return {"tool": name, "error": " ".join(pattern_errors)}
+
+    def _tool_pattern_error(self, name, pattern_errors):
+        result = self._pattern_error_result(name, pattern_errors)
+        if result is not None:
+            return result
         resp = self.client.chat.completions.create(
             model=GROQ_MODEL, # type: ignore
-            messages=error_messages, # type: ignore
+            messages=self._pattern_error_messages(name, pattern_errors), # type: ignore
+            max_completion_tokens=80
+        )
+        msg = resp.choices[0].message
+        return {"tool": name, "error": msg.content}
+
+    async def _atool_pattern_error(self, name, pattern_errors):
+        result = self._pattern_error_result(name, pattern_errors)
+        if result is not None:
+            return result
+        resp = await self.async_client.chat.completions.create(
+            model=GROQ_MODEL, # type: ignore
+            messages=self._pattern_error_messages(name, pattern_errors), # type: ignore
             max_completion_tokens=80
         )
         msg = resp.choices[0].message
         return {"tool": name, "error": msg.content}
 
-    def _get_http_info(self, tool_schema):
+    def _call_tool(self, name, tool_schema, args):
         """
-        Extrae método y endpoint del esquema de la herramienta, une SERVER_URL con el endpoint.
+        Ejecuta la herramienta pasando por la caché de respuestas si está disponible.
         """
-        if tool_schema and "http" in tool_schema["function"]:
-            http_info = tool_schema["function"]["http"]
-            method = http_info.get("method", "POST").upper()
-            endpoint = http_info.get("url", None)
-            if endpoint:
-                url = f"{SERVER_URL}{endpoint}"
-                return {"method": method, "url": url}
-        # Fallback por compatibilidad
-        name = tool_schema["function"]["name"] if tool_schema else ""
-        return {"method": "POST", "url": f"{SERVER_URL}/{name}"}
+        http_info = self._get_registry().http_info(name)
+        if self.tool_cache is None:
+            return self._call_tool_endpoint(http_info, args)
+        key, hit, out = self.tool_cache.lookup(name, tool_schema, args)
+        if hit:
+            return out
+        out = self._call_tool_endpoint(http_info, args)
+        self.tool_cache.store(key, tool_schema, args, out)
+        return out
+
+    async def _acall_tool(self, name, tool_schema, args):
+        http_info = self._get_registry().http_info(name)
+        if self.tool_cache is None:
+            return await self._acall_tool_endpoint(http_info, args)
+        key, hit, out = await self.tool_cache.alookup(name, tool_schema, args)
+        if hit:
+            return out
+
+        async def call():
+            out = await self._acall_tool_endpoint(http_info, args)
+            await self.tool_cache.astore(key, tool_schema, args, out)
+            return out
+        # Solo se agrupan las herramientas cacheables (key no es None): nunca las escrituras
+        if self.tool_inflight is None:
+            return await call()
+        return await self.tool_inflight.run(key, call)
 
     def _call_tool_endpoint(self, http_info, args):
         """
-        Realiza la llamada HTTP según el método y la URL especificados.
+        Realiza la llamada HTTP según el método y la URL especificados, con el cliente con pool compartido.
         """
         method = http_info["method"]
         url = http_info["url"]
-        logging.info(f"[{self.name}] Ejecutando herramienta {url} con método {method} y args {args}")
-        if method == "GET":
-            r = requests.get(url, params=args)
-        else:
-            r = requests.post(url, json=args)
-        r.raise_for_status()
-        return r.json()
+        logging.info("[%s] Ejecutando herramienta %s con método %s y args %s", self.name, url, method, args, extra={"event": "tool_call"})
+        client = self.http_client or default_http_client()
+        return client.request(method, url, args, idempotent=http_info.get("idempotent", False))
+
+    async def _acall_tool_endpoint(self, http_info, args):
+        """
+        Versión asíncrona de _call_tool_endpoint(). Las herramientas con "batch": true se
+        agrupan con las demás llamadas simultáneas en una petición /batch (ToolBatcher).
+        """
+        method = http_info["method"]
+        url = http_info["url"]
+        logging.info("[%s] Ejecutando herramienta %s con método %s y args %s", self.name, url, method, args, extra={"event": "tool_call"})
+        if self.tool_batcher is not None and http_info.get("batch"):
+            return await self.tool_batcher.call(http_info, args)
+        client = self.http_client or default_http_client()
+        return await client.arequest(method, url, args, idempotent=http_info.get("idempotent", False))
 
     def _fill_missing_args(self, args, tool_schema, entidades):
         reqs = tool_schema["function"]["parameters"].get("required", []) if tool_schema else []
@@ -185,12 +457,9 @@ class AgentBase:
         return args
 
     def _validate_args(self, args, tool_schema, name, resultados):
-        schema = tool_schema["function"]["parameters"] if tool_schema else None
-        if schema:
-            try:
-                validate(instance=args, schema=schema)
-            except ValidationError as e:
-                logging.warning(f"[{self.name}] Validación fallida para {name}: {e.message}")
-                resultados.append({"tool": name, "error": f"validación fallida: {e.message}"})
-                return False
+        message = self._get_registry().validate_args(name, args) if tool_schema else None
+        if message is not None:
+            logging.warning("[%s] Validación fallida para %s: %s", self.name, name, message)
+            resultados.append({"tool": name, "error": f"validación fallida: {message}"})
+            return False
         return True
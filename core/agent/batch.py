@@ -0,0 +1,308 @@
+"""
+Procesado por lotes de mensajes de chat (re-ejecuciones de QA, migraciones, clasificación
+nocturna...): BatchRunner ejecuta los turnos con el Orchestrator con concurrencia acotada
+y va devolviendo los resultados según terminan. Lo usan POST /api/chat/batch y este
+módulo como línea de comandos:
+
+    python -m core.agent.batch mensajes.jsonl -o resultados.jsonl --concurrency 16
+
+Cada línea de la entrada es un objeto con "message" y, opcionalmente, "id", "user_role",
+"mode" y "session_id" (sin "id" se usa el número de línea). Cada línea de la salida es
+{"id", "session_id", "response", "error", "elapsed_ms", "deduplicated"}. La salida hace
+de checkpoint: al repetir el comando tras una interrupción se saltan los id que ya tienen
+resultado sin error (los errores se reintentan y su última línea es la que vale). Los
+turnos de una conversación que ya estaban hechos no se repiten; para que los pendientes
+conserven su contexto hace falta SESSION_BACKEND=sqlite.
+
+La deduplicación (--dedupe o BATCH_DEDUPE=true) solo es segura en lotes de consultas: un
+mensaje repetido que crea o actualiza datos (p. ej. "abre una incidencia...") se
+ejecutaría una vez y todas sus copias recibirían el mismo resultado.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+from core.agent.llm_pool import LLMOverloaded
+
+
+class BatchRunner:
+    """
+    Ejecuta una lista de turnos de chat con `concurrency` turnos en curso como máximo:
+    - Los elementos con la misma session_id forman una conversación y se ejecutan en orden,
+      uno tras otro (cada turno depende del historial del anterior). Si un turno falla, los
+      siguientes de la conversación no se ejecutan y se devuelven con error (turno omitido).
+    - Los elementos sin session_id son turnos independientes en sesiones nuevas; con
+      dedupe, los que tienen el mismo mensaje, rol y modo se ejecutan una sola vez y el
+      resultado se copia al resto (marcados con "deduplicated"). Como el runner no sabe qué
+      herramientas usará cada turno, dedupe está desactivado por defecto: solo debe usarse
+      en lotes de consultas, nunca con mensajes que crean o actualizan datos.
+    Dentro de cada turno, el orquestador agrupa además las consultas al router y las
+    llamadas a herramientas cacheables idénticas que coinciden en el tiempo (InFlight).
+    """
+    def __init__(self, respond, concurrency=8, dedupe=False, retries=2):
+        """
+        Args:
+            respond (callable): Corrutina (message, user_role, mode, session_id) -> dict,
+                p. ej. core.agent.agent.aresponder.
+            concurrency (int): Turnos en curso a la vez.
+            dedupe (bool): Ejecutar una sola vez los turnos independientes idénticos (solo
+                para lotes de lectura).
+            retries (int): Reintentos de un turno rechazado por LLMOverloaded (cola del
+                modelo llena), con espera creciente.
+        """
+        self.respond = respond
+        self.concurrency = max(1, concurrency)
+        self.dedupe = dedupe
+        self.retries = retries
+        self.items = 0
+        self.executed = 0
+        self.deduplicated = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def plan(self, items):
+        """
+        Agrupa los elementos en trabajos independientes.
+
+        Args:
+            items (list): Elementos normalizados (ver normalize_items()).
+
+        Returns:
+            list: Trabajos; cada uno es una lista de pasos que se ejecutan en orden y cada
+            paso una lista de elementos que comparten una ejecución (la del primero).
+        """
+        jobs = []
+        conversations = {}
+        identical = {}
+        for item in items:
+            if item["session_id"]:
+                steps = conversations.get(item["session_id"])
+                if steps is None:
+                    steps = conversations[item["session_id"]] = []
+                    jobs.append(steps)
+                steps.append([item])
+            elif self.dedupe:
+                key = (item["message"], item["user_role"], item["mode"])
+                step = identical.get(key)
+                if step is None:
+                    step = identical[key] = []
+                    jobs.append([step])
+                step.append(item)
+            else:
+                jobs.append([[item]])
+        return jobs
+
+    async def run(self, items):
+        """
+        Ejecuta los elementos y devuelve los resultados según terminan (no en el orden de
+        entrada; cada resultado lleva el id de su elemento).
+
+        Args:
+            items (list): Elementos normalizados (ver normalize_items()).
+
+        Yields:
+            dict: Resultado de cada elemento.
+        """
+        jobs = iter(self.plan(items))
+        results = asyncio.Queue()
+        self.items += len(items)
+
+        async def worker():
+            for steps in jobs:
+                for position, step in enumerate(steps):
+                    step_results = await self._execute(step)
+                    for result in step_results:
+                        results.put_nowait(result)
+                    if step_results[0]["error"] is not None:
+                        # El resto de la conversación dependería de un turno que no se hizo
+                        for result in self._skip(steps[position + 1:]):
+                            results.put_nowait(result)
+                        break
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        pending = len(workers)
+        for task in workers:
+            task.add_done_callback(lambda _: results.put_nowait(None))
+        try:
+            while pending:
+                result = await results.get()
+                if result is None:
+                    pending -= 1
+                    continue
+                yield result
+            for task in workers:
+                task.result()  # propaga un fallo inesperado de un worker
+        finally:
+            # El cliente de /api/chat/batch puede desconectarse a mitad del lote
+            for task in workers:
+                task.cancel()
+
+    async def _execute(self, step):
+        """
+        Ejecuta el turno del primer elemento del paso y devuelve un resultado por elemento.
+        """
+        item = step[0]
+        session_id = item["session_id"] or uuid.uuid4().hex
+        start = time.perf_counter()
+        if item["message"]:
+            self.executed += 1
+            response, error = await self._respond(item, session_id)
+        else:
+            response, error = None, "Mensaje requerido"
+        if error is not None:
+            self.errors += 1
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.deduplicated += len(step) - 1
+        return [
+            {
+                "id": other["id"],
+                "session_id": session_id,
+                "response": response,
+                "error": error,
+                "elapsed_ms": elapsed_ms,
+                "deduplicated": other is not item,
+            }
+            for other in step
+        ]
+
+    def _skip(self, steps):
+        skipped = [item for step in steps for item in step]
+        self.skipped += len(skipped)
+        return [
+            {
+                "id": item["id"],
+                "session_id": item["session_id"],
+                "response": None,
+                "error": "Turno omitido: falló un turno anterior de la conversación",
+                "elapsed_ms": 0.0,
+                "deduplicated": False,
+            }
+            for item in skipped
+        ]
+
+    async def _respond(self, item, session_id):
+        """
+        Returns:
+            tuple: (respuesta, None) o (respuesta o None, mensaje de error). Una respuesta
+            {"type": "error"} del orquestador o del agente cuenta como error: no queda en
+            el checkpoint y detiene el resto de la conversación.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.respond(item["message"], item["user_role"], item["mode"], session_id)
+            except LLMOverloaded as e:
+                if attempt == self.retries:
+                    return None, str(e)
+                await asyncio.sleep(0.5 * 2 ** attempt)
+            except Exception as e:
+                return None, f"Error procesando consulta: {e}"
+            if isinstance(response, dict) and response.get("type") == "error":
+                return response, response.get("error") or "Error procesando consulta"
+            return response, None
+
+    def stats(self):
+        return {
+            "items": self.items,
+            "executed": self.executed,
+            "deduplicated": self.deduplicated,
+            "errors": self.errors,
+            "skipped": self.skipped,
+        }
+
+
+def normalize_items(items, default_role="cliente", default_mode="rigido"):
+    """
+    Completa los campos de cada elemento del lote.
+
+    Args:
+        items (iterable): Diccionarios con "message" y, opcionalmente, "id", "user_role",
+            "mode" y "session_id".
+        default_role (str): Rol si el elemento no lo indica.
+        default_mode (str): Modo si el elemento no lo indica.
+
+    Returns:
+        list: Elementos con todos los campos; sin "id", el id es la posición (desde 1).
+    """
+    return [
+        {
+            "id": item.get("id") if item.get("id") is not None else position,
+            "message": item.get("message") or "",
+            "user_role": item.get("user_role") or default_role,
+            "mode": item.get("mode") or default_mode,
+            "session_id": item.get("session_id"),
+        }
+        for position, item in enumerate(items, start=1)
+    ]
+
+
+def completed_ids(path):
+    """
+    Lee un fichero de resultados (checkpoint) y devuelve los id terminados sin error.
+
+    Args:
+        path (str): Fichero JSONL de resultados.
+
+    Returns:
+        set: Ids ya procesados (vacío si el fichero no existe).
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # última línea a medio escribir si se interrumpió
+            if result.get("error"):
+                done.discard(result["id"])
+            else:
+                done.add(result["id"])
+    return done
+
+
+async def _run_cli(args):
+    from core.agent.agent import aresponder
+    from core.config.config import config_manager
+
+    with open(args.input, encoding="utf-8") as f:
+        items = normalize_items(json.loads(line) for line in f if line.strip())
+    done = completed_ids(args.output) if args.output and not args.no_resume else set()
+    pending = [item for item in items if item["id"] not in done]
+
+    config = config_manager.get_batch_config()
+    runner = BatchRunner(aresponder, concurrency=args.concurrency or config["concurrency"],
+                         dedupe=args.dedupe or config["dedupe"])
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        async for result in runner.run(pending):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    summary = {**runner.stats(), "already_done": len(items) - len(pending), "elapsed_s": round(elapsed, 2),
+               "items_per_s": round(len(pending) / elapsed, 2) if elapsed else None}
+    print(json.dumps(summary), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Fichero JSONL con un mensaje por línea")
+    parser.add_argument("-o", "--output", help="Fichero JSONL de resultados y checkpoint (por defecto, la salida estándar)")
+    parser.add_argument("--concurrency", type=int, help="Turnos en curso a la vez (por defecto BATCH_CONCURRENCY)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Ejecutar una sola vez los turnos independientes repetidos (solo lotes de consultas)")
+    parser.add_argument("--no-resume", action="store_true", help="No saltar los id que ya están en la salida")
+    asyncio.run(_run_cli(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+class TTLCache:
+    """
+    Caché LRU acotada con caducidad por entrada y etiquetas para invalidación selectiva.
+    Es segura entre hilos y lleva contadores de aciertos, fallos, expulsiones e invalidaciones.
+    """
+    def __init__(self, max_entries=10_000, ttl=300):
+        """
+        Args:
+            max_entries (int): Número máximo de entradas (se expulsa la menos usada).
+            ttl (float): Caducidad por defecto en segundos.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expira, valor, etiquetas)
+        self._tags = {}  # etiqueta -> set(keys)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (encontrado, valor).
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key, value, ttl=None, tags=()):
+        expires = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate_tag(self, tag):
+        """
+        Elimina todas las entradas marcadas con la etiqueta dada.
+        """
+        with self._lock:
+            keys = self._tags.pop(tag, ())
+            for key in list(keys):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+    # Misma interfaz asíncrona que SQLiteCache; en memoria no hay E/S que sacar del event loop
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, ttl=None, tags=()):
+        self.set(key, value, ttl, tags)
+
+    async def ainvalidate_tag(self, tag):
+        self.invalidate_tag(tag)
+
+    def _remove(self, key):
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class InFlight:
+    """
+    Agrupa llamadas asíncronas idénticas que están en curso a la vez: la primera se ejecuta
+    y las demás esperan su resultado en lugar de repetirla. Complementa a las cachés, que
+    solo ayudan cuando la primera llamada ya ha terminado (p. ej. en un lote con muchas
+    consultas iguales simultáneas). La llamada corre en su propia tarea, así que cancelar a
+    quien la inició no la cancela para los demás.
+    """
+    def __init__(self):
+        self._tasks = {}  # clave -> tarea en curso
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key, factory):
+        """
+        Args:
+            key: Clave de la llamada (hashable); None para no agrupar.
+            factory (callable): Devuelve la corrutina que hace la llamada.
+
+        Returns:
+            El resultado de la llamada (propia o de la que ya estaba en curso).
+        """
+        if key is None:
+            return await factory()
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # recuperada aunque ya no la espere nadie
+
+    def stats(self):
+        return {"calls": self.calls, "coalesced": self.coalesced}
+
+
+class QueryNormalizer:
+    """
+    Normaliza consultas para la caché del router: minúsculas, espacios colapsados y
+    entidades sustituidas por marcadores ("deuda del 12345678A" -> "deuda del <dni>"),
+    ya que la decisión de enrutado no depende del valor concreto de la entidad.
+    """
+    def __init__(self, entity_patterns):
+        self._patterns = [
+            (re.compile(pattern, re.IGNORECASE if entity == "dni" else 0), f"<{entity}>")
+            for entity, pattern in entity_patterns.items()
+        ]
+
+    def __call__(self, text):
+        for pattern, placeholder in self._patterns:
+            text = pattern.sub(placeholder, text)
+        return _SPACES_RE.sub(" ", text.strip().lower())
+
+
+class ToolResponseCache:
+    """
+    Caché de respuestas de herramientas de solo lectura, con clave (herramienta, argumentos
+    canónicos). La política de cada herramienta se declara en tools_schema.json:
+    - "cache": {"ttl": 60} -> la respuesta se cachea 60 segundos.
+    - "cache": {"invalidates": ["dni"]} -> herramienta de escritura: al ejecutarse invalida
+      todas las respuestas cacheadas con el mismo valor de esos argumentos.
+    """
+    def __init__(self, max_entries=10_000, cache=None):
+        """
+        Args:
+            max_entries (int): Entradas máximas de la caché en memoria.
+            cache (TTLCache | SQLiteCache, opcional): Caché ya creada (p. ej. compartida entre workers).
+        """
+        self._cache = cache if cache is not None else TTLCache(max_entries=max_entries)
+
+    @staticmethod
+    def policy(tool_schema):
+        return tool_schema["function"].get("cache", {}) if tool_schema else {}
+
+    def lookup(self, name, tool_schema, args):
+        """
+        Returns:
+            tuple: (clave, encontrado, respuesta). La clave es None si la herramienta no es cacheable.
+        """
+        if not self.policy(tool_schema).get("ttl"):
+            return None, False, None
+        key = (name, json.dumps(args, sort_keys=True, ensure_ascii=False, separators=(",", ":")))
+        hit, value = self._cache.get(key)
+        return key, hit, value
+
+    def store(self, key, tool_schema, args, response):
+        """
+        Guarda la respuesta (si la herramienta es cacheable) y aplica las invalidaciones
+        que declare la herramienta (si es de escritura).
+        """
+        policy = self.policy(tool_schema)
+        if key is not None:
+            self._cache.set(key, response, ttl=policy["ttl"], tags=self._tags(args))
+        for field in policy.get("invalidates", []):
+            if field in args:
+                self._cache.invalidate_tag((field, str(args[field])))
+
+    async def alookup(self, name, tool_schema, args):
+        """Versión asíncrona de lookup(): con la caché compartida, la E/S va a un hilo."""
+        if not self.policy(tool_schema).get("ttl"):
+            return None, False, None
+        key = (name, json.dumps(args, sort_keys=True, ensure_ascii=False, separators=(",", ":")))
+        hit, value = await self._cache.aget(key)
+        return key, hit, value
+
+    async def astore(self, key, tool_schema, args, response):
+        """Versión asíncrona de store()."""
+        policy = self.policy(tool_schema)
+        if key is not None:
+            await self._cache.aset(key, response, ttl=policy["ttl"], tags=self._tags(args))
+        for field in policy.get("invalidates", []):
+            if field in args:
+                await self._cache.ainvalidate_tag((field, str(args[field])))
+
+    @staticmethod
+    def _tags(args):
+        return [(field, str(value)) for field, value in args.items()]
+
+    def stats(self):
+        return self._cache.stats()
+
+
+def create_caches(config):
+    """
+    Crea las cachés del router y de respuestas de herramientas según la configuración
+    (ver ConfigManager.get_cache_config()): en memoria del worker o, con backend "sqlite",
+    compartidas por todos los workers a través del SharedStore.
+    Returns:
+        tuple: (caché del router, ToolResponseCache), o (None, None) si están desactivadas.
+    """
+    if not config["enabled"]:
+        return None, None
+    if config.get("backend", "memory") == "sqlite":
+        from core.agent.shared_store import shared_store
+        store = shared_store(config["db_path"])
+        return (store.cache("router", config["router_max_entries"], config["router_ttl"]),
+                ToolResponseCache(cache=store.cache("tools", config["tool_max_entries"])))
+    return (TTLCache(config["router_max_entries"], config["router_ttl"]),
+            ToolResponseCache(config["tool_max_entries"]))
@@ -0,0 +1,126 @@
+import glob
+import logging
+import os
+import threading
+import time
+
+
+class ConfigReloader:
+    """
+    Recarga en caliente de client_config.
+
+    Un hilo en segundo plano comprueba cada `interval` segundos la fecha de modificación
+    y el tamaño de los JSON de configuración. Cuando cambian, construye un orquestador
+    nuevo (agentes, registro de herramientas, patrones...) fuera del camino de las
+    peticiones y lo entrega a `on_swap`, que lo publica con una única asignación. Las
+    peticiones en curso terminan con el orquestador que tenían; si la configuración
+    nueva no es válida se mantiene la anterior.
+    """
+    def __init__(self, config_dir, build, on_swap, interval=2.0, debounce=0.2):
+        """
+        Args:
+            config_dir (str): Carpeta con los JSON de configuración.
+            build (callable): Construye y devuelve el objeto nuevo (sin argumentos).
+            on_swap (callable): Recibe el objeto nuevo y lo publica.
+            interval (float): Segundos entre comprobaciones.
+            debounce (float): Espera tras detectar un cambio, para no leer ficheros a medio escribir.
+        """
+        self.config_dir = config_dir
+        self.build = build
+        self.on_swap = on_swap
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshot = self.snapshot()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.failures = 0
+        self.last_build_ms = None
+        self.last_swap_us = None
+        self.last_error = None
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {ruta: (mtime_ns, tamaño)} de cada JSON de la carpeta.
+        """
+        snapshot = {}
+        for path in glob.glob(os.path.join(self.config_dir, "*.json")):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logging.exception("[config] Error comprobando cambios de configuración")
+
+    def check(self):
+        """
+        Recarga si algún fichero ha cambiado desde la última comprobación.
+        Returns:
+            bool: True si se ha publicado una configuración nueva.
+        """
+        snapshot = self.snapshot()
+        if snapshot == self._snapshot:
+            return False
+        changed = sorted(
+            os.path.basename(path) for path in set(snapshot) | set(self._snapshot)
+            if snapshot.get(path) != self._snapshot.get(path)
+        )
+        time.sleep(self.debounce)
+        self._snapshot = self.snapshot()
+        logging.info("[config] Cambios detectados en %s, recargando", changed)
+        return self.reload()
+
+    def reload(self):
+        """
+        Construye la configuración nueva y la publica. Serializado: nunca hay dos
+        recargas a la vez.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                new = self.build()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logging.error("[config] Configuración nueva inválida, se mantiene la anterior: %s", e)
+                return False
+            built = time.perf_counter()
+            self.on_swap(new)
+            swapped = time.perf_counter()
+            self.reloads += 1
+            self.last_error = None
+            self.last_build_ms = round((built - start) * 1000, 2)
+            self.last_swap_us = round((swapped - built) * 1e6, 2)
+            logging.info("[config] Configuración recargada en %s ms (swap %s us)", self.last_build_ms, self.last_swap_us)
+            return True
+
+    def stats(self):
+        return {
+            "running": self._thread is not None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_build_ms": self.last_build_ms,
+            "last_swap_us": self.last_swap_us,
+            "last_error": self.last_error,
+        }
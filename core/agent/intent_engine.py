@@ -0,0 +1,213 @@
+import logging
+import re
+import string
+import time
+
+from core.agent.local_router import normalize_token
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class MissingValue(Exception):
+    """Un campo de la plantilla no está en los datos o es None."""
+
+
+class _TemplateFormatter(string.Formatter):
+    """
+    str.format() que falla con MissingValue si falta un campo o vale None, y que
+    escribe los booleanos como 'sí'/'no' o, con "{campo:texto si true|texto si false}",
+    con el texto indicado.
+    """
+    def get_field(self, field_name, args, kwargs):
+        try:
+            return super().get_field(field_name, args, kwargs)
+        except (KeyError, IndexError, TypeError) as e:
+            raise MissingValue(field_name) from e
+
+    def format_field(self, value, format_spec):
+        if value is None:
+            raise MissingValue()
+        if isinstance(value, bool):
+            if "|" in format_spec:
+                true_text, false_text = format_spec.split("|", 1)
+                return true_text if value else false_text
+            value = "sí" if value else "no"
+        return super().format_field(value, format_spec)
+
+
+_formatter = _TemplateFormatter()
+
+
+def render_template(template, values):
+    """
+    Rellena una plantilla con str.format() sobre `values`. Admite acceso a campos
+    anidados ("{ultimo_pago[importe]}") y especificadores de formato ("{deuda:.2f}").
+    Raises:
+        MissingValue: Si algún campo no existe o es None.
+    """
+    return _formatter.vformat(template, (), values)
+
+
+class Intent:
+    """
+    Intención determinista de intents.json: si la consulta encaja con alguno de sus
+    patrones o palabras clave y están las entidades requeridas, se responde llamando
+    a `tool` con esas entidades y rellenando la plantilla `response` con el resultado.
+    """
+    def __init__(self, config):
+        self.name = config["name"]
+        self.tool = config["tool"]
+        self.agent = config.get("agent")
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in config.get("patterns", [])]
+        self.keywords = {normalize_token(k) for k in config.get("keywords", [])}
+        # Patrones que descartan la intención (p. ej. peticiones de modificación)
+        self.exclude = [re.compile(p, re.IGNORECASE) for p in config.get("exclude", [])]
+        # {argumento de la herramienta: entidad}; por defecto cada entidad requerida con su nombre
+        self.args = config.get("args") or {e: e for e in config.get("required_entities", [])}
+        self.response = config.get("response")
+        self.empty_response = config.get("empty_response")
+
+    def matches(self, user_input, tokens):
+        if any(p.search(user_input) for p in self.exclude):
+            return False
+        return any(p.search(user_input) for p in self.patterns) or bool(self.keywords & tokens)
+
+
+class IntentEngine:
+    """
+    Motor de plantillas de intención para consultas deterministas. El orquestador lo
+    prueba antes de cualquier llamada al modelo: cuando una única intención encaja y
+    las entidades necesarias ya están extraídas, el turno se sirve con una llamada a la
+    herramienta y una plantilla, sin router LLM ni agente LLM.
+
+    Si el mensaje trae un valor con forma de entidad que no la cumple (p. ej. un DNI con
+    un dígito de menos o sin letra), la plantilla no se aplica: usaría la entidad de un turno anterior
+    de la sesión y respondería con datos de otro abonado. Ese turno sigue por el router y
+    la validación de argumentos del agente, que explica qué está mal.
+    """
+    def __init__(self, config=None, entity_patterns=None):
+        """
+        Args:
+            config (dict, opcional): Configuración de intents.json.
+            entity_patterns (dict, opcional): Patrones de entity_patterns.json, con los que
+                se comprueban los valores de "malformed_entities".
+        """
+        config = config or {}
+        entity_patterns = entity_patterns or {}
+        self.enabled = config.get("enabled", True)
+        self.modes = set(config.get("modes", ["rigido"]))
+        # Los mensajes largos rara vez son una consulta de un solo dato
+        self.max_words = config.get("max_words", 20)
+        self.intents = [Intent(c) for c in config.get("intents", [])]
+        # {entidad: (patrón de los valores que lo parecen, patrón válido)}. Un valor que
+        # también cumple otro patrón (p. ej. "12345678" es un identificador o "123456789"
+        # un teléfono) cuenta igualmente como mal escrito: lo probable es un DNI sin letra
+        self._malformed = {
+            entity: (re.compile(like), re.compile(entity_patterns[entity], re.IGNORECASE))
+            for entity, like in config.get("malformed_entities", {}).items()
+            if entity in entity_patterns
+        }
+        self.local_turns = 0
+        self.llm_turns = 0
+        self.malformed_turns = 0
+        self.by_intent = {}
+        self._match_time = 0.0
+
+    def match(self, user_input, entidades, modo, allowed_agents=None):
+        """
+        Busca la intención que resuelve la consulta.
+
+        Args:
+            user_input (str): Consulta del usuario.
+            entidades (dict): Entidades del mensaje y de la sesión.
+            modo (str): Modo activo de la sesión.
+            allowed_agents (set, opcional): Nombres de los agentes permitidos para el rol.
+
+        Returns:
+            tuple | None: (Intent, argumentos) o None si hay que usar el modelo
+            (ninguna intención, varias a la vez, mensaje largo o faltan entidades).
+        """
+        if not self.enabled or modo not in self.modes or not self.intents:
+            return None
+        start = time.perf_counter()
+        words = _TOKEN_RE.findall(user_input)
+        tokens = {normalize_token(t) for t in words}
+        candidates = [] if len(words) > self.max_words else [
+            intent for intent in self.intents
+            if (allowed_agents is None or intent.agent is None or intent.agent in allowed_agents)
+            and intent.matches(user_input, tokens)
+        ]
+        result = None
+        # Con varias intenciones a la vez la consulta no es trivial: decide el modelo
+        if len(candidates) == 1:
+            intent = candidates[0]
+            if self._has_malformed(user_input, intent.args.values()):
+                self.malformed_turns += 1
+            elif all(entity in entidades for entity in intent.args.values()):
+                result = intent, {arg: entidades[entity] for arg, entity in intent.args.items()}
+        self._match_time += time.perf_counter() - start
+        if result is None:
+            self.llm_turns += 1
+            return None
+        self.local_turns += 1
+        self.by_intent[result[0].name] = self.by_intent.get(result[0].name, 0) + 1
+        logging.info("[intents] %s -> %s", result[0].name, result[0].tool, extra={"event": "routing"})
+        return result
+
+    def _has_malformed(self, user_input, entities):
+        """
+        Returns:
+            bool: Si el mensaje contiene un valor que parece una de esas entidades pero no
+            cumple su patrón.
+        """
+        for entity in entities:
+            if entity not in self._malformed:
+                continue
+            like, valid = self._malformed[entity]
+            for match in like.finditer(user_input):
+                value = match.group()
+                if valid.fullmatch(value):
+                    continue
+                logging.info("[intents] %s mal formado en el mensaje: %s", entity, value, extra={"event": "routing"})
+                return True
+        return False
+
+    def render(self, intent, agent_name, result):
+        """
+        Convierte el resultado de la herramienta en la respuesta del turno: la plantilla
+        rellenada si todo está disponible, o el resultado tal cual (como una tool call)
+        si la herramienta ha fallado o la intención no tiene plantilla.
+        """
+        if "error" not in result and intent.response:
+            values = dict(result.get("params", {}))
+            if isinstance(result.get("response"), dict):
+                values.update(result["response"])
+            text = self._render_first([intent.response, intent.empty_response], values)
+            if text is not None:
+                return {"type": "chat", "agent": agent_name, "response": text, "intent": intent.name}
+        return {"type": "tool_calls", "agent": agent_name, "results": [result], "intent": intent.name}
+
+    @staticmethod
+    def _render_first(templates, values):
+        for template in templates:
+            if template:
+                try:
+                    return render_template(template, values)
+                except MissingValue:
+                    continue
+        return None
+
+    def stats(self):
+        """
+        Turnos servidos localmente (sin ninguna llamada al modelo) frente a los que han
+        necesitado el modelo, y coste medio de la comprobación.
+        """
+        total = self.local_turns + self.llm_turns
+        return {
+            "local_turns": self.local_turns,
+            "llm_turns": self.llm_turns,
+            "local_rate": round(self.local_turns / total, 4) if total else 0.0,
+            "malformed_turns": self.malformed_turns,
+            "by_intent": dict(self.by_intent),
+            "avg_match_us": round(self._match_time / total * 1e6, 2) if total else 0.0,
+        }
@@ -0,0 +1,507 @@
+import asyncio
+import json
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from core.agent.middleware.prompt_builder import estimate_tokens
+from core.agent.providers import create_provider
+from core.config.config import config_manager
+from core.metrics import LLM_ERRORS, LLM_SECONDS, LLM_TOKENS
+
+
+class LLMOverloaded(Exception):
+    """
+    La petición al modelo se rechaza sin enviarla: la cola de espera está llena o la
+    espera (por concurrencia o por límite de RPM/TPM) superaría queue_timeout.
+    """
+
+
+class TokenBucket:
+    """
+    Cubo de tokens con recarga continua (límites por minuto del proveedor). Las reservas
+    pueden dejar el saldo en negativo: la siguiente petición espera a que se recupere, de
+    modo que las peticiones se reparten en el tiempo en orden de llegada.
+    """
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """
+        Descuenta amount del saldo.
+        Returns:
+            float: Segundos que hay que esperar antes de enviar la petición.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount):
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds):
+        """Vacía el cubo durante seconds (tras un 429 del proveedor)."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def _local_bucket(name, per_minute):
+    return TokenBucket(per_minute)
+
+
+def _shared_bucket_factory(path):
+    from core.agent.shared_store import shared_store
+    store = shared_store(path)
+    return lambda name, per_minute: store.token_bucket(name, per_minute)
+
+
+class _Ticket:
+    __slots__ = ("model", "tokens", "buckets", "granted", "event", "loop", "future", "sent")
+
+    def __init__(self, model, tokens, buckets):
+        self.model = model
+        self.tokens = tokens
+        self.buckets = buckets
+        self.granted = False
+        self.event = None
+        self.loop = None
+        self.future = None
+        self.sent = None
+
+
+class LLMLimiter:
+    """
+    Control de admisión de las llamadas al modelo, compartido por el orquestador, el
+    middleware y todos los agentes (síncronos y asíncronos).
+
+      - Concurrencia: max_concurrency peticiones en curso en total y, opcionalmente,
+        un máximo por modelo (model_concurrency).
+      - Límites del proveedor: cubos de tokens por modelo para peticiones por minuto (rpm)
+        y tokens por minuto (tpm). Los tokens de entrada se estiman y se reservan junto con
+        max_completion_tokens; al terminar se devuelve la diferencia con resp.usage.
+      - Backpressure: las peticiones que no caben esperan en una cola FIFO de max_queue
+        plazas; si la cola está llena o la espera superaría queue_timeout, se lanza
+        LLMOverloaded en lugar de enviar la petición y recibir un 429.
+    """
+    def __init__(self, config=None):
+        config = config or {}
+        self.max_concurrency = config.get("max_concurrency", 0)
+        self.model_concurrency = config.get("model_concurrency", {})
+        self.rpm = config.get("rpm", 0)
+        self.tpm = config.get("tpm", 0)
+        self.max_queue = config.get("max_queue", 0)
+        self.queue_timeout = config.get("queue_timeout", 30.0)
+        self.cooldown = config.get("cooldown", 5.0)
+        # Cubos de RPM/TPM del proceso o, con backend "sqlite", compartidos por todos los workers
+        # (con E/S sobre el fichero: las rutas asíncronas la ejecutan en un hilo)
+        self._shared = config.get("backend") == "sqlite"
+        self._bucket_factory = _shared_bucket_factory(config["db_path"]) if self._shared else _local_bucket
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._in_flight = 0
+        self._in_flight_by_model = {}
+        self._buckets = {}
+        self.requests = 0
+        self.max_in_flight = 0
+        self.max_queued = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.provider_429 = 0
+        self.tokens_reserved = 0
+        self.tokens_used = 0
+        self._waits = deque(maxlen=config.get("samples", 1000))
+
+    # --- Admisión ---
+
+    def acquire(self, kwargs):
+        """
+        Espera (bloqueando el hilo) hasta que la petición puede enviarse.
+        Returns:
+            _Ticket: Se devuelve con release().
+        """
+        start = time.perf_counter()
+        ticket, delay = self._reserve(kwargs)
+        if delay:
+            time.sleep(delay)
+        if not self._try_admit(ticket, sync=True):
+            if not ticket.event.wait(self._remaining(start)):
+                self._abandon(ticket)
+                self._refund(ticket)
+                self._reject_timeout()
+        self._record_wait(start)
+        ticket.sent = time.perf_counter()
+        return ticket
+
+    async def aacquire(self, kwargs):
+        """
+        Versión asíncrona de acquire(): la espera no bloquea el event loop.
+        """
+        start = time.perf_counter()
+        ticket, delay = await self._offload(self._reserve, kwargs)
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            admitted = self._try_admit(ticket, sync=False)
+        except LLMOverloaded:
+            await self._offload(self._refund, ticket)
+            raise
+        if not admitted:
+            try:
+                await asyncio.wait_for(asyncio.shield(ticket.future), self._remaining(start))
+            except asyncio.TimeoutError:
+                self._abandon(ticket)
+                await self._offload(self._refund, ticket)
+                self._reject_timeout()
+            except asyncio.CancelledError:
+                self._abandon(ticket)
+                self._refund_later(ticket)
+                raise
+        self._record_wait(start)
+        ticket.sent = time.perf_counter()
+        return ticket
+
+    def release(self, ticket, resp=None, error=None):
+        """
+        Libera la plaza y ajusta la reserva de TPM con el uso real de la respuesta.
+        """
+        self._free(ticket, resp, error)
+        self._settle(ticket, resp, error)
+
+    def arelease(self, ticket, resp=None, error=None):
+        """
+        Como release(), para las rutas asíncronas: la plaza se libera en el acto y, con los
+        cubos compartidos, el ajuste de los cubos se hace en un hilo sin esperarlo.
+        """
+        self._free(ticket, resp, error)
+        if self._shared:
+            self._run_later(self._settle, ticket, resp, error)
+        else:
+            self._settle(ticket, resp, error)
+
+    def _free(self, ticket, resp, error):
+        self._observe(ticket, resp, error)
+        with self._lock:
+            self._in_flight -= 1
+            self._in_flight_by_model[ticket.model] -= 1
+            self._admit_waiters()
+
+    def _settle(self, ticket, resp, error):
+        """Devuelve al cubo de TPM lo no usado y, tras un 429, pausa los cubos del modelo."""
+        used = getattr(getattr(resp, "usage", None), "total_tokens", None)
+        if used is not None:
+            self._count("tokens_used", used)
+            if "tpm" in ticket.buckets and ticket.tokens > used:
+                ticket.buckets["tpm"].refund(ticket.tokens - used)
+        if error is not None and getattr(error, "status_code", None) == 429:
+            self._count("provider_429")
+            logging.warning("[llm] 429 del proveedor para %s; pausa de %ss", ticket.model, self.cooldown)
+            for bucket in ticket.buckets.values():
+                bucket.pause(self.cooldown)
+
+    async def _offload(self, func, *args):
+        """Ejecuta func en un hilo si usa los cubos compartidos (E/S sobre SQLite)."""
+        if self._shared:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def _run_later(self, func, *args):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # fragmentos finalizados fuera del event loop
+            return func(*args)
+        loop.run_in_executor(None, func, *args).add_done_callback(_log_failure)
+
+    def _refund_later(self, ticket):
+        if self._shared:
+            self._run_later(self._refund, ticket)
+        else:
+            self._refund(ticket)
+
+    def _observe(self, ticket, resp, error):
+        """Duración, tokens (campo usage) y errores de la llamada en /metrics."""
+        LLM_SECONDS.observe(time.perf_counter() - ticket.sent, ticket.model)
+        if error is not None:
+            if not isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+                LLM_ERRORS.inc(ticket.model, str(getattr(error, "status_code", None) or type(error).__name__))
+            return
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            LLM_TOKENS.inc(ticket.model, "prompt", amount=getattr(usage, "prompt_tokens", 0) or 0)
+            LLM_TOKENS.inc(ticket.model, "completion", amount=getattr(usage, "completion_tokens", 0) or 0)
+
+    def _reserve(self, kwargs):
+        model = kwargs.get("model", "")
+        tokens = self.estimate_tokens(kwargs)
+        buckets = self._model_buckets(model)
+        delay = 0.0
+        for name, amount in (("rpm", 1), ("tpm", tokens)):
+            if name in buckets:
+                delay = max(delay, buckets[name].reserve(amount))
+        ticket = _Ticket(model, tokens, buckets)
+        self._count("tokens_reserved", tokens)
+        if delay:
+            self._count("rate_limited")
+        if delay > self.queue_timeout:
+            self._refund(ticket)
+            self._reject(f"límite de RPM/TPM de {model} (espera de {delay:.1f}s)")
+        return ticket, delay
+
+    def _refund(self, ticket):
+        for name, amount in (("rpm", 1), ("tpm", ticket.tokens)):
+            if name in ticket.buckets:
+                ticket.buckets[name].refund(amount)
+
+    def _try_admit(self, ticket, sync):
+        with self._lock:
+            self.requests += 1
+            if not self._waiters and self._fits(ticket.model):
+                self._grant(ticket)
+                return True
+            queue_full = self.max_queue and len(self._waiters) >= self.max_queue
+            if not queue_full:
+                if sync:
+                    ticket.event = threading.Event()
+                else:
+                    ticket.loop = asyncio.get_running_loop()
+                    ticket.future = ticket.loop.create_future()
+                self._waiters.append(ticket)
+                self.max_queued = max(self.max_queued, len(self._waiters))
+                return False
+        if sync:
+            self._refund(ticket)
+        self._reject(f"cola de peticiones al modelo llena ({self.max_queue})")
+
+    def _fits(self, model):
+        limit = self.model_concurrency.get(model, 0)
+        return ((not self.max_concurrency or self._in_flight < self.max_concurrency)
+                and (not limit or self._in_flight_by_model.get(model, 0) < limit))
+
+    def _grant(self, ticket):
+        ticket.granted = True
+        self._in_flight += 1
+        self._in_flight_by_model[ticket.model] = self._in_flight_by_model.get(ticket.model, 0) + 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def _admit_waiters(self):
+        # En orden de llegada, saltando las peticiones cuyo modelo está al límite
+        for ticket in list(self._waiters):
+            if self.max_concurrency and self._in_flight >= self.max_concurrency:
+                break
+            if self._fits(ticket.model):
+                self._waiters.remove(ticket)
+                self._grant(ticket)
+                if ticket.event is not None:
+                    ticket.event.set()
+                else:
+                    ticket.loop.call_soon_threadsafe(_resolve, ticket.future)
+
+    def _abandon(self, ticket):
+        """Saca de la cola una petición que deja de esperar (la reserva se devuelve aparte)."""
+        with self._lock:
+            if ticket.granted:
+                # Concedida justo al vencer la espera: se devuelve la plaza
+                self._in_flight -= 1
+                self._in_flight_by_model[ticket.model] -= 1
+                self._admit_waiters()
+            else:
+                self._waiters.remove(ticket)
+
+    def _reject_timeout(self):
+        self._reject(f"espera en cola superior a {self.queue_timeout}s")
+
+    def _remaining(self, start):
+        return max(0.0, self.queue_timeout - (time.perf_counter() - start))
+
+    def _reject(self, reason):
+        self._count("rejected")
+        logging.warning("[llm] Petición rechazada: %s", reason)
+        raise LLMOverloaded(f"Servicio del modelo saturado: {reason}")
+
+    def _model_buckets(self, model):
+        with self._lock:
+            buckets = self._buckets.get(model)
+            if buckets is None:
+                buckets = {}
+                if self.rpm:
+                    buckets["rpm"] = self._bucket_factory(f"{model}:rpm", self.rpm)
+                if self.tpm:
+                    buckets["tpm"] = self._bucket_factory(f"{model}:tpm", self.tpm)
+                self._buckets[model] = buckets
+            return buckets
+
+    @staticmethod
+    def estimate_tokens(kwargs):
+        """
+        Tokens que cuenta el proveedor para el TPM: entrada estimada más max_completion_tokens.
+        """
+        prompt = json.dumps([kwargs.get("messages"), kwargs.get("tools")], ensure_ascii=False, separators=(",", ":"), default=str)
+        return estimate_tokens(prompt) + kwargs.get("max_completion_tokens", 0)
+
+    # --- Métricas ---
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _record_wait(self, start):
+        self._waits.append(time.perf_counter() - start)
+
+    def stats(self):
+        waits = sorted(self._waits)
+        return {
+            "requests": self.requests,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": len(self._waiters),
+            "max_queued": self.max_queued,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "provider_429": self.provider_429,
+            "wait_p50_ms": round(statistics.median(waits) * 1000, 2) if waits else 0.0,
+            "wait_p95_ms": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 2) if waits else 0.0,
+            "tokens_reserved": self.tokens_reserved,
+            "tokens_used": self.tokens_used,
+            "limits": {
+                "shared": self._shared,
+                # Operaciones sobre los cubos compartidos omitidas por el bloqueo del fichero
+                "busy": sum(getattr(bucket, "busy", 0) for buckets in list(self._buckets.values()) for bucket in buckets.values()),
+                "max_concurrency": self.max_concurrency,
+                "model_concurrency": self.model_concurrency,
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "max_queue": self.max_queue,
+            },
+        }
+
+    # --- Clientes ---
+
+    def wrap(self, client):
+        """Envuelve un cliente síncrono compatible con Groq/OpenAI."""
+        return LimitedClient(client, self)
+
+    def wrap_async(self, client):
+        """Envuelve un cliente asíncrono compatible con Groq/OpenAI."""
+        return AsyncLimitedClient(client, self)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _log_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        logging.warning("[llm] Error ajustando los cubos de tokens: %s", task.exception())
+
+
+def _chunk_usage(chunk):
+    # OpenAI lo envía en chunk.usage (último fragmento); Groq, en chunk.x_groq.usage
+    return getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+
+class _LimitedCompletions:
+    def __init__(self, completions, limiter):
+        self._completions = completions
+        self._limiter = limiter
+
+    def create(self, **kwargs):
+        ticket = self._limiter.acquire(kwargs)
+        try:
+            resp = self._completions.create(**kwargs)
+        except BaseException as e:
+            self._limiter.release(ticket, error=e)
+            raise
+        if kwargs.get("stream"):
+            return self._stream(resp, ticket)
+        self._limiter.release(ticket, resp)
+        return resp
+
+    def _stream(self, stream, ticket):
+        # La plaza se mantiene hasta consumir el último fragmento
+        usage = None
+        try:
+            for chunk in stream:
+                usage = _chunk_usage(chunk) or usage
+                yield chunk
+        finally:
+            self._limiter.release(ticket, SimpleNamespace(usage=usage))
+
+
+class _AsyncLimitedCompletions(_LimitedCompletions):
+    async def create(self, **kwargs):
+        ticket = await self._limiter.aacquire(kwargs)
+        try:
+            resp = await self._completions.create(**kwargs)
+        except BaseException as e:
+            self._limiter.arelease(ticket, error=e)
+            raise
+        if kwargs.get("stream"):
+            return self._astream(resp, ticket)
+        self._limiter.arelease(ticket, resp)
+        return resp
+
+    async def _astream(self, stream, ticket):
+        usage = None
+        try:
+            async for chunk in stream:
+                usage = _chunk_usage(chunk) or usage
+                yield chunk
+        finally:
+            self._limiter.arelease(ticket, SimpleNamespace(usage=usage))
+
+
+class LimitedClient:
+    """
+    Cliente del modelo con la misma interfaz (chat.completions.create) que el envuelto,
+    pero que pasa cada llamada por el LLMLimiter compartido.
+    """
+    _completions_class = _LimitedCompletions
+
+    def __init__(self, client, limiter):
+        self.inner = client
+        self.limiter = limiter
+        self.chat = SimpleNamespace(completions=self._completions_class(client.chat.completions, limiter))
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+class AsyncLimitedClient(LimitedClient):
+    _completions_class = _AsyncLimitedCompletions
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_llm_clients():
+    """
+    Clientes del modelo compartidos por todo el proceso: un único proveedor (con su pool
+    de conexiones, síncrono y asíncrono) y un único LLMLimiter. El orquestador los inyecta
+    en el middleware y en los agentes; los componentes sin orquestador los usan por defecto.
+    Returns:
+        tuple: (cliente síncrono, cliente asíncrono, LLMLimiter, LLMProvider).
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            provider = create_provider(config_manager.get_provider_config())
+            limiter = LLMLimiter(config_manager.get_llm_pool_config())
+            _shared = (limiter.wrap(provider.client), limiter.wrap_async(provider.async_client), limiter, provider)
+        return _shared
@@ -0,0 +1,136 @@
+import logging
+import math
+import re
+import time
+
+# Sustitución de acentos para normalizar consultas y palabras clave
+_ACCENTS = str.maketrans("áéíóúüñÁÉÍÓÚÜÑ", "aeiouunAEIOUUN")
+_TOKEN_RE = re.compile(r"\w+")
+
+DEFAULT_STOPWORDS = [
+    "de", "del", "la", "las", "los", "el", "por", "para", "con", "un", "una", "y", "o",
+    "todas", "todos", "ultimo", "total", "estado", "crear", "actualizar", "dni", "foo"
+]
+
+
+def normalize_token(token):
+    """
+    Normaliza una palabra: minúsculas, sin acentos y sin plural simple ('facturas' -> 'factura').
+    """
+    token = token.lower().translate(_ACCENTS)
+    if len(token) > 4 and token.endswith("s"):
+        token = token[:-1]
+    return token
+
+
+class LocalRouter:
+    """
+    Clasificador local de consultas para evitar la llamada al modelo de enrutamiento.
+    Construye un índice de palabras clave a partir de las herramientas y la especialización
+    de cada agente (más las palabras clave y regex opcionales de routing.json) y puntúa
+    cada consulta con pesos tipo IDF. Solo responde si la confianza supera el umbral;
+    en caso contrario el orquestador recurre al router LLM.
+    """
+    def __init__(self, agents, config=None):
+        """
+        Args:
+            agents (list): Agentes enrutables (AgentBase).
+            config (dict, opcional): Configuración de routing.json.
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.confidence_threshold = config.get("confidence_threshold", 0.75)
+        self.min_score = config.get("min_score", 1.0)
+        self.pattern_weight = config.get("pattern_weight", 2.0)
+        self.stopwords = {normalize_token(w) for w in config.get("stopwords", DEFAULT_STOPWORDS)}
+        self.index = self._build_index(agents, config.get("keywords", {}))
+        self.patterns = {
+            name: [re.compile(p, re.IGNORECASE) for p in patterns]
+            for name, patterns in config.get("patterns", {}).items()
+        }
+        self.local_hits = 0
+        self.llm_fallbacks = 0
+        self._local_time = 0.0
+
+    def _build_index(self, agents, extra_keywords):
+        """
+        Crea el índice palabra -> {agente: peso}, con peso = 1 + log(N / df).
+        """
+        terms_by_agent = {}
+        for agent in agents:
+            words = [agent.specialization] + list(agent.tools) + list(extra_keywords.get(agent.name, []))
+            terms = set()
+            for word in words:
+                for token in _TOKEN_RE.findall(word.replace("_", " ")):
+                    token = normalize_token(token)
+                    if len(token) > 2 and token not in self.stopwords:
+                        terms.add(token)
+            terms_by_agent[agent.name] = terms
+        n_agents = max(len(terms_by_agent), 1)
+        document_frequency = {}
+        for terms in terms_by_agent.values():
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        index = {}
+        for name, terms in terms_by_agent.items():
+            for term in terms:
+                index.setdefault(term, {})[name] = 1.0 + math.log(n_agents / document_frequency[term])
+        return index
+
+    def score(self, user_input):
+        """
+        Puntúa la consulta para cada agente.
+        Returns:
+            dict: {nombre_agente: puntuación} solo con los agentes con puntuación > 0.
+        """
+        scores = {}
+        for token in set(_TOKEN_RE.findall(user_input)):
+            for name, weight in self.index.get(normalize_token(token), {}).items():
+                scores[name] = scores.get(name, 0.0) + weight
+        for name, patterns in self.patterns.items():
+            if any(p.search(user_input) for p in patterns):
+                scores[name] = scores.get(name, 0.0) + self.pattern_weight
+        return scores
+
+    def rank(self, user_input):
+        """
+        Devuelve (mejor_agente, confianza). La confianza es top / (top + segundo).
+        """
+        scores = self.score(user_input)
+        if not scores:
+            return None, 0.0
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        best, top = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        if top < self.min_score:
+            return None, 0.0
+        return best, top / (top + second)
+
+    def classify(self, user_input):
+        """
+        Devuelve el agente si la consulta es enrutable localmente con suficiente confianza,
+        o None si hay que consultar al router LLM. Actualiza las métricas de aciertos.
+        """
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        agent_name, confidence = self.rank(user_input)
+        self._local_time += time.perf_counter() - start
+        if agent_name and confidence >= self.confidence_threshold:
+            self.local_hits += 1
+            logging.info("[local_router] %s (confianza %.2f)", agent_name, confidence, extra={"event": "routing"})
+            return agent_name
+        self.llm_fallbacks += 1
+        return None
+
+    def stats(self):
+        """
+        Métricas de enrutamiento local: aciertos, llamadas al router LLM evitadas y coste medio.
+        """
+        total = self.local_hits + self.llm_fallbacks
+        return {
+            "local_hits": self.local_hits,
+            "llm_fallbacks": self.llm_fallbacks,
+            "hit_rate": round(self.local_hits / total, 4) if total else 0.0,
+            "avg_local_us": round(self._local_time / total * 1e6, 2) if total else 0.0,
+        }
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+
+class LoopClients:
+    """
+    Un cliente asíncrono (p. ej. httpx.AsyncClient) por event loop.
+
+    Las conexiones de httpx pertenecen al loop en que se abrieron y, una vez cerrado ese
+    loop, el cliente ya no puede cerrarlas. Por eso cada cliente se cierra en su propio
+    loop: una tarea en espera lo cierra cuando se cancela, y asyncio.run() (también el de
+    uvicorn) cancela las tareas pendientes antes de cerrar el loop. Así, las llamadas
+    repetidas a asyncio.run() de los lotes y benchmarks no acumulan sockets abiertos.
+    """
+    def __init__(self, factory):
+        """
+        Args:
+            factory (callable): Crea un cliente nuevo; debe tener aclose().
+        """
+        self.factory = factory
+        self._clients = {}  # loop -> (cliente, tarea que lo cierra)
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns:
+            Cliente del event loop en curso (se crea la primera vez).
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(loop)
+            if entry is None:
+                # Loops cerrados sin cancelar sus tareas: no se pueden cerrar, solo olvidar
+                for closed in [other for other in self._clients if other.is_closed()]:
+                    del self._clients[closed]
+                client = self.factory()
+                entry = self._clients[loop] = (client, loop.create_task(self._close_with_loop(loop, client)))
+        return entry[0]
+
+    async def _close_with_loop(self, loop, client):
+        try:
+            await loop.create_future()
+        finally:
+            with self._lock:
+                self._clients.pop(loop, None)
+            await client.aclose()
+
+    async def aclose(self):
+        """
+        Cierra el cliente del event loop en curso.
+        """
+        with self._lock:
+            entry = self._clients.get(asyncio.get_running_loop())
+        if entry is not None:
+            entry[1].cancel()
+            await asyncio.gather(entry[1], return_exceptions=True)
+
+    def close(self):
+        """
+        Pide el cierre de los clientes de los loops que siguen abiertos (desde cualquier hilo).
+        """
+        with self._lock:
+            entries = list(self._clients.items())
+        for loop, (_, closer) in entries:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(closer.cancel)
@@ -1,7 +1,10 @@
 import logging
-import json
-from groq import Groq
-from core.config.config import GROQ_API_KEY, GROQ_MODEL
+from core.config.config import GROQ_MODEL
+from core.agent.llm_pool import LLMOverloaded, shared_llm_clients
+from core.agent.streaming import astream_completion
+from core.agent.middleware.prompt_builder import PromptBuilder
+from core.agent.middleware.response_templates import ResponseTemplates
+from core.metrics import ERRORS
 
 class ControlMiddleware:
     """
@@ -9,68 +12,120 @@ class ControlMiddleware:
     - En modo 'rigido', reenvía la respuesta sin cambios.
     - En modo 'flexible', puede usar el contexto público para enriquecer la respuesta.
     """
-    def __init__(self):
-        self.client = Groq(api_key=GROQ_API_KEY)
+    def __init__(self, client=None, async_client=None, prompt_builder=None, templates=None):
+        # El orquestador pasa sus clientes; por defecto, los compartidos del proceso
+        self.client = client or shared_llm_clients()[0]
+        self.async_client = async_client or shared_llm_clients()[1]
+        # Prompt de reescritura compacto y con presupuesto de tokens
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        # Plantillas locales para resultados simples: evitan la reescritura con el modelo
+        self.templates = templates or ResponseTemplates({"enabled": False})
 
     def process(self, consulta, usuario, modo, contexto_publico, respuesta_agente):
-        logging.debug(f"[middleware] Modo: {modo} | Consulta: {consulta} | Usuario: {usuario}")
+        logging.debug("[middleware] Modo: %s | Consulta: %s | Usuario: %s", modo, consulta, usuario)
         try:
-            if modo == 'rigido':
-                return respuesta_agente
-            elif modo == 'flexible':
+            if self._requiere_llm(modo, respuesta_agente):
+                local = self.templates.render(respuesta_agente['results'])
+                if local is not None:
+                    return {'type': 'chat', 'response': local, 'mode': modo}
                 # Si la respuesta es un resultado de tool_calls, generar prompt y llamar a Groq
-                if isinstance(respuesta_agente, dict) and respuesta_agente.get('type') == 'tool_calls' and 'results' in respuesta_agente:
-                    results = respuesta_agente['results']
-                    prompt = self._construir_prompt_flexible(consulta, results, contexto_publico)
-                    try:
-                        resp = self.client.chat.completions.create(
-                            model=GROQ_MODEL, # type: ignore
-                            messages=[
-                                {"role": "system", "content": "Eres un asistente experto. Responde de forma clara, natural y explicativa usando los datos proporcionados por herramientas externas. Si hay cálculos, hazlos tú. Si falta información, indícalo educadamente."},
-                                {"role": "user", "content": prompt}
-                            ],
-                            max_completion_tokens=512
-                        )
-                        content = resp.choices[0].message.content
-                    except Exception as e:
-                        logging.error(f"[middleware] Error llamando a Groq: {e}")
-                        content = f"[ERROR LLM] {e}\n\nPrompt usado:\n{prompt}"
-                    return {
-                        'type': 'chat',
-                        'response': content,
-                        'mode': modo
-                    }
-                
-                if isinstance(respuesta_agente, dict) and 'response' in respuesta_agente and respuesta_agente.get('type') == 'chat':
-                    respuesta_agente = respuesta_agente.copy()
-                    respuesta_agente['response'] = (respuesta_agente['response'] or "")
-                    return respuesta_agente
-                elif isinstance(respuesta_agente, str):
-                    return respuesta_agente
-                else:
-                    return respuesta_agente
-            else:
-                logging.warning(f"[middleware] Modo desconocido: {modo}, usando fallback rígido.")
-                return respuesta_agente
+                prompt = self._construir_prompt_flexible(consulta, respuesta_agente['results'], contexto_publico)
+                try:
+                    resp = self.client.chat.completions.create(
+                        model=GROQ_MODEL, # type: ignore
+                        messages=self._mensajes_flexibles(prompt), # type: ignore
+                        max_completion_tokens=512
+                    )
+                    content = resp.choices[0].message.content
+                except LLMOverloaded:
+                    raise
+                except Exception as e:
+                    ERRORS.inc("middleware")
+                    logging.error("[middleware] Error llamando a Groq: %s", e)
+                    content = f"[ERROR LLM] {e}\n\nPrompt usado:\n{prompt}"
+                return {'type': 'chat', 'response': content, 'mode': modo}
+            return self._procesar_sin_llm(modo, respuesta_agente)
+        except LLMOverloaded:
+            raise  # 503 con Retry-After en la API; el lote reintenta
         except Exception as e:
-            logging.error(f"[middleware] Error procesando respuesta en modo {modo}: {e}")
+            ERRORS.inc("middleware")
+            logging.error("[middleware] Error procesando respuesta en modo %s: %s", modo, e)
             return respuesta_agente
 
-    def _construir_prompt_flexible(self, consulta, results, contexto_publico):
+    async def aprocess(self, consulta, usuario, modo, contexto_publico, respuesta_agente, on_event=None):
         """
-        Construye un prompt claro para el LLM usando la consulta, el contexto y los resultados de las tool calls.
+        Versión asíncrona de process(): la reescritura del modo flexible usa el cliente asíncrono de Groq.
+        Si se indica on_event, la reescritura se recibe en streaming y se emite token a token.
         """
-        prompt = ""
-        if contexto_publico:
-            prompt += "Historial reciente:\n"
-            for m in contexto_publico[-2:]:
-                prompt += f"- {m['role']}: {m['content']}\n"
-        prompt += f"\nConsulta del usuario: {consulta}\n\nResultados de herramientas (JSON):\n{json.dumps(results, ensure_ascii=False, indent=2)}\n\n"
-        prompt += (
-            "Eres un asistente experto. Responde de forma clara, natural y CONCISA usando los datos proporcionados por herramientas externas. "
-            "Si el usuario pide un dato concreto (correo, teléfono, dirección, deuda, etc.) y está presente en los resultados, responde ÚNICAMENTE con ese dato, sin explicaciones ni frases adicionales. "
-            "Si el dato no está disponible, responde solo: 'No se ha encontrado información para ese abonado.' "
-            "No expliques si el dato ya estaba consultado ni des mensajes técnicos. "
-            "Si hay cálculos, hazlos tú. Si falta información, indícalo de forma breve y natural."
+        logging.debug("[middleware] Modo: %s | Consulta: %s | Usuario: %s", modo, consulta, usuario)
+        try:
+            if self._requiere_llm(modo, respuesta_agente):
+                local = self.templates.render(respuesta_agente['results'])
+                if local is not None:
+                    return {'type': 'chat', 'response': local, 'mode': modo}
+                prompt = self._construir_prompt_flexible(consulta, respuesta_agente['results'], contexto_publico)
+                kwargs = dict(
+                    model=GROQ_MODEL, # type: ignore
+                    messages=self._mensajes_flexibles(prompt), # type: ignore
+                    max_completion_tokens=512
+                )
+                try:
+                    if on_event is not None:
+                        resp = await astream_completion(self.async_client, on_event, **kwargs)
+                    else:
+                        resp = await self.async_client.chat.completions.create(**kwargs)
+                    content = resp.choices[0].message.content
+                except LLMOverloaded:
+                    raise
+                except Exception as e:
+                    ERRORS.inc("middleware")
+                    logging.error("[middleware] Error llamando a Groq: %s", e)
+                    content = f"[ERROR LLM] {e}\n\nPrompt usado:\n{prompt}"
+                return {'type': 'chat', 'response': content, 'mode': modo}
+            return self._procesar_sin_llm(modo, respuesta_agente)
+        except LLMOverloaded:
+            raise  # 503 con Retry-After en la API; el lote reintenta
+        except Exception as e:
+            ERRORS.inc("middleware")
+            logging.error("[middleware] Error procesando respuesta en modo %s: %s", modo, e)
+            return respuesta_agente
+
+    def _requiere_llm(self, modo, respuesta_agente):
+        """
+        Indica si la respuesta debe reescribirse (modo flexible con resultados de tool_calls): con una
+        plantilla local si el resultado es simple o, si no, con el modelo.
+        """
+        return (
+            modo == 'flexible'
+            and isinstance(respuesta_agente, dict)
+            and respuesta_agente.get('type') == 'tool_calls'
+            and 'results' in respuesta_agente
         )
-        return prompt
+
+    def _procesar_sin_llm(self, modo, respuesta_agente):
+        """
+        Procesa las respuestas que no necesitan llamada al modelo.
+        """
+        if modo == 'rigido':
+            return respuesta_agente
+        elif modo == 'flexible':
+            if isinstance(respuesta_agente, dict) and 'response' in respuesta_agente and respuesta_agente.get('type') == 'chat':
+                respuesta_agente = respuesta_agente.copy()
+                respuesta_agente['response'] = (respuesta_agente['response'] or "")
+            return respuesta_agente
+        else:
+            logging.warning("[middleware] Modo desconocido: %s, usando fallback rígido.", modo)
+            return respuesta_agente
+
+    def _mensajes_flexibles(self, prompt):
+        return [
+            {"role": "system", "content": "Eres un asistente experto. Responde de forma clara, natural y explicativa usando los datos proporcionados por herramientas externas. Si hay cálculos, hazlos tú. Si falta información, indícalo educadamente."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _construir_prompt_flexible(self, consulta, results, contexto_publico):
+        """
+        Construye un prompt claro para el LLM usando la consulta, el contexto y los resultados de las tool calls,
+        dentro del presupuesto de tokens del PromptBuilder.
+        """
+        return self.prompt_builder.build(consulta, results, contexto_publico)
@@ -0,0 +1,185 @@
+import json
+import math
+import re
+
+from core.agent.local_router import normalize_token
+
+# Estimación de tokens sin tokenizador: ~4 caracteres por token en español/JSON
+CHARS_PER_TOKEN = 4
+_TOKEN_RE = re.compile(r"\w+")
+
+INSTRUCCIONES = (
+    "Eres un asistente experto. Responde de forma clara, natural y CONCISA usando los datos proporcionados por herramientas externas. "
+    "Si el usuario pide un dato concreto (correo, teléfono, dirección, deuda, etc.) y está presente en los resultados, responde ÚNICAMENTE con ese dato, sin explicaciones ni frases adicionales. "
+    "Si el dato no está disponible, responde solo: 'No se ha encontrado información para ese abonado.' "
+    "No expliques si el dato ya estaba consultado ni des mensajes técnicos. "
+    "Si hay cálculos, hazlos tú. Si falta información, indícalo de forma breve y natural."
+)
+
+
+def estimate_tokens(text):
+    """
+    Estimación rápida del número de tokens de un texto (sin tokenizador del modelo).
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class PromptBuilder:
+    """
+    Construye el prompt de reescritura del modo flexible con un presupuesto de tokens.
+
+    Los resultados de las herramientas se serializan en JSON compacto y se reducen según
+    la política "prompt" de cada herramienta en tools_schema.json:
+      - "fields": campos que se envían al modelo (proyección por defecto).
+      - "keep": campos que se envían siempre; si la consulta nombra algún campo, solo se
+        envían los nombrados más estos.
+      - "max_rows": filas máximas de cada lista; el resto se resume ("sum": campos que
+        se suman sobre todas las filas).
+    Si aun así se supera max_input_tokens, se reducen las filas a la mitad sucesivamente,
+    después se quita el historial y, como último recurso, se recorta el JSON.
+    """
+    def __init__(self, tools_schema=None, config=None):
+        """
+        Args:
+            tools_schema (list, opcional): Herramientas con su política "prompt".
+            config (dict, opcional): max_input_tokens, default_max_rows y history_messages.
+        """
+        config = config or {}
+        self.max_input_tokens = config.get("max_input_tokens", 2000)
+        self.default_max_rows = config.get("default_max_rows", 20)
+        self.history_messages = config.get("history_messages", 2)
+        self.policies = {
+            tool["function"]["name"]: tool["function"].get("prompt", {})
+            for tool in (tools_schema or [])
+        }
+        self.prompts = 0
+        self.over_budget = 0
+        self._tool_stats = {}
+
+    def build(self, consulta, results, contexto_publico):
+        """
+        Returns:
+            str: Prompt para el modelo, dentro del presupuesto siempre que sea posible.
+        """
+        mentioned = {normalize_token(t) for t in _TOKEN_RE.findall(consulta)}
+        history = self._history(contexto_publico)
+        has_rows = any(_has_long_list(r.get("response")) for r in results)
+        scale = 1.0
+        while True:
+            projected = [self._project_result(r, mentioned, scale) for r in results]
+            prompt = self._render(consulta, projected, history)
+            if estimate_tokens(prompt) <= self.max_input_tokens or not has_rows or scale <= 1 / 64:
+                break
+            scale /= 2
+        if estimate_tokens(prompt) > self.max_input_tokens and history:
+            history = ""
+            prompt = self._render(consulta, projected, history)
+        if estimate_tokens(prompt) > self.max_input_tokens:
+            self.over_budget += 1
+            prompt = self._render(consulta, projected, history, max_chars=self._results_char_budget(consulta))
+        self._record(results, projected)
+        return prompt
+
+    def _history(self, contexto_publico):
+        if not contexto_publico or not self.history_messages:
+            return ""
+        lines = [f"- {m['role']}: {m['content']}" for m in contexto_publico[-self.history_messages:]]
+        return "Historial reciente:\n" + "\n".join(lines) + "\n"
+
+    def _render(self, consulta, projected, history, max_chars=None):
+        data = compact_json(projected)
+        if max_chars is not None and len(data) > max_chars:
+            data = data[:max(max_chars, 0)] + "…(recortado)"
+        return (
+            f"{history}\nConsulta del usuario: {consulta}\n\n"
+            f"Resultados de herramientas (JSON):\n{data}\n\n{INSTRUCCIONES}"
+        )
+
+    def _results_char_budget(self, consulta):
+        fixed = len(self._render(consulta, [], ""))
+        return self.max_input_tokens * CHARS_PER_TOKEN - fixed
+
+    def _project_result(self, result, mentioned, scale):
+        if "response" not in result:
+            return result
+        policy = self.policies.get(result.get("tool"), {})
+        fields = self._fields_for(policy, mentioned)
+        max_rows = max(1, int(policy.get("max_rows", self.default_max_rows) * scale))
+        projected = {"tool": result.get("tool"), "params": result.get("params", {})}
+        projected["response"] = self._project(result["response"], fields, max_rows, policy.get("sum", []))
+        return projected
+
+    @staticmethod
+    def _fields_for(policy, mentioned):
+        fields = policy.get("fields")
+        if not fields:
+            return None
+        named = [f for f in fields if normalize_token(f) in mentioned]
+        if named:
+            return set(named) | set(policy.get("keep", []))
+        return set(fields)
+
+    def _project(self, value, fields, max_rows, sum_fields):
+        if isinstance(value, dict):
+            return {
+                k: self._project(v, fields, max_rows, sum_fields)
+                for k, v in value.items()
+                if fields is None or k in fields or isinstance(v, (list, dict))
+            }
+        if isinstance(value, list):
+            rows = [self._project(v, fields, max_rows, sum_fields) for v in value[:max_rows]]
+            if len(value) <= max_rows:
+                return rows
+            resumen = {"_filas_totales": len(value), "_filas_omitidas": len(value) - max_rows}
+            for field in sum_fields:
+                resumen[f"_suma_{field}"] = round(sum(
+                    row.get(field) or 0 for row in value
+                    if isinstance(row, dict) and isinstance(row.get(field), (int, float))
+                ), 2)
+            return rows + [resumen]
+        return value
+
+    def _record(self, results, projected):
+        self.prompts += 1
+        for raw, built in zip(results, projected):
+            name = raw.get("tool", "?")
+            stats = self._tool_stats.setdefault(name, {"calls": 0, "raw_tokens": 0, "prompt_tokens": 0, "max_prompt_tokens": 0})
+            # Referencia: el resultado completo, antes de proyectar y acotar filas
+            raw_tokens = estimate_tokens(compact_json(raw))
+            built_tokens = estimate_tokens(compact_json(built))
+            stats["calls"] += 1
+            stats["raw_tokens"] += raw_tokens
+            stats["prompt_tokens"] += built_tokens
+            stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], built_tokens)
+
+    def stats(self):
+        """
+        Tamaño de los prompts de reescritura por herramienta: tokens estimados de los
+        resultados sin reducir frente a los enviados.
+        """
+        return {
+            "prompts": self.prompts,
+            "over_budget": self.over_budget,
+            "max_input_tokens": self.max_input_tokens,
+            "by_tool": {
+                name: {
+                    "calls": s["calls"],
+                    "avg_raw_tokens": round(s["raw_tokens"] / s["calls"], 1),
+                    "avg_prompt_tokens": round(s["prompt_tokens"] / s["calls"], 1),
+                    "max_prompt_tokens": s["max_prompt_tokens"],
+                }
+                for name, s in self._tool_stats.items()
+            },
+        }
+
+
+def _has_long_list(value):
+    if isinstance(value, dict):
+        return any(_has_long_list(v) for v in value.values())
+    if isinstance(value, list):
+        return len(value) > 1 or any(_has_long_list(v) for v in value)
+    return False
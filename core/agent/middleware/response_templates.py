@@ -0,0 +1,92 @@
+from core.agent.intent_engine import MissingValue, render_template
+
+
+def _is_scalar(value):
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _has_list(value):
+    if isinstance(value, list):
+        return True
+    if isinstance(value, dict):
+        return any(_has_list(v) for v in value.values())
+    return False
+
+
+class ResponseTemplates:
+    """
+    Atajo del modo flexible: cuando un turno tiene un único resultado de herramienta y
+    ese resultado es simple, la respuesta se genera con una plantilla local en lugar de
+    pedir al modelo que la reescriba.
+
+    Configuración (response_templates.json):
+      - "tools": {herramienta: plantilla o {"response", "empty_response"}}; se usa con
+        cualquier resultado de esa herramienta que no contenga listas.
+      - "fields": {campo: plantilla} para resultados con un solo campo escalar
+        ({"deuda": 0}, {"existe": true}...).
+      - "default": plantilla opcional para el resto de resultados de un solo campo,
+        con {field} y {value}.
+    Las plantillas usan la misma sintaxis que intents.json. Si falta un dato (y no hay
+    empty_response) o el resultado tiene listas o hay varias herramientas, decide el modelo.
+    """
+    def __init__(self, config=None):
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.tools = {
+            name: spec if isinstance(spec, dict) else {"response": spec}
+            for name, spec in config.get("tools", {}).items()
+        }
+        self.fields = config.get("fields", {})
+        self.default = config.get("default")
+        self.local = 0
+        self.llm = 0
+
+    def render(self, results):
+        """
+        Returns:
+            str | None: Respuesta generada localmente o None si hay que usar el modelo.
+        """
+        text = self._render(results) if self.enabled else None
+        if text is None:
+            self.llm += 1
+        else:
+            self.local += 1
+        return text
+
+    def _render(self, results):
+        if len(results) != 1:
+            return None
+        result = results[0]
+        response = result.get("response")
+        if "error" in result or not isinstance(response, dict) or not response or _has_list(response):
+            return None
+        values = {**result.get("params", {}), **response}
+        if len(response) == 1:
+            # {field} y {value}: útiles para campos con nombres poco manejables ("¡Atención!")
+            values["field"], values["value"] = next(iter(response.items()))
+        spec = self.tools.get(result.get("tool"))
+        if spec:
+            templates = [spec.get("response"), spec.get("empty_response")]
+        elif len(response) == 1 and _is_scalar(values["value"]):
+            templates = [self.fields.get(values["field"]) or self.default]
+        else:
+            return None
+        for template in templates:
+            if template:
+                try:
+                    return render_template(template, values)
+                except MissingValue:
+                    continue
+        return None
+
+    def stats(self):
+        """
+        Turnos del modo flexible con resultados de herramientas resueltos con plantilla
+        frente a los reescritos por el modelo.
+        """
+        total = self.local + self.llm
+        return {
+            "local": self.local,
+            "llm": self.llm,
+            "local_rate": round(self.local / total, 4) if total else 0.0,
+        }
@@ -1,99 +1,237 @@
+import asyncio
 import logging
 import json
 import os
+import time
 
-from groq import Groq
-from core.config.config import GROQ_API_KEY, GROQ_MODEL, ROUTING_MODEL, SERVER_URL
+from core.config.config import GROQ_MODEL, ROUTING_MODEL, SERVER_URL, config_manager
 from core.agent.agents.agent_base import AgentBase
 from core.agent.tools.context_manager import ContextManager
 from core.agent.middleware.control_middleware import ControlMiddleware
+from core.agent.middleware.prompt_builder import PromptBuilder
+from core.agent.middleware.response_templates import ResponseTemplates
+from core.agent.session_store import DEFAULT_SESSION_ID, InMemorySessionStore, SessionLocks
+from core.agent.local_router import LocalRouter
+from core.agent.intent_engine import IntentEngine
+from core.agent.llm_pool import LLMOverloaded, shared_llm_clients
+from core.agent.speculation import SpeculativeRouter
+from core.agent.stages import StageTimer
+from core.metrics import TURN_SECONDS
+from core.agent.cache import InFlight, QueryNormalizer, create_caches
+from core.agent.tools.http_client import ToolHttpClient
+from core.agent.tools.tool_batcher import ToolBatcher
+from core.agent.tools.tool_registry import ToolRegistry
+from core.agent.tools.validation_messages import ValidationMessages
+from core.agent.streaming import astream_completion
 
 class Orchestrator:
-    def _add_to_public_context(self, role, content):
+    def _add_to_public_context(self, session, role, content):
         """
-        Añade un mensaje al contexto público y mantiene el historial acotado.
+        Añade un mensaje al contexto público de la sesión y mantiene el historial acotado.
         """
-        self.public_context.append({"role": role, "content": content})
-        self.public_context = self.public_context[-5:]
+        session.add_message(role, content)
 
-    def _update_private_context(self, entidades):
+    def _update_private_context(self, session, entidades):
         """
         Actualiza el contexto privado con las entidades extraídas y referenciadas.
         """
         for entidad in self.context_manager.patterns.keys():
-            if entidad not in entidades and self.context_manager.context.get(entidad):
-                entidades[entidad] = self.context_manager.context[entidad]
+            if entidad not in entidades and session.entities.get(entidad):
+                entidades[entidad] = session.entities[entidad]
         return entidades
 
     def _log_router_selection(self, agent_name, allowed_names_normalized):
-        logging.info(f"[router_agent] Seleccionado: {agent_name}")
+        logging.info("[router_agent] Seleccionado: %s", agent_name, extra={"event": "routing"})
 
     def _log_extracted_entities(self, entidades):
-        logging.info(f"Entidades extraídas: {entidades}")
+        logging.debug("Entidades extraídas: %s", entidades, extra={"event": "entities"})
 
     def _log_agent_response(self, agent_name, respuesta):
-        logging.info(f"[responder] Respuesta del agente '{agent_name}': {respuesta}")
+        logging.debug("[responder] Respuesta del agente '%s': %s", agent_name, respuesta, extra={"event": "agent_response"})
 
     def _log_user_query(self, user_input):
-        logging.info(f"[consulta] Usuario: {user_input}")
+        logging.info("[consulta] Usuario: %s", user_input, extra={"event": "user_query"})
 
     def _log_prompt_llm(self, prompt):
-        logging.info(f"[prompt_llm] Prompt enviado al modelo: {prompt}")
+        logging.debug("[prompt_llm] Prompt enviado al modelo: %s", prompt, extra={"event": "llm_prompt"})
     """
     Clase principal para la coordinación de agentes y el enrutamiento de peticiones.
     Se encarga de seleccionar el agente adecuado según el rol del usuario y la entrada,
     gestionar el contexto y delegar la respuesta al agente correspondiente o al modelo general.
     """
-    def __init__(self, agents, router_agent, tools_schema, context_manager):
+    def __init__(self, agents, router_agent, tools_schema, context_manager, session_store=None,
+                 config_dir=None, previous=None):
         """
         Inicializa el orquestador con los agentes disponibles, el agente router,
         el esquema de herramientas y el gestor de contexto.
-        
+
         Args:
             agents (list): Lista de instancias de agentes disponibles.
             router_agent (AgentBase): Agente encargado de decidir el enrutamiento.
             tools_schema (dict): Esquema de herramientas disponibles para los agentes.
             context_manager (ContextManager): Gestor de contexto y entidades.
+            session_store (SessionStore, opcional): Almacén del estado de cada conversación
+                (modo, entidades e historial). Por defecto, en memoria.
+            config_dir (str, opcional): Carpeta de modes.json y routing.json. Por defecto, client_config.
+            previous (Orchestrator, opcional): Orquestador al que sustituye en una recarga de
+                configuración; se reutilizan sus clientes del modelo y su pool HTTP para no
+                abrir conexiones nuevas. Las cachés se empiezan de cero.
         """
         self.agents = agents
         self.router_agent = router_agent
         self.tools_schema = tools_schema
         self.context_manager = context_manager
-        self.context = {}
-        self.public_context = []  # Historial de mensajes pregunta/respuesta
-        self.client = Groq(api_key=GROQ_API_KEY)
-        # Gestión de modos
+        self.sessions = session_store if session_store is not None else InMemorySessionStore()
+        # Turnos simultáneos de una misma sesión, en orden (se conservan en una recarga)
+        self.session_locks = previous.session_locks if previous else SessionLocks()
+        self.config_dir = config_dir or os.path.join(os.path.dirname(__file__), '../../client_config')
+        # Clientes del proveedor de modelos (LLM_PROVIDER) con un único pool de conexiones y
+        # control de concurrencia y RPM/TPM
+        client, async_client, self.llm_limiter, self.llm_provider = shared_llm_clients()
+        self.client = previous.client if previous else client
+        self.async_client = previous.async_client if previous else async_client
+        # Gestión de modos: active_mode es el modo con el que empiezan las sesiones nuevas
         self.modes_config = self.load_modes_config()
         self.active_mode = self.modes_config.get('default_mode', 'rigido')
         # Middleware de control
-        self.middleware = ControlMiddleware()
+        self.middleware = ControlMiddleware(self.client, self.async_client,
+                                            PromptBuilder(tools_schema, config_manager.get_prompt_config()),
+                                            ResponseTemplates(self.load_response_templates_config()))
+        # Enrutado local: evita la llamada al router LLM en consultas claras
+        self.local_router = LocalRouter(agents, self.load_routing_config())
+        # Plantillas de intención: consultas deterministas resueltas sin ninguna llamada al modelo
+        self.intent_engine = IntentEngine(self.load_intents_config(), context_manager.patterns)
+        # Enrutado especulativo: adelanta la llamada al modelo del candidato local mientras decide el router LLM
+        self.speculation = SpeculativeRouter(config_manager.get_speculation_config())
+        # Cachés compartidas: decisiones del router y respuestas de herramientas de solo lectura
+        # (en memoria del worker o, con CACHE_BACKEND=sqlite, compartidas por todos los workers)
+        self.router_cache, self.tool_cache = create_caches(config_manager.get_cache_config())
+        if previous is not None and self.router_cache is not None:
+            # Tras una recarga, las decisiones del router pueden apuntar a agentes que ya no existen
+            self.router_cache.clear()
+        self._normalize_query = QueryNormalizer(context_manager.patterns)
+        # Consultas al router y llamadas a herramientas cacheables idénticas y simultáneas
+        # (p. ej. en /api/chat/batch) se hacen una sola vez
+        self.router_inflight = InFlight()
+        self.tool_inflight = InFlight()
+        # Cliente HTTP con pool keep-alive compartido por todos los agentes
+        self.http_client = previous.http_client if previous else ToolHttpClient(**config_manager.get_http_config())
+        # Las llamadas simultáneas a herramientas con "batch": true van en un solo POST /batch
+        batch_config = config_manager.get_tool_batch_config()
+        self.tool_batcher = ToolBatcher(self.http_client, batch_config["max_operations"]) if batch_config["enabled"] else None
+        # Tiempo por etapa del pipeline (compartido con los agentes)
+        self.stages = StageTimer()
+        # Esquemas, validadores y patrones compilados una sola vez para todos los agentes
+        self.tool_registry = ToolRegistry(tools_schema, context_manager.patterns, messages=self.load_validation_messages())
+        if router_agent is not None:
+            router_agent.client = self.client
+            router_agent.async_client = self.async_client
+        for agent in agents:
+            agent.client = self.client
+            agent.async_client = self.async_client
+            agent.tool_registry = self.tool_registry
+            agent.tool_cache = self.tool_cache
+            agent.tool_inflight = self.tool_inflight
+            agent.http_client = self.http_client
+            agent.tool_batcher = self.tool_batcher
+            agent.stages = self.stages
 
     def load_modes_config(self):
         """
-        Carga la configuración de modos desde client_config/modes.json
+        Carga la configuración de modos desde modes.json (client_config)
         """
-        modes_path = os.path.join(os.path.dirname(__file__), '../../client_config/modes.json')
+        modes_path = os.path.join(self.config_dir, 'modes.json')
         try:
             with open(modes_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
-            logging.warning(f"No se pudo cargar modes.json, usando modo rígido por defecto: {e}")
+            logging.warning("No se pudo cargar modes.json, usando modo rígido por defecto: %s", e)
             return {"enabled_modes": ["rigido"], "default_mode": "rigido", "allowed_roles_to_change_mode": ["admin"]}
 
+    def load_routing_config(self):
+        """
+        Carga la configuración del enrutado local desde routing.json (client_config)
+        """
+        routing_path = os.path.join(self.config_dir, 'routing.json')
+        try:
+            with open(routing_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning("No se pudo cargar routing.json, enrutado local desactivado: %s", e)
+            return {"enabled": False}
+
+    def load_intents_config(self):
+        """
+        Carga las plantillas de intención desde intents.json (client_config)
+        """
+        intents_path = os.path.join(self.config_dir, 'intents.json')
+        try:
+            with open(intents_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning("No se pudo cargar intents.json, respuestas por plantilla desactivadas: %s", e)
+            return {"enabled": False}
+
+    def load_response_templates_config(self):
+        """
+        Carga las plantillas del modo flexible desde response_templates.json (client_config)
+        """
+        templates_path = os.path.join(self.config_dir, 'response_templates.json')
+        try:
+            with open(templates_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning("No se pudo cargar response_templates.json, el modo flexible siempre usa el modelo: %s", e)
+            return {"enabled": False}
+
+    def load_validation_messages(self):
+        """
+        Carga los mensajes de error de formato desde validation_messages.json (client_config).
+        El idioma se puede fijar con la variable de entorno LOCALE.
+        """
+        return ValidationMessages.from_file(
+            os.path.join(self.config_dir, 'validation_messages.json'),
+            config_manager.get_validation_config()["locale"]
+        )
+
+    def get_stats(self):
+        """
+        Devuelve métricas de funcionamiento del orquestador (enrutado, intenciones, prompts, cachés y sesiones).
+        """
+        return {
+            "stages": self.stages.stats(),
+            "llm": {"provider": self.llm_provider.name, **self.llm_limiter.stats()},
+            "router": self.local_router.stats(),
+            "intents": self.intent_engine.stats(),
+            "speculation": self.speculation.stats(),
+            "prompts": self.middleware.prompt_builder.stats(),
+            "flexible_templates": self.middleware.templates.stats(),
+            "router_cache": self.router_cache.stats() if self.router_cache else None,
+            "tool_cache": self.tool_cache.stats() if self.tool_cache else None,
+            "coalesced": {"router": self.router_inflight.stats(), "tools": self.tool_inflight.stats()},
+            "http": self.http_client.stats(),
+            "tool_batch": self.tool_batcher.stats() if self.tool_batcher else None,
+            "sessions": {**self.sessions.stats(), "locks": self.session_locks.stats()},
+        }
+
     def set_active_mode(self, requested_mode, user_role):
         """
         Permite cambiar el modo activo si el rol lo permite y el modo está habilitado.
         """
+        self.active_mode = self._resolve_mode(requested_mode, user_role)
+        return self.active_mode
+
+    def _resolve_mode(self, requested_mode, user_role):
+        """
+        Devuelve el modo resultante de pedir requested_mode con el rol dado.
+        """
         enabled_modes = self.modes_config.get('enabled_modes', ["rigido"])
         allowed_roles = self.modes_config.get('allowed_roles_to_change_mode', ["admin"])
         if len(enabled_modes) == 1:
-            self.active_mode = enabled_modes[0]
-            return self.active_mode
+            return enabled_modes[0]
         if user_role in allowed_roles and requested_mode in enabled_modes:
-            self.active_mode = requested_mode
-        else:
-            self.active_mode = self.modes_config.get('default_mode', enabled_modes[0])
-        return self.active_mode
+            return requested_mode
+        return self.modes_config.get('default_mode', enabled_modes[0])
 
     def get_active_mode(self):
         """
@@ -113,7 +251,7 @@ class Orchestrator:
         """
         return [a for a in self.agents if not hasattr(a, 'allowed_roles') or user_role in getattr(a, 'allowed_roles', ['cliente','admin','soporte'])]
 
-    def route(self, user_input, entidades, agent_name=None, allowed_agents=None):
+    def route(self, user_input, entidades, agent_name=None, allowed_agents=None, context=None):
         """
         Determina y ejecuta el agente adecuado para manejar la petición del usuario.
         
@@ -122,71 +260,288 @@ class Orchestrator:
             entidades (dict): Entidades extraídas del contexto.
             agent_name (str, optional): Nombre del agente específico a usar.
             allowed_agents (list, optional): Lista de agentes permitidos.
+            context (dict, optional): Contexto privado de la sesión.
         
         Returns:
             dict: Respuesta generada por el agente seleccionado.
         """
+        agent = self._select_route_agent(user_input, agent_name, allowed_agents)
+        return agent.handle(user_input, entidades, context or {}, self.tools_schema)
+
+    async def aroute(self, user_input, entidades, agent_name=None, allowed_agents=None, context=None, on_event=None, planned=None):
+        """
+        Versión asíncrona de route(): delega en AgentBase.ahandle().
+        planned es la llamada al modelo ya lanzada por el enrutado especulativo, si la hay.
+        """
+        agent = self._select_route_agent(user_input, agent_name, allowed_agents)
+        return await agent.ahandle(user_input, entidades, context or {}, self.tools_schema, on_event=on_event, planned=planned)
+
+    def _select_route_agent(self, user_input, agent_name=None, allowed_agents=None):
         agents_to_use = allowed_agents if allowed_agents is not None else self.agents
         if agent_name:
             agent = next((a for a in agents_to_use if a.name == agent_name), None)
             if agent:
-                return agent.handle(user_input, entidades, self.context, self.tools_schema)
+                return agent
             else:
                 raise Exception(f"Agente '{agent_name}' no encontrado o no permitido")
         for agent in agents_to_use:
             for tool in getattr(agent, 'tools', []):
                 if tool.replace('_', ' ') in user_input.lower():
-                    return agent.handle(user_input, entidades, self.context, self.tools_schema)
-        return agents_to_use[0].handle(user_input, entidades, self.context, self.tools_schema)
+                    return agent
+        return agents_to_use[0]
 
-    def responder(self, user_input: str, user_role: str = "cliente", requested_mode: str = "") -> dict:
+    def responder(self, user_input: str, user_role: str = "cliente", requested_mode: str = "", session_id: str = None) -> dict:
         """
         Procesa la entrada del usuario, selecciona el agente adecuado y retorna la respuesta.
-        Refactorizado para mayor claridad y mantenibilidad.
+        El estado de la conversación (modo, entidades e historial) se carga del almacén de
+        sesiones al empezar y se guarda al terminar.
         """
-        modo_actual = self._select_active_mode(requested_mode, user_role)
+        session_id = session_id or DEFAULT_SESSION_ID
+        session = self.sessions.load(session_id)
+        start = time.perf_counter()
+        try:
+            return self._responder_session(session, user_input, user_role, requested_mode)
+        finally:
+            self.sessions.save(session_id, session)
+            TURN_SECONDS.observe(time.perf_counter() - start, session.mode or "")
+
+    def _responder_session(self, session, user_input, user_role, requested_mode):
+        modo_actual = self._select_active_mode(session, requested_mode, user_role)
         allowed_agents = self.get_allowed_agents(user_role)
         self._log_user_query(user_input)
-        self._add_to_public_context("user", user_input)
-        agent_name = self._get_router_agent_name(user_input)
-        self._log_router_selection(agent_name, [a.name.strip().lower() for a in allowed_agents])
-        entidades = self._extract_and_update_context(user_input)
+        self._add_to_public_context(session, "user", user_input)
+        entidades = self._extract_and_update_context(session, user_input)
         self._log_extracted_entities(entidades)
+        with self.stages.stage("intents"):
+            intent_match = self._match_intent(user_input, entidades, modo_actual, allowed_agents)
+        if intent_match:
+            intent, agente_obj, args = intent_match
+            result = agente_obj.run_tool(intent.tool, args)
+            return self._process_agent_response(session, self.intent_engine.render(intent, agente_obj.name, result), modo_actual, user_input, user_role)
+        with self.stages.stage("routing"):
+            agent_name = self._get_router_agent_name(user_input)
+        self._log_router_selection(agent_name, [a.name.strip().lower() for a in allowed_agents])
         agente_obj = self._find_agent(agent_name, allowed_agents)
         if agente_obj:
             try:
-                respuesta = self.route(user_input, entidades, agent_name=agente_obj.name, allowed_agents=allowed_agents)
+                respuesta = self.route(user_input, entidades, agent_name=agente_obj.name, allowed_agents=allowed_agents, context=session.entities)
                 self._log_agent_response(agente_obj.name, respuesta)
+            except LLMOverloaded:
+                raise  # 503 con Retry-After en la API; el lote reintenta
             except Exception as e:
-                logging.error(f"Error en la coordinación de agentes: {e}")
+                logging.error("Error en la coordinación de agentes: %s", e)
                 return {"type": "error", "error": str(e), "mode": modo_actual}
-            return self._process_agent_response(respuesta, modo_actual, user_input, user_role)
+            return self._process_agent_response(session, respuesta, modo_actual, user_input, user_role)
         else:
-            return self._process_fallback_response(user_input, user_role, modo_actual)
+            return self._process_fallback_response(session, user_input, user_role, modo_actual)
+
+    async def aresponder(self, user_input: str, user_role: str = "cliente", requested_mode: str = "", session_id: str = None, on_event=None) -> dict:
+        """
+        Versión asíncrona de responder(). Todas las llamadas al modelo y a las herramientas
+        se hacen con clientes asíncronos, de modo que un mismo worker puede atender muchas
+        conversaciones a la vez sin bloquear el event loop.
+
+        Si se indica on_event (corrutina), se le notifican los eventos de progreso del turno:
+        agente elegido, herramientas ejecutadas y tokens de la respuesta generada.
+        """
+        session_id = session_id or DEFAULT_SESSION_ID
+        # Cargar, responder y guardar sin que otro turno de la sesión se intercale
+        async with self.session_locks.hold(session_id):
+            session = await self.sessions.aload(session_id)
+            start = time.perf_counter()
+            try:
+                return await self._aresponder_session(session, user_input, user_role, requested_mode, on_event)
+            finally:
+                await self.sessions.asave(session_id, session)
+                TURN_SECONDS.observe(time.perf_counter() - start, session.mode or "")
+
+    async def astream(self, user_input: str, user_role: str = "cliente", requested_mode: str = "", session_id: str = None):
+        """
+        Ejecuta un turno emitiendo sus eventos a medida que se producen.
+        Yields:
+            dict: Eventos {"event": "route" | "tool" | "token", ...}; el último es
+            {"event": "done", "response": ...} o {"event": "error", "error": ...}.
+        """
+        queue = asyncio.Queue()
+        task = asyncio.create_task(
+            self.aresponder(user_input, user_role, requested_mode, session_id, on_event=queue.put)
+        )
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            try:
+                yield {"event": "done", "response": task.result()}
+            except Exception as e:
+                logging.error("Error en la respuesta en streaming: %s", e)
+                yield {"event": "error", "error": str(e)}
+        finally:
+            # El cliente puede desconectarse a mitad de la respuesta
+            if not task.done():
+                task.cancel()
 
-    def _select_active_mode(self, requested_mode, user_role):
-        if requested_mode:
-            self.set_active_mode(requested_mode, user_role)
+    async def _aresponder_session(self, session, user_input, user_role, requested_mode, on_event=None):
+        modo_actual = self._select_active_mode(session, requested_mode, user_role)
+        allowed_agents = self.get_allowed_agents(user_role)
+        self._log_user_query(user_input)
+        self._add_to_public_context(session, "user", user_input)
+        entidades = self._extract_and_update_context(session, user_input)
+        self._log_extracted_entities(entidades)
+        with self.stages.stage("intents"):
+            intent_match = self._match_intent(user_input, entidades, modo_actual, allowed_agents)
+        if intent_match:
+            return await self._aintent_response(session, intent_match, modo_actual, user_input, user_role, on_event)
+        with self.stages.stage("routing"):
+            if on_event is None:
+                agent_name, planned = await self._aspeculative_router_agent_name(user_input, entidades, allowed_agents)
+            else:
+                # En streaming los tokens del agente se emiten al cliente: no se especula
+                agent_name, planned = await self._aget_router_agent_name(user_input), None
+        self._log_router_selection(agent_name, [a.name.strip().lower() for a in allowed_agents])
+        agente_obj = self._find_agent(agent_name, allowed_agents)
+        if on_event is not None:
+            await on_event({"event": "route", "agent": agente_obj.name if agente_obj else None})
+        if agente_obj:
+            try:
+                respuesta = await self.aroute(user_input, entidades, agent_name=agente_obj.name, allowed_agents=allowed_agents, context=session.entities, on_event=on_event, planned=planned)
+                self._log_agent_response(agente_obj.name, respuesta)
+            except LLMOverloaded:
+                raise  # 503 con Retry-After en la API; el lote reintenta
+            except Exception as e:
+                logging.error("Error en la coordinación de agentes: %s", e)
+                return {"type": "error", "error": str(e), "mode": modo_actual}
+            return await self._aprocess_agent_response(session, respuesta, modo_actual, user_input, user_role, on_event)
         else:
-            self.set_active_mode(self.active_mode, user_role)
-        return self.get_active_mode()
+            return await self._aprocess_fallback_response(session, user_input, user_role, modo_actual, on_event)
+
+    def _match_intent(self, user_input, entidades, modo_actual, allowed_agents):
+        """
+        Comprueba si la consulta la resuelve una plantilla de intención.
+        Returns:
+            tuple | None: (Intent, agente que ejecuta la herramienta, argumentos).
+        """
+        allowed = {a.name: a for a in allowed_agents}
+        match = self.intent_engine.match(user_input, entidades, modo_actual, set(allowed))
+        if match is None:
+            return None
+        intent, args = match
+        # Sin agente declarado, la ejecuta el primer agente permitido que tenga la herramienta
+        agente_obj = allowed.get(intent.agent) or next(
+            (a for a in allowed_agents if intent.tool in a.tools), allowed_agents[0] if allowed_agents else None
+        )
+        if agente_obj is None:
+            return None
+        return intent, agente_obj, args
+
+    async def _aintent_response(self, session, intent_match, modo_actual, user_input, user_role, on_event=None):
+        intent, agente_obj, args = intent_match
+        if on_event is not None:
+            await on_event({"event": "route", "agent": agente_obj.name})
+        result = await agente_obj.arun_tool(intent.tool, args)
+        if on_event is not None:
+            await on_event({"event": "tool", "tool": intent.tool, "status": "error" if "error" in result else "ok"})
+        respuesta = self.intent_engine.render(intent, agente_obj.name, result)
+        return await self._aprocess_agent_response(session, respuesta, modo_actual, user_input, user_role, on_event)
+
+    def _select_active_mode(self, session, requested_mode, user_role):
+        session.mode = self._resolve_mode(requested_mode or session.mode or self.active_mode, user_role)
+        return session.mode
 
     def _get_router_agent_name(self, user_input):
-        router_prompt = f"Usuario: {user_input}\nRespuesta:"
-        self._log_prompt_llm({"role": "system", "content": self.router_agent.system_prompt, "user": router_prompt})
+        cache_key, agent_name = self._local_router_decision(user_input)
+        if agent_name:
+            return agent_name
         resp = self.client.chat.completions.create(
             model=ROUTING_MODEL, # type: ignore
-            messages=[
-                {"role": "system", "content": self.router_agent.system_prompt},
-                {"role": "user", "content": router_prompt}
-            ],
+            messages=self._router_messages(user_input), # type: ignore
             max_completion_tokens=10
         )
-        return resp.choices[0].message.content.strip() # type: ignore
+        return self._remember_router_decision(cache_key, resp.choices[0].message.content.strip()) # type: ignore
+
+    async def _aget_router_agent_name(self, user_input):
+        cache_key, agent_name = await self._alocal_router_decision(user_input)
+        if agent_name:
+            return agent_name
+        return await self._arouter_llm(cache_key, user_input)
+
+    async def _aspeculative_router_agent_name(self, user_input, entidades, allowed_agents):
+        """
+        Como _aget_router_agent_name(), pero si hay que consultar al router LLM lanza a la
+        vez la llamada al modelo del candidato del enrutado local (si la especulación está
+        activada).
+        Returns:
+            tuple: (nombre del agente, llamada al modelo en curso o None).
+        """
+        cache_key, agent_name = await self._alocal_router_decision(user_input)
+        if agent_name:
+            return agent_name, None
+        speculation = self.speculation.start(self.local_router, user_input, entidades, allowed_agents, self.tools_schema)
+        started = time.perf_counter()
+        try:
+            agent_name = await self._arouter_llm(cache_key, user_input)
+        except BaseException:
+            if speculation is not None:
+                speculation.cancel()
+            raise
+        return agent_name, self.speculation.resolve(speculation, agent_name, started)
+
+    async def _arouter_llm(self, cache_key, user_input):
+        async def ask_router():
+            resp = await self.async_client.chat.completions.create(
+                model=ROUTING_MODEL, # type: ignore
+                messages=self._router_messages(user_input), # type: ignore
+                max_completion_tokens=10
+            )
+            agent_name = resp.choices[0].message.content.strip() # type: ignore
+            if cache_key is not None and agent_name:
+                await self.router_cache.aset(cache_key, agent_name)
+            return agent_name
+        # Misma consulta normalizada = misma decisión: las simultáneas comparten la llamada
+        return await self.router_inflight.run(cache_key, ask_router)
+
+    def _local_router_decision(self, user_input):
+        """
+        Intenta decidir el agente sin llamar al router LLM: primero el enrutado local y
+        después la caché de decisiones por consulta normalizada.
+        Returns:
+            tuple: (clave de caché, nombre del agente o None).
+        """
+        agent_name = self.local_router.classify(user_input)
+        if agent_name or self.router_cache is None:
+            return None, agent_name
+        cache_key = self._normalize_query(user_input)
+        _, agent_name = self.router_cache.get(cache_key)
+        return cache_key, agent_name
+
+    async def _alocal_router_decision(self, user_input):
+        """Versión asíncrona de _local_router_decision(): la caché compartida se lee en un hilo."""
+        agent_name = self.local_router.classify(user_input)
+        if agent_name or self.router_cache is None:
+            return None, agent_name
+        cache_key = self._normalize_query(user_input)
+        _, agent_name = await self.router_cache.aget(cache_key)
+        return cache_key, agent_name
+
+    def _remember_router_decision(self, cache_key, agent_name):
+        if cache_key is not None and agent_name:
+            self.router_cache.set(cache_key, agent_name)
+        return agent_name
+
+    def _router_messages(self, user_input):
+        router_prompt = f"Usuario: {user_input}\nRespuesta:"
+        self._log_prompt_llm({"role": "system", "content": self.router_agent.system_prompt, "user": router_prompt})
+        return [
+            {"role": "system", "content": self.router_agent.system_prompt},
+            {"role": "user", "content": router_prompt}
+        ]
 
-    def _extract_and_update_context(self, user_input):
-        entidades = self.context_manager.extract_and_update(user_input)
-        entidades = self._update_private_context(entidades)
+    def _extract_and_update_context(self, session, user_input):
+        with self.stages.stage("extraction"):
+            entidades = self.context_manager.extract_and_update(user_input, session.entities)
+            entidades = self._update_private_context(session, entidades)
         return entidades
 
     def _find_agent(self, agent_name, allowed_agents):
@@ -196,42 +551,80 @@ class Orchestrator:
                 return agent
         return None
 
-    def _process_agent_response(self, respuesta, modo_actual, user_input, user_role):
-        if isinstance(respuesta, dict):
-            self._add_to_public_context("assistant", respuesta.get("response", str(respuesta)))
-            respuesta["mode"] = modo_actual
+    def _process_agent_response(self, session, respuesta, modo_actual, user_input, user_role):
+        with self.stages.stage("middleware"):
             return self.middleware.process(
                 consulta=user_input,
                 usuario=user_role,
                 modo=modo_actual,
-                contexto_publico=self.public_context,
-                respuesta_agente=respuesta
+                contexto_publico=session.history,
+                respuesta_agente=self._agent_response_payload(session, respuesta, modo_actual)
             ) # type: ignore
-        else:
-            self._add_to_public_context("assistant", str(respuesta))
-            return self.middleware.process(
+
+    async def _aprocess_agent_response(self, session, respuesta, modo_actual, user_input, user_role, on_event=None):
+        with self.stages.stage("middleware"):
+            return await self.middleware.aprocess(
                 consulta=user_input,
                 usuario=user_role,
                 modo=modo_actual,
-                contexto_publico=self.public_context,
-                respuesta_agente={"type": "agent", "response": respuesta, "mode": modo_actual}
+                contexto_publico=session.history,
+                respuesta_agente=self._agent_response_payload(session, respuesta, modo_actual),
+                on_event=on_event
             ) # type: ignore
 
-    def _process_fallback_response(self, user_input, user_role, modo_actual):
-        logging.info(f"[responder] No se encontró agente válido para '{user_input}', usando asistente general.")
-        self._log_prompt_llm({"role": "system", "content": "Eres un chatbot asistente general...", "user": user_input})
-        resp = self.client.chat.completions.create(
+    def _agent_response_payload(self, session, respuesta, modo_actual):
+        """
+        Registra la respuesta del agente en el contexto público y la normaliza a dict para el middleware.
+        """
+        if isinstance(respuesta, dict):
+            self._add_to_public_context(session, "assistant", respuesta.get("response", str(respuesta)))
+            respuesta["mode"] = modo_actual
+            return respuesta
+        else:
+            self._add_to_public_context(session, "assistant", str(respuesta))
+            return {"type": "agent", "response": respuesta, "mode": modo_actual}
+
+    def _process_fallback_response(self, session, user_input, user_role, modo_actual):
+        with self.stages.stage("agent"):
+            resp = self.client.chat.completions.create(
+                model=GROQ_MODEL, # type: ignore
+                messages=self._fallback_messages(user_input) # type: ignore
+            )
+        payload = self._fallback_payload(session, resp.choices[0].message.content, user_input, user_role, modo_actual)
+        with self.stages.stage("middleware"):
+            return self.middleware.process(**payload)
+
+    async def _aprocess_fallback_response(self, session, user_input, user_role, modo_actual, on_event=None):
+        kwargs = dict(
             model=GROQ_MODEL, # type: ignore
-            messages=[
-                {"role": "system", "content": "Eres un chatbot asistente general. Si no puedes ayudar con la petición, responde de forma breve y educada, por ejemplo: 'Lo siento, no tengo acceso a esa información.' o 'No puedo ayudarte con eso.' Da respuestas cortas y claras."},
-                {"role": "user", "content": user_input}
-            ]
+            messages=self._fallback_messages(user_input) # type: ignore
         )
-        self._add_to_public_context("assistant", resp.choices[0].message.content)
-        return self.middleware.process(
-            consulta=user_input,
-            usuario=user_role,
-            modo=modo_actual,
-            contexto_publico=self.public_context,
-            respuesta_agente={"type": "chat", "response": resp.choices[0].message.content, "mode": modo_actual}
-        ) # type: ignore
+        with self.stages.stage("agent"):
+            if on_event is not None:
+                resp = await astream_completion(self.async_client, on_event, **kwargs)
+            else:
+                resp = await self.async_client.chat.completions.create(**kwargs)
+        payload = self._fallback_payload(session, resp.choices[0].message.content, user_input, user_role, modo_actual)
+        with self.stages.stage("middleware"):
+            return await self.middleware.aprocess(**payload)
+
+    def _fallback_messages(self, user_input):
+        logging.info("[responder] No se encontró agente válido para '%s', usando asistente general.", user_input)
+        self._log_prompt_llm({"role": "system", "content": "Eres un chatbot asistente general...", "user": user_input})
+        return [
+            {"role": "system", "content": "Eres un chatbot asistente general. Si no puedes ayudar con la petición, responde de forma breve y educada, por ejemplo: 'Lo siento, no tengo acceso a esa información.' o 'No puedo ayudarte con eso.' Da respuestas cortas y claras."},
+            {"role": "user", "content": user_input}
+        ]
+
+    def _fallback_payload(self, session, content, user_input, user_role, modo_actual):
+        """
+        Registra la respuesta del asistente general y prepara los argumentos del middleware.
+        """
+        self._add_to_public_context(session, "assistant", content)
+        return {
+            "consulta": user_input,
+            "usuario": user_role,
+            "modo": modo_actual,
+            "contexto_publico": session.history,
+            "respuesta_agente": {"type": "chat", "response": content, "mode": modo_actual}
+        }
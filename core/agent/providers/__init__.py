@@ -0,0 +1,24 @@
+# Providers module: clientes de los proveedores de modelos (Groq, APIs compatibles con OpenAI, simulado)
+from core.agent.providers.base import LLMProvider, ProviderError
+from core.agent.providers.groq_provider import GroqProvider
+from core.agent.providers.openai_provider import OpenAICompatibleProvider
+from core.agent.providers.fake_provider import FakeProvider
+
+PROVIDERS = {
+    GroqProvider.name: GroqProvider,
+    OpenAICompatibleProvider.name: OpenAICompatibleProvider,
+    FakeProvider.name: FakeProvider,
+}
+
+
+def create_provider(config):
+    """
+    Crea el proveedor indicado en config["provider"] con el resto de la configuración.
+    Returns:
+        LLMProvider
+    """
+    config = dict(config)
+    name = config.pop("provider", "groq")
+    if name not in PROVIDERS:
+        raise ValueError(f"Proveedor de modelos desconocido: '{name}' (disponibles: {', '.join(PROVIDERS)})")
+    return PROVIDERS[name](**config)
@@ -0,0 +1,102 @@
+import json
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+
+
+def to_namespace(data):
+    """
+    Convierte el JSON de una respuesta de la API (dicts y listas) en objetos con atributos,
+    con la misma forma que las respuestas del SDK de Groq (resp.choices[0].message.content).
+    """
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [to_namespace(v) for v in data]
+    return data
+
+
+def to_dict(obj):
+    """Inversa de to_namespace(): respuesta o fragmento a JSON serializable."""
+    if isinstance(obj, SimpleNamespace):
+        return {k: to_dict(v) for k, v in vars(obj).items()}
+    if isinstance(obj, list):
+        return [to_dict(v) for v in obj]
+    return obj
+
+
+def estimate_usage(kwargs, content, tool_calls=None):
+    """
+    Uso de tokens aproximado (~4 caracteres por token) para proveedores que no lo devuelven.
+    """
+    prompt = json.dumps([kwargs.get("messages"), kwargs.get("tools")], ensure_ascii=False, default=str)
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content or "") // 4 + sum(
+        len(tc.function.name) + len(tc.function.arguments) for tc in tool_calls or []
+    ) // 4
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
+
+
+class ProviderError(Exception):
+    """
+    Error HTTP del proveedor. status_code permite al LLMLimiter reconocer los 429.
+    """
+    def __init__(self, status_code, message):
+        super().__init__(f"HTTP {status_code}: {message}")
+        self.status_code = status_code
+
+
+class LLMProvider(ABC):
+    """
+    Interfaz de un proveedor de modelos.
+
+    Cada proveedor implementa complete() / acomplete() (respuesta completa) y stream() /
+    astream() (fragmentos). Las respuestas tienen la forma de las del SDK de Groq/OpenAI
+    (choices[0].message con content y tool_calls, y usage) y los fragmentos la de sus
+    chunks (choices[0].delta). Para el resto del código, client y async_client exponen
+    la interfaz chat.completions.create(..., stream=...) del SDK.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.client = SimpleNamespace(chat=SimpleNamespace(completions=_Completions(self)))
+        self.async_client = SimpleNamespace(chat=SimpleNamespace(completions=_AsyncCompletions(self)))
+
+    @abstractmethod
+    def complete(self, **kwargs):
+        """Respuesta completa (como chat.completions.create(...))."""
+
+    @abstractmethod
+    async def acomplete(self, **kwargs):
+        """Versión asíncrona de complete()."""
+
+    @abstractmethod
+    def stream(self, **kwargs):
+        """Iterador de fragmentos de la respuesta."""
+
+    @abstractmethod
+    def astream(self, **kwargs):
+        """Iterador asíncrono de fragmentos de la respuesta."""
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class _Completions:
+    def __init__(self, provider):
+        self.provider = provider
+
+    def create(self, stream=False, **kwargs):
+        if stream:
+            return self.provider.stream(**kwargs)
+        return self.provider.complete(**kwargs)
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, stream=False, **kwargs):
+        if stream:
+            return self.provider.astream(**kwargs)
+        return await self.provider.acomplete(**kwargs)
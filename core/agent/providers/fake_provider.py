@@ -0,0 +1,132 @@
+import asyncio
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from core.agent.providers.base import LLMProvider, estimate_usage
+
+
+class FakeProvider(LLMProvider):
+    """
+    Proveedor local y determinista para pruebas de carga sin red ni API key.
+
+    Responde según un guion (JSON):
+      - "latency": segundos hasta el primer token, fijos o con una distribución
+        log-normal ({"median", "sigma", "max"}) para imitar la cola de latencias de un
+        proveedor real; "token_interval": pausa entre palabras; "seed": semilla.
+      - "rules": lista de reglas evaluadas en orden; la primera que encaja decide la
+        respuesta. Cada regla puede filtrar por "model", por "system" (regex sobre el
+        prompt de sistema; p. ej. el del router) y por "match" (regex sobre el último
+        mensaje del usuario), y responde con "content" o con "tool_calls"
+        ([{"name", "arguments"}]); las tool calls solo se devuelven si la petición ofrece
+        esas herramientas. "latency" en una regla sustituye a la global.
+      - "default": respuesta cuando ninguna regla encaja.
+    """
+    name = "fake"
+
+    def __init__(self, script=None, latency=None, **_):
+        """
+        Args:
+            script (dict | str, opcional): Guion o ruta a un fichero JSON con el guion.
+            latency (float, opcional): Sustituye a la latencia del guion.
+        """
+        super().__init__()
+        if isinstance(script, str):
+            with open(script, encoding="utf-8") as f:
+                script = json.load(f)
+        script = script or {}
+        self.latency = latency if latency is not None else script.get("latency", 0.05)
+        self.token_interval = script.get("token_interval", 0.0)
+        self.default = script.get("default", "Respuesta simulada")
+        self._rng = random.Random(script.get("seed", 0))
+        self.rules = [
+            {**rule, **{key: re.compile(rule[key], re.IGNORECASE) if rule.get(key) else None for key in ("match", "system")}}
+            for rule in script.get("rules", [])
+        ]
+        self.calls = 0
+
+    def _answer(self, kwargs):
+        """
+        Returns:
+            tuple: (mensaje con content y tool_calls, latencia).
+        """
+        self.calls += 1
+        messages = kwargs.get("messages") or []
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+        offered = {t["function"]["name"] for t in kwargs.get("tools") or []}
+        for rule in self.rules:
+            if rule.get("model") and rule["model"] != kwargs.get("model"):
+                continue
+            if rule["system"] and not rule["system"].search(system):
+                continue
+            if rule["match"] and not rule["match"].search(user):
+                continue
+            calls = rule.get("tool_calls")
+            if calls and not {c["name"] for c in calls} <= offered:
+                continue
+            message = SimpleNamespace(content=None if calls else rule.get("content", self.default),
+                                      tool_calls=_tool_calls(calls) if calls else None)
+            return message, self._sample(rule.get("latency", self.latency))
+        return SimpleNamespace(content=self.default, tool_calls=None), self._sample(self.latency)
+
+    def _sample(self, latency):
+        if not isinstance(latency, dict):
+            return latency
+        value = latency["median"] * self._rng.lognormvariate(0, latency.get("sigma", 0.5))
+        return min(value, latency.get("max", float("inf")))
+
+    def _completion(self, kwargs, message):
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                               usage=estimate_usage(kwargs, message.content, message.tool_calls))
+
+    def complete(self, **kwargs):
+        message, latency = self._answer(kwargs)
+        time.sleep(latency + self.token_interval * _words(message))
+        return self._completion(kwargs, message)
+
+    async def acomplete(self, **kwargs):
+        message, latency = self._answer(kwargs)
+        await asyncio.sleep(latency + self.token_interval * _words(message))
+        return self._completion(kwargs, message)
+
+    def stream(self, **kwargs):
+        message, latency = self._answer(kwargs)
+        time.sleep(latency)
+        for chunk in _chunks(message):
+            time.sleep(self.token_interval)
+            yield chunk
+
+    async def astream(self, **kwargs):
+        message, latency = self._answer(kwargs)
+        await asyncio.sleep(latency)
+        for chunk in _chunks(message):
+            await asyncio.sleep(self.token_interval)
+            yield chunk
+
+
+def _words(message):
+    return len((message.content or "").split())
+
+
+def _tool_calls(calls):
+    return [
+        SimpleNamespace(id=f"call_{i}", type="function",
+                        function=SimpleNamespace(name=c["name"], arguments=json.dumps(c.get("arguments", {}))))
+        for i, c in enumerate(calls)
+    ]
+
+
+def _chunks(message):
+    """
+    Fragmentos con la forma de los chunks de Groq/OpenAI: una palabra por chunk y las
+    tool calls en un único chunk.
+    """
+    for i, word in enumerate((message.content or "").split(" ") if message.content else []):
+        delta = SimpleNamespace(content=word if i == 0 else " " + word, tool_calls=None)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+    if message.tool_calls:
+        deltas = [SimpleNamespace(index=i, id=tc.id, function=tc.function) for i, tc in enumerate(message.tool_calls)]
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=deltas))])
@@ -0,0 +1,43 @@
+import httpx
+from groq import Groq, AsyncGroq
+
+from core.agent.providers.base import LLMProvider
+
+
+class GroqProvider(LLMProvider):
+    """
+    Proveedor Groq sobre su SDK, con un pool de conexiones propio (síncrono y asíncrono).
+    """
+    name = "groq"
+
+    def __init__(self, api_key=None, pool_size=20, base_url=None, **_):
+        """
+        Args:
+            api_key (str): GROQ_API_KEY.
+            pool_size (int): Conexiones keep-alive con la API.
+            base_url (str, opcional): URL alternativa de la API (proxies, pruebas).
+        """
+        super().__init__()
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._sync = Groq(api_key=api_key, base_url=base_url, http_client=httpx.Client(limits=limits))
+        self._async = AsyncGroq(api_key=api_key, base_url=base_url, http_client=httpx.AsyncClient(limits=limits))
+
+    def complete(self, **kwargs):
+        return self._sync.chat.completions.create(**kwargs)
+
+    async def acomplete(self, **kwargs):
+        return await self._async.chat.completions.create(**kwargs)
+
+    def stream(self, **kwargs):
+        yield from self._sync.chat.completions.create(stream=True, **kwargs)
+
+    async def astream(self, **kwargs):
+        stream = await self._async.chat.completions.create(stream=True, **kwargs)
+        async for chunk in stream:
+            yield chunk
+
+    def close(self):
+        self._sync.close()
+
+    async def aclose(self):
+        await self._async.close()
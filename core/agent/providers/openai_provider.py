@@ -0,0 +1,118 @@
+import json
+
+import httpx
+
+from core.agent.loop_clients import LoopClients
+from core.agent.providers.base import LLMProvider, ProviderError, to_namespace
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Proveedor para cualquier API compatible con /v1/chat/completions de OpenAI (OpenAI,
+    vLLM, llama.cpp, Ollama, LM Studio...) sobre httpx, sin SDK. El streaming se lee
+    como Server-Sent Events ("data: {...}" hasta "data: [DONE]").
+    """
+    name = "openai"
+
+    def __init__(self, api_key=None, base_url="https://api.openai.com/v1", pool_size=20, timeout=60.0, **_):
+        """
+        Args:
+            api_key (str, opcional): OPENAI_API_KEY (los servidores locales no suelen pedirla).
+            base_url (str): URL base de la API, hasta /v1 incluido.
+            pool_size (int): Conexiones keep-alive con la API.
+            timeout (float): Timeout de lectura en segundos.
+        """
+        super().__init__()
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.timeout = httpx.Timeout(timeout, connect=5.0)
+        self._sync = httpx.Client(headers=self.headers, limits=self.limits, timeout=self.timeout)
+        # Las conexiones de httpx pertenecen a un event loop: se crea un cliente por loop
+        self._async = LoopClients(lambda: httpx.AsyncClient(headers=self.headers, limits=self.limits, timeout=self.timeout))
+
+    @staticmethod
+    def _payload(kwargs, stream=False):
+        payload = dict(kwargs)
+        if not payload.get("tools"):
+            # La API rechaza una lista de herramientas vacía
+            payload.pop("tools", None)
+            payload.pop("tool_choice", None)
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def _check(r):
+        if r.status_code >= 400:
+            raise ProviderError(r.status_code, r.text[:500])
+
+    def complete(self, **kwargs):
+        r = self._sync.post(self.url, json=self._payload(kwargs))
+        self._check(r)
+        return _response(r.json())
+
+    async def acomplete(self, **kwargs):
+        r = await self._async.get().post(self.url, json=self._payload(kwargs))
+        self._check(r)
+        return _response(r.json())
+
+    def stream(self, **kwargs):
+        with self._sync.stream("POST", self.url, json=self._payload(kwargs, stream=True)) as r:
+            if r.status_code >= 400:
+                r.read()
+                self._check(r)
+            for line in r.iter_lines():
+                chunk = _parse_sse(line)
+                if chunk is _DONE:
+                    break
+                if chunk is not None:
+                    yield chunk
+
+    async def astream(self, **kwargs):
+        client = self._async.get()
+        async with client.stream("POST", self.url, json=self._payload(kwargs, stream=True)) as r:
+            if r.status_code >= 400:
+                await r.aread()
+                self._check(r)
+            async for line in r.aiter_lines():
+                chunk = _parse_sse(line)
+                if chunk is _DONE:
+                    break
+                if chunk is not None:
+                    yield chunk
+
+    def close(self):
+        self._sync.close()
+        self._async.close()
+
+    async def aclose(self):
+        await self._async.aclose()
+
+
+_DONE = object()
+
+
+def _response(data):
+    # Los servidores omiten los campos vacíos; el resto del código espera content y tool_calls
+    for choice in data.get("choices", []):
+        choice["message"] = {"content": None, "tool_calls": None, **choice.get("message", {})}
+    return to_namespace(data)
+
+
+def _parse_sse(line):
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return _DONE
+    chunk = json.loads(data)
+    for choice in chunk.get("choices", []):
+        delta = {"content": None, "tool_calls": None, **choice.get("delta", {})}
+        # Las tool calls llegan troceadas: los fragmentos siguientes solo traen "arguments"
+        delta["tool_calls"] = [
+            {"index": i, "id": None, **tc, "function": {"name": None, "arguments": None, **tc.get("function", {})}}
+            for i, tc in enumerate(delta["tool_calls"] or [])
+        ] or None
+        choice["delta"] = delta
+    return to_namespace(chunk)
@@ -0,0 +1,264 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+DEFAULT_SESSION_ID = "default"
+MAX_HISTORY = 5
+
+
+class SessionState:
+    """
+    Estado conversacional de una sesión: modo activo, entidades extraídas (contexto privado)
+    e historial reciente de mensajes (contexto público).
+    """
+    __slots__ = ("mode", "entities", "history")
+
+    def __init__(self, mode=None, entities=None, history=None):
+        self.mode = mode
+        self.entities = entities if entities is not None else {}
+        self.history = history if history is not None else []
+
+    def add_message(self, role, content):
+        """
+        Añade un mensaje al historial y lo mantiene acotado a MAX_HISTORY entradas.
+        """
+        self.history.append({"role": role, "content": content})
+        del self.history[:-MAX_HISTORY]
+
+    def dumps(self):
+        """
+        Serializa el estado en un registro JSON compacto: [modo, entidades, [[rol, contenido], ...]].
+        """
+        history = [[m["role"], m["content"]] for m in self.history]
+        return json.dumps([self.mode, self.entities, history], ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, record):
+        mode, entities, history = json.loads(record)
+        return cls(mode, entities, [{"role": r, "content": c} for r, c in history])
+
+
+class SessionStore(ABC):
+    """
+    Interfaz de los almacenes de sesiones. load() siempre devuelve una copia independiente
+    del estado, de modo que peticiones concurrentes no comparten objetos mutables.
+    aload() y asave() son las versiones para el event loop; por defecto llaman a las
+    síncronas, y los almacenes con E/S las ejecutan en un hilo.
+    """
+    @abstractmethod
+    def load(self, session_id):
+        """
+        Returns:
+            SessionState: Estado guardado, o uno vacío si la sesión no existe o ha caducado.
+        """
+
+    @abstractmethod
+    def save(self, session_id, state):
+        """Guarda el estado de la sesión (sustituye al anterior)."""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Elimina la sesión si existe."""
+
+    async def aload(self, session_id):
+        return self.load(session_id)
+
+    async def asave(self, session_id, state):
+        self.save(session_id, state)
+
+    def stats(self):
+        return {}
+
+
+class SessionLocks:
+    """
+    Un asyncio.Lock por sesión con turnos en curso, para que los turnos simultáneos de una
+    misma conversación se ejecuten uno tras otro: cada uno carga el estado que guardó el
+    anterior en lugar de pisar su historial al guardar. El lock se elimina cuando no queda
+    ningún turno de la sesión. Serializa los turnos de un worker; entre workers, dos turnos
+    simultáneos de la misma conversación siguen guardando el último que termina.
+    """
+    def __init__(self):
+        self._locks = {}  # session_id -> [lock, turnos en curso o en espera]
+        self.waits = 0
+
+    @asynccontextmanager
+    async def hold(self, session_id):
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = [asyncio.Lock(), 0]
+        elif entry[1]:
+            self.waits += 1
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[session_id]
+
+    def stats(self):
+        return {"active": len(self._locks), "waits": self.waits}
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Almacén en memoria con expulsión LRU y caducidad por inactividad (TTL).
+    Guarda cada sesión como (último acceso, registro JSON compacto en bytes UTF-8).
+    """
+    def __init__(self, max_sessions=100_000, ttl=1800):
+        """
+        Args:
+            max_sessions (int): Número máximo de sesiones retenidas.
+            ttl (float): Segundos de inactividad tras los que una sesión caduca.
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def load(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return SessionState()
+            last_seen, record = entry
+            if now - last_seen > self.ttl:
+                del self._sessions[session_id]
+                self.expired += 1
+                return SessionState()
+            self._sessions.move_to_end(session_id)
+        return SessionState.loads(record)
+
+    def save(self, session_id, state):
+        record = state.dumps().encode("utf-8")
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, record)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict(self, now):
+        # El orden LRU coincide con el de último acceso: las caducadas están al principio
+        while self._sessions:
+            session_id, (last_seen, _) = next(iter(self._sessions.items()))
+            if now - last_seen <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        return {"backend": "memory", "sessions": len(self), "evicted": self.evicted, "expired": self.expired}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Almacén persistente en SQLite. Permite compartir las sesiones entre varios workers
+    (y nodos con un volumen compartido). La limpieza de sesiones caducadas y el límite
+    de tamaño se aplican cada `sweep_every` escrituras.
+    """
+    def __init__(self, path, max_sessions=100_000, ttl=1800, sweep_every=500):
+        """
+        Args:
+            path (str): Ruta del fichero SQLite.
+            max_sessions (int): Número máximo de sesiones retenidas.
+            ttl (float): Segundos de inactividad tras los que una sesión caduca.
+            sweep_every (int): Escrituras entre dos barridos de limpieza.
+        """
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self._local = threading.local()
+        self._writes = itertools.count(1)  # save() se llama desde varios hilos
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, last_seen REAL NOT NULL)"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_seen ON sessions(last_seen)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE id = ? AND last_seen >= ?",
+            (session_id, time.time() - self.ttl)
+        ).fetchone()
+        return SessionState.loads(row[0]) if row else SessionState()
+
+    def save(self, session_id, state):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (id, data, last_seen) VALUES (?, ?, ?)",
+            (session_id, state.dumps(), time.time())
+        )
+        if next(self._writes) % self.sweep_every == 0:
+            self.sweep()
+
+    async def aload(self, session_id):
+        return await asyncio.to_thread(self.load, session_id)
+
+    async def asave(self, session_id, state):
+        await asyncio.to_thread(self.save, session_id, state)
+
+    def delete(self, session_id):
+        self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def sweep(self):
+        """
+        Elimina las sesiones caducadas y las más antiguas por encima de max_sessions.
+        """
+        conn = self._conn()
+        conn.execute("DELETE FROM sessions WHERE last_seen < ?", (time.time() - self.ttl,))
+        excess = len(self) - self.max_sessions
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY last_seen ASC LIMIT ?)",
+                (excess,)
+            )
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self):
+        return {"backend": "sqlite", "sessions": len(self), "path": self.path}
+
+
+def create_session_store(config):
+    """
+    Crea el almacén de sesiones indicado en la configuración (ver ConfigManager.get_session_config()).
+    """
+    backend = config.get("backend", "memory")
+    if backend == "sqlite":
+        return SQLiteSessionStore(config["db_path"], max_sessions=config["max_sessions"], ttl=config["ttl"])
+    if backend != "memory":
+        logging.warning("Backend de sesiones desconocido '%s', usando memoria.", backend)
+    return InMemorySessionStore(max_sessions=config["max_sessions"], ttl=config["ttl"])
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache (ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+    "expires REAL NOT NULL, PRIMARY KEY (ns, key))",
+    "CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(ns, expires)",
+    "CREATE TABLE IF NOT EXISTS cache_tags (ns TEXT NOT NULL, tag TEXT NOT NULL, key TEXT NOT NULL, "
+    "PRIMARY KEY (ns, tag, key))",
+    "CREATE INDEX IF NOT EXISTS idx_cache_tags_key ON cache_tags(ns, key)",
+    "CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)",
+)
+
+# Espera máxima por el bloqueo de escritura. Es corta a propósito: si otro worker tiene el
+# fichero ocupado, la caché y los cubos de tokens siguen sin él (fail-open) en lugar de
+# retener la petición. Las invalidaciones sí esperan: saltarlas dejaría datos obsoletos.
+BUSY_TIMEOUT = 0.1
+INVALIDATE_TIMEOUT = 5.0
+
+
+class SharedStore:
+    """
+    Estado compartido entre workers (y réplicas con un volumen común) en un fichero SQLite:
+    cachés (router y herramientas) y cubos de tokens de los límites del proveedor. Es el
+    sustituto local de un almacén en red: cada componente usa la misma interfaz que su
+    versión en memoria (TTLCache, TokenBucket).
+
+    Las operaciones son síncronas y pueden esperar al bloqueo del fichero; desde el event
+    loop se usan sus versiones asíncronas (aget, aset...), que las ejecutan en un hilo.
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Ruta del fichero SQLite.
+        """
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self.connection()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def connection(self):
+        """Una conexión por hilo, en autocommit, con WAL y espera corta por el bloqueo."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def cache(self, namespace, max_entries=10_000, ttl=300):
+        return SQLiteCache(self, namespace, max_entries, ttl)
+
+    def token_bucket(self, name, per_minute, burst=None):
+        return SQLiteTokenBucket(self, name, per_minute, burst)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def shared_store(path):
+    """
+    Returns:
+        SharedStore: La instancia del proceso para ese fichero (la comparten cachés y límites).
+    """
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SharedStore(path)
+        return store
+
+
+def _dump(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLiteCache:
+    """
+    Versión compartida de TTLCache (misma interfaz): caducidad por entrada y etiquetas
+    para invalidación. Las claves, etiquetas y valores se guardan en JSON. El límite de
+    entradas se aplica cada `sweep_every` escrituras, expulsando primero las caducadas y
+    después las que caducan antes. Los contadores de aciertos y fallos son del worker.
+
+    Si el fichero está bloqueado más de BUSY_TIMEOUT, una lectura cuenta como fallo y una
+    escritura se descarta (contador `busy`): la caché es opcional y no debe frenar el turno.
+    """
+    def __init__(self, store, namespace, max_entries=10_000, ttl=300, sweep_every=500):
+        self.store = store
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.busy = 0
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (encontrado, valor).
+        """
+        try:
+            row = self.store.connection().execute(
+                "SELECT value FROM cache WHERE ns = ? AND key = ? AND expires >= ?",
+                (self.namespace, _dump(key), time.time())
+            ).fetchone()
+        except sqlite3.OperationalError as e:
+            self._busy("get", e)
+            row = None
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, json.loads(row[0])
+
+    def set(self, key, value, ttl=None, tags=()):
+        key = _dump(key)
+        expires = time.time() + (ttl if ttl is not None else self.ttl)
+        conn = self.store.connection()
+        try:
+            with _transaction(conn):
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (ns, key, value, expires) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, _dump(value), expires)
+                )
+                conn.execute("DELETE FROM cache_tags WHERE ns = ? AND key = ?", (self.namespace, key))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO cache_tags (ns, tag, key) VALUES (?, ?, ?)",
+                    [(self.namespace, _dump(tag), key) for tag in tags]
+                )
+        except sqlite3.OperationalError as e:
+            self._busy("set", e)
+            return
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.sweep()
+
+    def invalidate_tag(self, tag):
+        """
+        Elimina (en todos los workers) las entradas marcadas con la etiqueta dada. Espera
+        hasta INVALIDATE_TIMEOUT por el bloqueo: tras una escritura no se puede saltar.
+        """
+        tag = _dump(tag)
+        conn = self.store.connection()
+        with _transaction(conn, timeout=INVALIDATE_TIMEOUT):
+            removed = conn.execute(
+                "DELETE FROM cache WHERE ns = ? AND key IN (SELECT key FROM cache_tags WHERE ns = ? AND tag = ?)",
+                (self.namespace, self.namespace, tag)
+            ).rowcount
+            conn.execute("DELETE FROM cache_tags WHERE ns = ? AND tag = ?", (self.namespace, tag))
+        self.invalidations += removed
+
+    def clear(self):
+        conn = self.store.connection()
+        with _transaction(conn, timeout=INVALIDATE_TIMEOUT):
+            conn.execute("DELETE FROM cache WHERE ns = ?", (self.namespace,))
+            conn.execute("DELETE FROM cache_tags WHERE ns = ?", (self.namespace,))
+
+    def sweep(self):
+        """
+        Elimina las entradas caducadas y, por encima de max_entries, las que caducan antes.
+        """
+        conn = self.store.connection()
+        try:
+            self._sweep(conn)
+        except sqlite3.OperationalError as e:
+            self._busy("sweep", e)  # se reintenta en el siguiente barrido
+
+    def _sweep(self, conn):
+        with _transaction(conn):
+            conn.execute("DELETE FROM cache WHERE ns = ? AND expires < ?", (self.namespace, time.time()))
+            excess = conn.execute("SELECT COUNT(*) FROM cache WHERE ns = ?", (self.namespace,)).fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM cache WHERE ns = ? AND key IN "
+                    "(SELECT key FROM cache WHERE ns = ? ORDER BY expires ASC LIMIT ?)",
+                    (self.namespace, self.namespace, excess)
+                )
+                self.evictions += excess
+            conn.execute(
+                "DELETE FROM cache_tags WHERE ns = ? AND key NOT IN (SELECT key FROM cache WHERE ns = ?)",
+                (self.namespace, self.namespace)
+            )
+
+    def _busy(self, operation, error):
+        self.busy += 1
+        logging.debug("[shared_store] %s de la caché %s omitido: %s", operation, self.namespace, error)
+
+    async def aget(self, key):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key, value, ttl=None, tags=()):
+        await asyncio.to_thread(self.set, key, value, ttl, tags)
+
+    async def ainvalidate_tag(self, tag):
+        await asyncio.to_thread(self.invalidate_tag, tag)
+
+    def __len__(self):
+        return self.store.connection().execute(
+            "SELECT COUNT(*) FROM cache WHERE ns = ? AND expires >= ?", (self.namespace, time.time())
+        ).fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "busy": self.busy,
+        }
+
+
+class SQLiteTokenBucket:
+    """
+    Versión compartida de TokenBucket (misma interfaz): el saldo vive en una fila de
+    SQLite y cada operación es una transacción BEGIN IMMEDIATE, así que todos los workers
+    descuentan del mismo límite por minuto del proveedor. Si el fichero está bloqueado
+    más de BUSY_TIMEOUT, la operación se omite y la petición pasa (contador `busy`): el
+    límite compartido es una protección frente a los 429, no una condición para responder.
+    """
+    def __init__(self, store, name, per_minute, burst=None):
+        self.store = store
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+        self.busy = 0
+
+    def _update(self, change):
+        """
+        Aplica change(saldo recargado) -> saldo nuevo en una transacción.
+        Returns:
+            float | None: El saldo nuevo, o None si el fichero estaba bloqueado.
+        """
+        conn = self.store.connection()
+        try:
+            with _transaction(conn):
+                now = time.time()
+                row = conn.execute("SELECT tokens, updated FROM token_buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens = float(self.capacity) if row is None else min(self.capacity, row[0] + (now - row[1]) * self.rate)
+                tokens = change(tokens)
+                conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, now)
+                )
+        except sqlite3.OperationalError as e:
+            self.busy += 1
+            logging.debug("[shared_store] Cubo %s omitido: %s", self.name, e)
+            return None
+        return tokens
+
+    def reserve(self, amount):
+        """
+        Descuenta amount del saldo compartido.
+        Returns:
+            float: Segundos que hay que esperar antes de enviar la petición.
+        """
+        tokens = self._update(lambda tokens: tokens - amount)
+        return 0.0 if tokens is None else max(0.0, -tokens / self.rate)
+
+    def refund(self, amount):
+        self._update(lambda tokens: min(self.capacity, tokens + amount))
+
+    def pause(self, seconds):
+        """Vacía el cubo (para todos los workers) durante seconds, tras un 429 del proveedor."""
+        self._update(lambda tokens: min(tokens, -seconds * self.rate))
+
+
+@contextmanager
+def _transaction(conn, timeout=None):
+    """
+    BEGIN IMMEDIATE ... COMMIT (ROLLBACK si falla) sobre una conexión en autocommit.
+    Con timeout, espera por el bloqueo hasta esos segundos en lugar de BUSY_TIMEOUT.
+    """
+    if timeout is not None:
+        conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        if timeout is not None:
+            conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+import statistics
+import time
+from collections import deque
+
+from core.agent.middleware.prompt_builder import estimate_tokens
+
+
+def _usage_tokens(resp):
+    usage = getattr(resp, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+class Speculation:
+    """
+    Llamada al modelo de un agente candidato lanzada antes de conocer la decisión del
+    router. Solo adelanta la llamada al modelo: las herramientas (que pueden escribir en
+    el backend) no se ejecutan hasta que el router confirma al agente.
+    """
+    def __init__(self, agent, user_input, entidades, tools_schema):
+        self.agent = agent
+        messages = agent._build_messages(user_input, entidades)
+        tools_to_use = agent._select_tools(tools_schema)
+        # Tokens de entrada estimados: lo que se gasta aunque la llamada se cancele
+        self.prompt_tokens = estimate_tokens(json.dumps(messages, ensure_ascii=False) + json.dumps(tools_to_use, ensure_ascii=False))
+        self.started = time.perf_counter()
+        self.finished = None
+        self.task = asyncio.create_task(agent._acall_model(messages, tools_to_use))
+        self.task.add_done_callback(self._on_done)
+
+    def _on_done(self, _):
+        self.finished = time.perf_counter()
+
+    def cancel(self):
+        """
+        Descarta la llamada. Returns:
+            int: Tokens gastados (reales si la respuesta ya había llegado, estimados si no).
+        """
+        if self.task.done():
+            if self.task.cancelled() or self.task.exception() is not None:
+                return self.prompt_tokens
+            return _usage_tokens(self.task.result()) or self.prompt_tokens
+        self.task.cancel()
+        return self.prompt_tokens
+
+
+class SpeculativeRouter:
+    """
+    Enrutado especulativo (opcional): cuando el enrutado local no es concluyente pero
+    tiene un candidato, la llamada al modelo de ese agente se lanza a la vez que la del
+    router LLM. Si el router elige al candidato se aprovecha su respuesta; si no, se
+    cancela y se descarta. Mide la tasa de aciertos, la latencia ahorrada y los tokens
+    gastados en especulaciones descartadas.
+    """
+    def __init__(self, config=None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.min_confidence = config.get("min_confidence", 0.0)
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted_tokens = 0
+        self._saved = deque(maxlen=config.get("samples", 1000))
+
+    def start(self, local_router, user_input, entidades, allowed_agents, tools_schema):
+        """
+        Lanza la especulación si el enrutado local tiene un candidato permitido.
+        Returns:
+            Speculation | None
+        """
+        if not self.enabled:
+            return None
+        candidate, confidence = local_router.rank(user_input)
+        agent = next((a for a in allowed_agents if a.name == candidate), None)
+        if agent is None or confidence < self.min_confidence:
+            return None
+        self.attempts += 1
+        return Speculation(agent, user_input, entidades, tools_schema)
+
+    def resolve(self, speculation, agent_name, router_started):
+        """
+        Confirma o descarta la especulación con la decisión del router.
+        Returns:
+            asyncio.Task | None: La llamada al modelo ya en curso si el router coincide.
+        """
+        if speculation is None:
+            return None
+        if agent_name and agent_name.strip().lower() == speculation.agent.name.strip().lower():
+            self.hits += 1
+            router_time = time.perf_counter() - router_started
+            speculation.task.add_done_callback(lambda _: self._record_saving(speculation, router_time))
+            return speculation.task
+        self.misses += 1
+        self.wasted_tokens += speculation.cancel()
+        logging.info("[speculation] Descartada %s; el router eligió %s", speculation.agent.name, agent_name)
+        return None
+
+    def _record_saving(self, speculation, router_time):
+        # En serie se habría esperado router + modelo; en paralelo, el máximo de ambos
+        model_time = speculation.finished - speculation.started
+        self._saved.append(min(router_time, model_time))
+
+    def stats(self):
+        saved = sorted(self._saved)
+        decided = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / decided, 4) if decided else 0.0,
+            "saved_p50_ms": round(statistics.median(saved) * 1000, 1) if saved else 0.0,
+            "saved_p95_ms": round(saved[min(len(saved) - 1, int(0.95 * len(saved)))] * 1000, 1) if saved else 0.0,
+            "wasted_tokens": self.wasted_tokens,
+        }
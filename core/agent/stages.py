@@ -0,0 +1,59 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from core.metrics import ERRORS, STAGE_SECONDS
+
+# Etapas de un turno, en el orden en que se ejecutan
+STAGES = ("extraction", "intents", "routing", "agent", "tools", "middleware")
+
+
+class StageTimer:
+    """
+    Tiempo por etapa del pipeline de un turno: extracción de entidades, plantillas de
+    intención, enrutado (enrutado local y router LLM), llamada al modelo del agente,
+    herramientas y middleware. Cada etapa se mide como mucho una vez por turno.
+    El orquestador comparte una instancia con todos sus agentes. Cada medida se publica
+    también en el histograma stage_seconds de /metrics y las excepciones en errors_total.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}  # etapa -> [medidas, segundos]
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            ERRORS.inc(name)
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        STAGE_SECONDS.observe(seconds, name)
+        with self._lock:
+            data = self._data.setdefault(name, [0, 0.0])
+            data[0] += 1
+            data[1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: {etapa: {"count", "total_ms", "avg_ms"}} en el orden del pipeline.
+        """
+        with self._lock:
+            items = sorted(self._data.items(), key=lambda kv: STAGES.index(kv[0]) if kv[0] in STAGES else len(STAGES))
+            return {
+                name: {
+                    "count": count,
+                    "total_ms": round(total * 1000, 1),
+                    "avg_ms": round(total / count * 1000, 2),
+                }
+                for name, (count, total) in items
+            }
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+
+async def astream_completion(client, on_event, **kwargs):
+    """
+    Llama al modelo con stream=True, emite cada fragmento de texto como evento
+    {"event": "token", "delta": ...} y reconstruye al final una respuesta con la misma
+    forma que la no-streaming (choices[0].message.content / tool_calls), de modo que
+    el resto del pipeline no distingue entre ambos modos.
+
+    Args:
+        client: Cliente asíncrono compatible con Groq/OpenAI.
+        on_event (callable): Corrutina que recibe cada evento.
+        **kwargs: Argumentos de chat.completions.create().
+    """
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    content = []
+    tool_calls = {}
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if getattr(delta, "content", None):
+            content.append(delta.content)
+            await on_event({"event": "token", "delta": delta.content})
+        for tc in getattr(delta, "tool_calls", None) or []:
+            # Las tool calls llegan troceadas: se acumulan por índice
+            acc = tool_calls.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+            if getattr(tc, "id", None):
+                acc["id"] = tc.id
+            if getattr(tc, "function", None):
+                acc["name"] += tc.function.name or ""
+                acc["arguments"] += tc.function.arguments or ""
+    message = SimpleNamespace(
+        content="".join(content) if content else None,
+        tool_calls=[
+            SimpleNamespace(id=tc["id"], type="function",
+                            function=SimpleNamespace(name=tc["name"], arguments=tc["arguments"] or "{}"))
+            for _, tc in sorted(tool_calls.items())
+        ] or None,
+    )
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
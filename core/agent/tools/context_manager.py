@@ -1,78 +1,51 @@
-import json
-import re
-from pathlib import Path
+from core.agent.tools.entity_engine import load_engine
 
 class ContextManager:
     """
     Clase para la gestión de contexto y extracción de entidades en las conversaciones.
     Permite cargar patrones y referencias, extraer entidades del texto y resolver referencias contextuales.
+    La extracción la hace el motor precompilado compartido (ver entity_engine.py).
     """
     def __init__(self, patterns_path, reference_map_path=None):
         """
-        Inicializa el gestor de contexto cargando patrones y referencias desde archivos JSON.
+        Inicializa el gestor de contexto con el motor de entidades de esos ficheros JSON.
         
         Args:
             patterns_path (str): Ruta al archivo de patrones de entidades.
             reference_map_path (str, opcional): Ruta al archivo de referencias contextuales.
         """
-        self.patterns = self._load_patterns(patterns_path)
+        self.engine = load_engine(patterns_path, reference_map_path)
+        self.patterns = self.engine.patterns
+        self.reference_map = self.engine.reference_map
         self.context = {}
-        self.reference_map = self._load_reference_map(reference_map_path) if reference_map_path else {}
 
-    def _load_patterns(self, path):
+    def extract_and_update(self, text, context=None):
         """
-        Carga los patrones de entidades desde un archivo JSON.
-        Args:
-            path (str): Ruta al archivo de patrones.
-        Returns:
-            dict: Diccionario de patrones de entidades.
-        """
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def _load_reference_map(self, path):
-        """
-        Carga el mapa de referencias desde un archivo JSON.
-        Args:
-            path (str): Ruta al archivo de referencias.
-        Returns:
-            dict: Diccionario de referencias.
-        """
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def extract_and_update(self, text):
-        """
-        Extrae entidades usando los patrones y actualiza el contexto.
+        Extrae entidades en una sola pasada y actualiza el contexto.
         La extracción de DNI es case-insensitive y se normaliza la letra a mayúscula.
         Args:
             text (str): Texto de entrada del usuario.
+            context (dict, opcional): Contexto de la sesión a actualizar. Por defecto, el contexto interno.
         Returns:
             dict: Contexto actualizado con las entidades extraídas.
         """
-        for entity, pattern in self.patterns.items():
-            flags = re.IGNORECASE if entity == "dni" else 0
-            match = re.search(pattern, text, flags)
-            if match:
-                value = match.group()
-                # Normalizar DNI: letra final en mayúscula
-                if entity == "dni":
-                    value = value[:-1] + value[-1].upper()
-                self.context[entity] = value
-        return self.context.copy()
+        if context is None:
+            context = self.context
+        context.update(self.engine.extract(text))
+        return context.copy()
 
-    def resolve_reference(self, text):
+    def resolve_reference(self, text, context=None):
         """
-        Resuelve referencias usando patrones regex del reference_map.
+        Resuelve referencias usando los patrones del reference_map.
         Args:
             text (str): Texto de entrada del usuario.
+            context (dict, opcional): Contexto de la sesión. Por defecto, el contexto interno.
         Returns:
             dict: Entidad referenciada encontrada en el contexto, si existe.
         """
-        for ref_pattern, entity in self.reference_map.items():
-            if re.search(ref_pattern, text, re.IGNORECASE) and entity in self.context:
-                return {entity: self.context[entity]}
-        return {}
+        if context is None:
+            context = self.context
+        return self.engine.resolve_reference(text, context)
 
     def get_context(self):
         """
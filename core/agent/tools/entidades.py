@@ -1,18 +1,11 @@
-import json
-import os
-import re
+from core.agent.tools.entity_engine import load_engine
 
-# Cargar patrones de entidades - AHORA DESDE client_config
-with open("client_config/entity_patterns.json", encoding="utf-8") as f:
-    entity_patterns = json.load(f)
+# Motor de entidades compartido con ContextManager - patrones desde client_config
+engine = load_engine("client_config/entity_patterns.json", "client_config/reference_map.json")
+entity_patterns = engine.patterns
 
 def extract_entities(text: str) -> dict:
     """
     Extrae entidades según patrones. Devuelve dict, p.ej. {"dni": "12345678A"}
     """
-    encontrados = {}
-    for nombre, patron in entity_patterns.items():
-        m = re.search(patron, text)
-        if m:
-            encontrados[nombre] = m.group()
-    return encontrados
+    return engine.extract(text)
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+
+# Entidades cuya extracción no distingue mayúsculas (la letra se normaliza después)
+CASE_INSENSITIVE_ENTITIES = {"dni"}
+
+# ".*" al principio o al final de cada alternativa: con search() no aportan nada y
+# obligan al motor a recorrer el mensaje entero
+_LEADING_WILDCARD_RE = re.compile(r"(^|\|)\.\*")
+_TRAILING_WILDCARD_RE = re.compile(r"\.\*($|\|)")
+
+
+def _group_name(prefix, index):
+    return f"{prefix}{index}"
+
+
+def _strip_wildcards(pattern):
+    return _TRAILING_WILDCARD_RE.sub(r"\1", _LEADING_WILDCARD_RE.sub(r"\1", pattern))
+
+
+class EntityEngine:
+    """
+    Motor de extracción de entidades y referencias precompilado.
+
+    Combina todos los patrones de entity_patterns.json en una única expresión con
+    grupos con nombre dentro de un lookahead, de modo que un solo recorrido del mensaje
+    encuentra todas las posiciones donde empieza alguna entidad (también solapadas).
+    Para cada entidad el resultado es el mismo que daría re.search() con su patrón.
+    Las referencias de reference_map.json se combinan igual en otra expresión.
+    """
+    def __init__(self, patterns, reference_map=None):
+        """
+        Args:
+            patterns (dict): {entidad: regex}.
+            reference_map (dict, opcional): {regex de referencia: entidad}.
+        """
+        self.patterns = dict(patterns)
+        self.reference_map = dict(reference_map or {})
+        self.entities = list(self.patterns)
+        self._compiled = {
+            entity: re.compile(pattern, re.IGNORECASE if entity in CASE_INSENSITIVE_ENTITIES else 0)
+            for entity, pattern in self.patterns.items()
+        }
+        self._groups = {_group_name("e", i): entity for i, entity in enumerate(self.entities)}
+        self._scanner = self._combine(
+            (_group_name("e", i), f"(?i:{pattern})" if entity in CASE_INSENSITIVE_ENTITIES else pattern)
+            for i, (entity, pattern) in enumerate(self.patterns.items())
+        )
+        self._reference_entities = list(self.reference_map.values())
+        self._reference_scanner = self._combine(
+            (_group_name("r", i), f"(?i:{_strip_wildcards(pattern)})")
+            for i, pattern in enumerate(self.reference_map)
+        )
+
+    @staticmethod
+    def _combine(named_patterns):
+        alternatives = [f"(?P<{name}>{pattern})" for name, pattern in named_patterns]
+        # Lookahead de ancho cero: finditer avanza carácter a carácter, así que también
+        # se encuentran coincidencias que empiezan dentro de otra
+        return re.compile("(?=" + "|".join(alternatives) + ")") if alternatives else None
+
+    @classmethod
+    def from_files(cls, patterns_path, reference_map_path=None):
+        """
+        Construye el motor desde los ficheros JSON de configuración.
+        """
+        with open(patterns_path, 'r', encoding='utf-8') as f:
+            patterns = json.load(f)
+        reference_map = {}
+        if reference_map_path:
+            with open(reference_map_path, 'r', encoding='utf-8') as f:
+                reference_map = json.load(f)
+        return cls(patterns, reference_map)
+
+    def scan(self, text):
+        """
+        Recorre el texto una sola vez y devuelve todas las coincidencias en orden de aparición.
+        Returns:
+            list: Tuplas (entidad, valor, posición); una misma posición puede dar varias entidades.
+        """
+        return list(self._iter_matches(text, set()))
+
+    def _iter_matches(self, text, found):
+        if self._scanner is None:
+            return
+        for match in self._scanner.finditer(text):
+            pos = match.start()
+            entity = self._groups[match.lastgroup]
+            yield entity, match.group(match.lastgroup), pos
+            # La alternancia solo informa de la primera entidad que encaja en cada
+            # posición; las demás que empiezan en el mismo sitio se comprueban aparte
+            for other in self.entities:
+                if other != entity and other not in found:
+                    m = self._compiled[other].match(text, pos)
+                    if m:
+                        yield other, m.group(), pos
+
+    def extract(self, text):
+        """
+        Devuelve la primera coincidencia de cada entidad (DNI normalizado con letra mayúscula).
+        Returns:
+            dict: {entidad: valor}.
+        """
+        found = {}
+        for entity, value, _ in self._iter_matches(text, found):
+            if entity not in found:
+                found[entity] = self.normalize(entity, value)
+                if len(found) == len(self.entities):
+                    break
+        return found
+
+    @staticmethod
+    def normalize(entity, value):
+        if entity == "dni":
+            return value[:-1] + value[-1].upper()
+        return value
+
+    def referenced_entities(self, text):
+        """
+        Entidades referenciadas en el texto ("el abonado", "su dirección"...), en el orden
+        de reference_map.json.
+        """
+        if self._reference_scanner is None:
+            return []
+        matched = {match.lastgroup for match in self._reference_scanner.finditer(text)}
+        return [
+            entity for i, entity in enumerate(self._reference_entities)
+            if _group_name("r", i) in matched
+        ]
+
+    def resolve_reference(self, text, context):
+        """
+        Devuelve la primera entidad referenciada en el texto que exista en el contexto.
+        """
+        for entity in self.referenced_entities(text):
+            if entity in context:
+                return {entity: context[entity]}
+        return {}
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def load_engine(patterns_path, reference_map_path=None):
+    """
+    Devuelve el motor compartido para esos ficheros, construyéndolo la primera vez y
+    de nuevo cuando alguno de los ficheros cambia (recarga en caliente de client_config).
+    """
+    key = (patterns_path, reference_map_path)
+    version = tuple(os.stat(path).st_mtime_ns for path in key if path)
+    with _engines_lock:
+        cached = _engines.get(key)
+        if cached is None or cached[0] != version:
+            cached = _engines[key] = (version, EntityEngine.from_files(patterns_path, reference_map_path))
+        return cached[1]
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.agent.loop_clients import LoopClients
+
+# Códigos HTTP que se consideran transitorios y se reintentan en herramientas idempotentes
+RETRY_STATUS = {502, 503, 504}
+
+
+class ToolHttpClient:
+    """
+    Cliente HTTP compartido para los endpoints de herramientas.
+
+    Mantiene un pool de conexiones keep-alive tanto síncrono (requests.Session) como
+    asíncrono (httpx.AsyncClient, uno por event loop, ver LoopClients), aplica timeouts de conexión y
+    lectura, reintenta con backoff exponencial y jitter las herramientas idempotentes
+    y lleva métricas de reutilización de conexiones.
+    """
+    def __init__(self, pool_size=20, connect_timeout=3.0, read_timeout=30.0, max_retries=2, backoff=0.1):
+        """
+        Args:
+            pool_size (int): Conexiones keep-alive máximas por host.
+            connect_timeout (float): Timeout de conexión en segundos.
+            read_timeout (float): Timeout de lectura en segundos.
+            max_retries (int): Reintentos para herramientas idempotentes.
+            backoff (float): Base del backoff exponencial en segundos.
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_clients = LoopClients(lambda: httpx.AsyncClient(
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+        ))
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self._async_connections = 0
+
+    # --- Cliente síncrono ---
+
+    def request(self, method, url, args, idempotent=False):
+        """
+        Ejecuta la llamada y devuelve el JSON de respuesta. Lanza la excepción de requests si falla.
+        """
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        for attempt in range(attempts):
+            self._count("requests")
+            try:
+                if method == "GET":
+                    r = self.session.get(url, params=args, timeout=(self.connect_timeout, self.read_timeout))
+                else:
+                    r = self.session.post(url, json=args, timeout=(self.connect_timeout, self.read_timeout))
+                if r.status_code in RETRY_STATUS and attempt + 1 < attempts:
+                    self._retry_wait(attempt, f"HTTP {r.status_code}", url)
+                    continue
+                r.raise_for_status()
+                return r.json()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt + 1 >= attempts:
+                    self._count("errors")
+                    raise
+                self._retry_wait(attempt, e, url)
+            except Exception:
+                self._count("errors")
+                raise
+
+    def _retry_wait(self, attempt, reason, url):
+        self._count("retries")
+        logging.warning("[http] Reintento %s para %s: %s", attempt + 1, url, reason)
+        time.sleep(self._backoff_delay(attempt))
+
+    # --- Cliente asíncrono ---
+
+    def _get_async_client(self):
+        # Las conexiones de httpx pertenecen a un event loop: se crea un cliente por loop
+        return self._async_clients.get()
+
+    async def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            self._async_connections += 1
+
+    async def arequest(self, method, url, args, idempotent=False):
+        """
+        Versión asíncrona de request(). Lanza la excepción de httpx si falla.
+        """
+        client = self._get_async_client()
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        extensions = {"trace": self._trace}
+        for attempt in range(attempts):
+            self._count("requests")
+            try:
+                if method == "GET":
+                    r = await client.get(url, params=args, extensions=extensions)
+                else:
+                    r = await client.post(url, json=args, extensions=extensions)
+                if r.status_code in RETRY_STATUS and attempt + 1 < attempts:
+                    await self._aretry_wait(attempt, f"HTTP {r.status_code}", url)
+                    continue
+                r.raise_for_status()
+                return r.json()
+            except (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError) as e:
+                if attempt + 1 >= attempts:
+                    self._count("errors")
+                    raise
+                await self._aretry_wait(attempt, e, url)
+            except Exception:
+                self._count("errors")
+                raise
+
+    async def _aretry_wait(self, attempt, reason, url):
+        self._count("retries")
+        logging.warning("[http] Reintento %s para %s: %s", attempt + 1, url, reason)
+        await asyncio.sleep(self._backoff_delay(attempt))
+
+    async def aclose(self):
+        await self._async_clients.aclose()
+
+    def close(self):
+        self.session.close()
+        self._async_clients.close()
+
+    # --- Métricas ---
+
+    def _backoff_delay(self, attempt):
+        # Backoff exponencial con "full jitter"
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _sync_connections(self):
+        total = 0
+        # http:// y https:// comparten el mismo adaptador
+        adapters = {id(a): a for a in self.session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    total += pool.num_connections
+        return total
+
+    def stats(self):
+        connections = self._sync_connections() + self._async_connections
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "connections_opened": connections,
+            "connection_reuse": round(1 - connections / self.requests, 4) if self.requests else 0.0,
+            "pool_size": self.pool_size,
+        }
+
+
+_default_client = None
+
+
+def default_http_client():
+    """
+    Cliente compartido para agentes que no tienen uno asignado por el orquestador.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = ToolHttpClient()
+    return _default_client
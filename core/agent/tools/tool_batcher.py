@@ -0,0 +1,130 @@
+import asyncio
+import logging
+
+
+class ToolBatchError(Exception):
+    """Error de una operación dentro de una petición /batch del backend."""
+
+
+class ToolBatcher:
+    """
+    Agrupa en una sola petición POST <backend>/batch las llamadas a herramientas que se
+    lanzan a la vez: las tool calls de un turno (que se ejecutan en paralelo) y las de
+    turnos simultáneos. Cada llamada recibe su respuesta (o su error) como si hubiera hecho
+    su propia petición; si al enviar solo hay una, va a su endpoint de siempre.
+
+    Solo pasan por aquí las herramientas que lo declaran con "batch": true en "http"
+    (tools_schema.json), que son las de lectura: una escritura agrupada con llamadas de
+    otras sesiones dependería de su latencia. El backend ejecuta el lote con una conexión
+    y resuelve las lecturas por DNI con consultas IN (...) (ver /batch en server.py).
+    """
+    def __init__(self, http_client, max_operations=50, max_rounds=3):
+        """
+        Args:
+            http_client (ToolHttpClient): Cliente HTTP con pool compartido.
+            max_operations (int): Operaciones máximas por petición /batch.
+            max_rounds (int): Vueltas del event loop que se espera a que lleguen más
+                llamadas antes de enviar (se envía en cuanto una vuelta no añade ninguna).
+        """
+        self.http_client = http_client
+        self.max_operations = max_operations
+        self.max_rounds = max_rounds
+        self._loop = None
+        self._pending = []  # (http_info, args, future)
+        self._tasks = set()
+        self.calls = 0
+        self.requests = 0
+        self.batches = 0
+
+    async def call(self, http_info, args):
+        """
+        Encola la llamada y espera su respuesta.
+
+        Args:
+            http_info (dict): Método, URL e idempotencia de la herramienta (ToolRegistry.http_info()).
+            args (dict): Argumentos ya validados.
+
+        Returns:
+            dict: JSON de respuesta del endpoint. Lanza ToolBatchError si la operación falla
+            en el backend o la excepción de httpx si falla la petición.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._pending = loop, []
+        future = loop.create_future()
+        self._pending.append((http_info, args, future))
+        self.calls += 1
+        if len(self._pending) == 1:
+            loop.call_soon(self._flush, 1, 1)
+        return await future
+
+    def _flush(self, seen, rounds):
+        """
+        Envía las llamadas acumuladas cuando una vuelta del event loop no ha añadido
+        ninguna, tras max_rounds vueltas o al llegar a max_operations.
+        """
+        pending = self._pending
+        if len(pending) != seen and rounds < self.max_rounds and len(pending) < self.max_operations:
+            self._loop.call_soon(self._flush, len(pending), rounds + 1)
+            return
+        self._pending = []
+        # Cada backend (URL base) recibe su propio lote
+        by_backend = {}
+        for entry in pending:
+            by_backend.setdefault(entry[0]["url"].rsplit("/", 1)[0], []).append(entry)
+        for base_url, entries in by_backend.items():
+            for i in range(0, len(entries), self.max_operations):
+                task = asyncio.ensure_future(self._send(base_url, entries[i:i + self.max_operations]))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, base_url, entries):
+        self.requests += 1
+        if len(entries) == 1:
+            http_info, args, future = entries[0]
+            try:
+                out = await self.http_client.arequest(http_info["method"], http_info["url"], args,
+                                                      idempotent=http_info.get("idempotent", False))
+            except Exception as e:
+                _set(future, exception=e)
+            else:
+                _set(future, result=out)
+            return
+        self.batches += 1
+        operations = [
+            {"id": str(i), "tool": http_info["url"].rsplit("/", 1)[1], "args": args}
+            for i, (http_info, args, _) in enumerate(entries)
+        ]
+        idempotent = all(http_info.get("idempotent", False) for http_info, _, _ in entries)
+        logging.debug("[tool_batch] %s operaciones en %s/batch", len(operations), base_url, extra={"event": "tool_batch"})
+        try:
+            out = await self.http_client.arequest("POST", f"{base_url}/batch", {"operations": operations}, idempotent=idempotent)
+        except Exception as e:
+            for _, _, future in entries:
+                _set(future, exception=e)
+            return
+        results = out.get("results", {})
+        for i, (_, _, future) in enumerate(entries):
+            result = results.get(str(i)) or {"status": "error", "error": "sin resultado en la respuesta de /batch"}
+            if result.get("status") == "ok":
+                _set(future, result=result.get("response"))
+            else:
+                _set(future, exception=ToolBatchError(result.get("error")))
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_calls_per_request": round(self.calls / self.requests, 2) if self.requests else 0.0,
+        }
+
+
+def _set(future, result=None, exception=None):
+    # La llamada puede haberse cancelado (timeout de la herramienta) mientras esperaba
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
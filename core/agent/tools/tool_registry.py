@@ -0,0 +1,113 @@
+import re
+
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+from core.config.config import SERVER_URL
+from core.agent.tools.validation_messages import ValidationMessages
+
+
+def build_http_info(tool_schema, server_url=SERVER_URL):
+    """
+    Extrae método y endpoint del esquema de la herramienta, une server_url con el endpoint.
+    Una herramienta es idempotente (y por tanto reintentable) si usa GET, si es una lectura
+    cacheable ("cache": {"ttl": ...}) o si lo declara con "idempotent" en "http". Con
+    "batch": true en "http", sus llamadas simultáneas se agrupan en POST <backend>/batch.
+    """
+    if tool_schema and "http" in tool_schema["function"]:
+        http_info = tool_schema["function"]["http"]
+        method = http_info.get("method", "POST").upper()
+        endpoint = http_info.get("url", None)
+        if endpoint:
+            url = f"{server_url}{endpoint}"
+            cacheable = bool(tool_schema["function"].get("cache", {}).get("ttl"))
+            idempotent = http_info.get("idempotent", method == "GET" or cacheable)
+            return {"method": method, "url": url, "idempotent": idempotent, "batch": bool(http_info.get("batch"))}
+    # Fallback por compatibilidad
+    name = tool_schema["function"]["name"] if tool_schema else ""
+    return {"method": "POST", "url": f"{server_url}/{name}", "idempotent": False, "batch": False}
+
+
+class ToolRegistry:
+    """
+    Registro de herramientas construido una vez al arrancar a partir de tools_schema.json
+    y entity_patterns.json: esquemas por nombre, validadores jsonschema ya construidos,
+    patrones de formato compilados, método/URL HTTP de cada herramienta y la lista de
+    herramientas de cada agente. Así el camino de una tool call no lee ficheros ni
+    recompila nada por turno.
+    """
+    def __init__(self, tools_schema, entity_patterns=None, server_url=SERVER_URL, messages=None):
+        """
+        Args:
+            tools_schema (list): Herramientas en formato de function calling.
+            entity_patterns (dict, opcional): {argumento: regex} para validar formatos.
+            server_url (str): URL base del backend de herramientas.
+            messages (ValidationMessages, opcional): Mensajes de error de formato por entidad e idioma.
+        """
+        self.source = tools_schema
+        self.server_url = server_url
+        self.schemas = {}
+        self.validators = {}
+        self.http = {}
+        for tool in tools_schema:
+            name = tool["function"]["name"]
+            self.schemas[name] = tool
+            parameters = tool["function"].get("parameters")
+            if parameters:
+                cls = validator_for(parameters)
+                cls.check_schema(parameters)
+                self.validators[name] = cls(parameters)
+            self.http[name] = build_http_info(tool, server_url)
+        # La validación de formato distingue mayúsculas, igual que re.fullmatch sin flags
+        self.patterns = {arg: re.compile(pattern) for arg, pattern in (entity_patterns or {}).items()}
+        self.messages = messages or ValidationMessages()
+        self._agent_tools = {}
+
+    def get(self, name):
+        return self.schemas.get(name)
+
+    def tools_for(self, names):
+        """
+        Esquemas de las herramientas indicadas, en el orden de tools_schema.json.
+        La lista de cada agente se calcula una sola vez.
+        """
+        key = tuple(names)
+        tools = self._agent_tools.get(key)
+        if tools is None:
+            wanted = set(names)
+            tools = self._agent_tools[key] = [t for t in self.source if t["function"]["name"] in wanted]
+        return tools
+
+    def validate_args(self, name, args):
+        """
+        Valida los argumentos contra el esquema de la herramienta.
+        Returns:
+            str | None: Mensaje del error más relevante (el mismo que daría jsonschema.validate) o None.
+        """
+        validator = self.validators.get(name)
+        if validator is None:
+            return None
+        error = best_match(validator.iter_errors(args))
+        return error.message if error is not None else None
+
+    def validate_patterns(self, args, locale=None):
+        """
+        Comprueba el formato de los argumentos que tienen patrón de entidad.
+        Returns:
+            list: Mensajes de error (plantillas de validation_messages.json), vacía si todo es correcto.
+        """
+        errors = []
+        for arg_name, arg_value in args.items():
+            pattern = self.patterns.get(arg_name)
+            if pattern is not None and not pattern.fullmatch(str(arg_value)):
+                errors.append(self.messages.format(arg_name, arg_value, locale))
+        return errors
+
+    def http_info(self, name):
+        """
+        Método, URL e idempotencia precalculados de la herramienta.
+        """
+        info = self.http.get(name)
+        if info is None:
+            return {"method": "POST", "url": f"{self.server_url}/{name}", "idempotent": False}
+        return info
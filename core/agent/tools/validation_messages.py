@@ -0,0 +1,52 @@
+import json
+import logging
+
+DEFAULT_LOCALE = "es"
+DEFAULT_MESSAGE = "El valor '{value}' para '{field}' no cumple el formato requerido."
+
+
+class ValidationMessages:
+    """
+    Mensajes de error de formato por entidad y por idioma (validation_messages.json,
+    junto a entity_patterns.json). Cada mensaje es una plantilla con {field} y {value};
+    "default" cubre las entidades sin mensaje propio. Si el idioma pedido no tiene el
+    mensaje se usa el del idioma por defecto.
+    """
+    def __init__(self, config=None, locale=None):
+        """
+        Args:
+            config (dict, opcional): Contenido de validation_messages.json.
+            locale (str, opcional): Idioma a usar; por defecto el "locale" del fichero.
+        """
+        config = config or {}
+        self.default_locale = config.get("default_locale", DEFAULT_LOCALE)
+        self.locale = locale or config.get("locale") or self.default_locale
+        self.messages = config.get("messages", {})
+        # Redacción del error con el modelo: solo si se activa expresamente
+        self.llm_phrasing = config.get("llm_phrasing", False)
+
+    @classmethod
+    def from_file(cls, path, locale=None):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f), locale)
+        except FileNotFoundError:
+            return cls(locale=locale)
+        except Exception as e:
+            logging.warning("No se pudo cargar %s, usando mensajes de validación por defecto: %s", path, e)
+            return cls(locale=locale)
+
+    def _template(self, field, locale):
+        for loc in (locale, self.default_locale):
+            messages = self.messages.get(loc, {})
+            template = messages.get(field) or messages.get("default")
+            if template:
+                return template
+        return DEFAULT_MESSAGE
+
+    def format(self, field, value, locale=None):
+        """
+        Returns:
+            str: Mensaje de error de formato para el campo y el valor dados.
+        """
+        return self._template(field, locale or self.locale).format(field=field, value=value)
@@ -0,0 +1,88 @@
+import logging
+import sqlite3
+
+# Esquema base (el de demo.db). Se usa para crear bases de datos nuevas, p. ej. las
+# generadas por benchmarks/seed_db.py.
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS abonados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL,
+        dni TEXT UNIQUE NOT NULL,
+        direccion TEXT,
+        email TEXT,
+        telefono TEXT,
+        poliza TEXT UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS facturas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dni_abonado TEXT NOT NULL,
+        fecha DATE NOT NULL,
+        estado TEXT NOT NULL,
+        importe REAL NOT NULL,
+        FOREIGN KEY (dni_abonado) REFERENCES abonados(dni)
+    )""",
+    """CREATE TABLE IF NOT EXISTS incidencias (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER NOT NULL,
+        ubicacion TEXT NOT NULL,
+        descripcion TEXT NOT NULL,
+        estado TEXT NOT NULL,
+        FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+    )""",
+]
+
+# Migraciones numeradas; la versión aplicada se guarda en PRAGMA user_version.
+# abonados.dni y abonados.poliza ya tienen índice por su restricción UNIQUE.
+MIGRATIONS = [
+    # 1: índices para los filtros de los endpoints de facturación e incidencias
+    [
+        "CREATE INDEX IF NOT EXISTS idx_facturas_dni_estado_fecha ON facturas(dni_abonado, estado, fecha)",
+        "CREATE INDEX IF NOT EXISTS idx_incidencias_usuario_ubicacion ON incidencias(usuario_id, ubicacion)",
+        "CREATE INDEX IF NOT EXISTS idx_incidencias_estado ON incidencias(estado)",
+        "CREATE INDEX IF NOT EXISTS idx_incidencias_ubicacion ON incidencias(ubicacion)",
+        "CREATE INDEX IF NOT EXISTS idx_abonados_nombre ON abonados(nombre)",
+    ],
+]
+
+
+def migrate(db_path):
+    """
+    Crea el esquema si no existe y aplica las migraciones pendientes.
+
+    Args:
+        db_path (str): Ruta de la base de datos.
+
+    Returns:
+        int: Versión del esquema tras migrar.
+    """
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < len(MIGRATIONS):
+            # Con varios workers arrancando a la vez solo uno migra: BEGIN IMMEDIATE toma el
+            # bloqueo de escritura y la versión se vuelve a leer dentro de la transacción
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                    for statement in statements:
+                        conn.execute(statement)
+                    logging.info("[db] Migración %s aplicada en %s", number, db_path)
+                conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            # Estadísticas para que el planificador elija los índices nuevos
+            conn.execute("ANALYZE")
+        return len(MIGRATIONS)
+    finally:
+        conn.close()
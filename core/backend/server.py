@@ -1,102 +1,205 @@
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, HTTPException
+from fastapi.responses import PlainTextResponse
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
-import sqlite3
 import logging
 import os
+import time
+
+from core.backend.db import ConnectionPool
+from core.backend.migrations import migrate
+from core.config.config import config_manager
+from core.log import setup_logging
+from core.metrics import DB_ERRORS, DB_QUERY_SECONDS, observe_http, registry as metrics_registry
 
 app = FastAPI()
-# Usar ruta absoluta para la base de datos
-DB_PATH = os.path.join(os.path.dirname(__file__), "demo.db")
-
-# Configuración del logger
-log_dir = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
-os.makedirs(log_dir, exist_ok=True)
-logging.basicConfig(
-    filename=os.path.join(log_dir, "server.log"),
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Usar ruta absoluta para la base de datos (DB_PATH permite apuntar a otra, p. ej. en benchmarks)
+DB_PATH = os.getenv("DB_PATH", os.path.join(os.path.dirname(__file__), "demo.db"))
+# Crea el esquema/índices que falten antes de aceptar peticiones
+migrate(DB_PATH)
+# Una conexión reutilizable por hilo del threadpool en lugar de una por consulta
+db_pool = ConnectionPool(DB_PATH)
+# Operaciones máximas por petición a /batch
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "200"))
+
+# Logging JSON en logs/server.log, con el nivel de LOG_LEVEL y escritura en un hilo aparte
+setup_logging(config_manager.get_logging_config(), "server.log")
 
 @app.middleware("http")
 async def log_requests(request, call_next):
+    start = time.perf_counter()
     response = await call_next(request)
-    logging.info(f"{request.method} {request.url} - Status: {response.status_code}")
+    observe_http(request, response, time.perf_counter() - start)
+    logging.info("%s %s - Status: %s", request.method, request.url, response.status_code, extra={"event": "http_request"})
     return response
 
 def run_query(query, params=(), commit=False):
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        if commit:
-            conn.commit()
-        return cursor.fetchall()
+    operation = query.split(None, 1)[0].upper()
+    start = time.perf_counter()
+    try:
+        return db_pool.run_query(query, params, commit=commit)
+    except Exception:
+        DB_ERRORS.inc(operation)
+        raise
+    finally:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas del backend (peticiones HTTP y consultas SQLite) en formato Prometheus"""
+    if not metrics_registry.enabled:
+        raise HTTPException(status_code=404, detail="Métricas desactivadas (METRICS_ENABLED=false)")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
 # === ENDPOINTS DE CONSULTA ===
+# Los endpoints que tocan la base de datos son síncronos: FastAPI los ejecuta en su
+# threadpool y las consultas no bloquean el event loop.
+
+# Las lecturas por DNI se resuelven para un conjunto de DNIs con una sola consulta
+# (IN (...)): los endpoints de un DNI y /batch usan las mismas funciones.
+# Parámetros por sentencia IN (...), por debajo del límite de variables de SQLite
+IN_CHUNK = 500
+
+def _rows_by_key(query, keys):
+    """
+    Ejecuta la consulta (con {marks} en el IN) por bloques de claves y agrupa las filas por
+    su primera columna, conservando el orden de la consulta dentro de cada clave.
+
+    Args:
+        query (str): SQL cuya primera columna es la clave.
+        keys (list): Claves sin repetir.
+
+    Returns:
+        dict: {clave: [resto de columnas de cada fila]}.
+    """
+    rows = {}
+    for i in range(0, len(keys), IN_CHUNK):
+        chunk = keys[i:i + IN_CHUNK]
+        for row in run_query(query.format(marks=",".join("?" * len(chunk))), chunk):
+            rows.setdefault(row[0], []).append(row[1:])
+    return rows
+
+def _existe_abonado(dni):
+    return bool(run_query("SELECT 1 FROM abonados WHERE dni = ?", (dni,)))
+
+def _existe_abonados(dnis):
+    rows = _rows_by_key("SELECT dni FROM abonados WHERE dni IN ({marks})", dnis)
+    return {dni: {"existe": dni in rows} for dni in dnis}
+
+def _direcciones(dnis):
+    rows = _rows_by_key("SELECT dni, direccion FROM abonados WHERE dni IN ({marks})", dnis)
+    return {dni: {"direccion": rows[dni][0][0] if dni in rows else None} for dni in dnis}
+
+def _estados_pagos(dnis):
+    rows = _rows_by_key("SELECT dni_abonado, estado FROM facturas WHERE dni_abonado IN ({marks})", dnis)
+    return {dni: {"estados": [r[0] for r in rows.get(dni, [])]} for dni in dnis}
+
+def _ultimos_pagos(dnis):
+    # Con MAX(), SQLite toma las columnas sin agregar (importe) de la fila de la fecha máxima
+    rows = _rows_by_key(
+        "SELECT dni_abonado, MAX(fecha), importe FROM facturas "
+        "WHERE dni_abonado IN ({marks}) AND estado = 'Pagado' GROUP BY dni_abonado",
+        dnis
+    )
+    return {
+        dni: {"ultimo_pago": {"fecha": rows[dni][0][0], "importe": rows[dni][0][1]} if dni in rows else None}
+        for dni in dnis
+    }
+
+def _deudas(dnis):
+    rows = _rows_by_key(
+        "SELECT dni_abonado, SUM(importe) FROM facturas "
+        "WHERE dni_abonado IN ({marks}) AND estado != 'Pagado' GROUP BY dni_abonado",
+        dnis
+    )
+    return {dni: {"deuda": rows[dni][0][0] if dni in rows and rows[dni][0][0] else 0} for dni in dnis}
+
+def _facturas_pendientes(dnis):
+    rows = _rows_by_key(
+        "SELECT dni_abonado, fecha, estado, importe FROM facturas WHERE dni_abonado IN ({marks}) AND estado != 'Pagado'",
+        dnis
+    )
+    return {
+        dni: {"facturas": [{"fecha": r[0], "estado": r[1], "importe": r[2]} for r in rows.get(dni, [])]}
+        for dni in dnis
+    }
+
+def _todas_las_facturas(dnis):
+    rows = _rows_by_key(
+        "SELECT dni_abonado, id, fecha, estado, importe FROM facturas WHERE dni_abonado IN ({marks}) ORDER BY fecha DESC",
+        dnis
+    )
+    return {
+        dni: {"facturas": [{"identificador": r[0], "fecha": r[1], "estado": r[2], "importe": r[3]} for r in rows.get(dni, [])]}
+        for dni in dnis
+    }
+
+def _datos_abonados(dnis):
+    rows = _rows_by_key(
+        "SELECT dni, nombre, dni, direccion, email, telefono, poliza FROM abonados WHERE dni IN ({marks})",
+        dnis
+    )
+    return {dni: _datos_abonado_response(rows[dni][0]) if dni in rows else {"error": "Abonado no encontrado"} for dni in dnis}
+
+def _datos_abonado_response(row):
+    nombre, dni, direccion, correo, telefono, poliza = row
+    return {
+        "nombre": nombre,
+        "dni": dni,
+        "direccion": direccion,
+        "correo": correo,
+        "telefono": telefono,
+        "poliza": poliza
+    }
+
+def _incidencias_por_dnis(dnis):
+    # LEFT JOIN: sin filas -> el abonado no existe; ubicacion NULL -> no tiene incidencias
+    rows = _rows_by_key(
+        "SELECT a.dni, i.ubicacion, i.descripcion, i.estado FROM abonados a "
+        "LEFT JOIN incidencias i ON i.usuario_id = a.id WHERE a.dni IN ({marks}) ORDER BY i.id",
+        dnis
+    )
+    return {
+        dni: {"incidencias": [{"ubicacion": r[0], "descripcion": r[1], "estado": r[2]} for r in rows[dni] if r[0] is not None]}
+        if dni in rows else {"error": "No se encontró un abonado con el DNI proporcionado."}
+        for dni in dnis
+    }
 
 @app.post("/existe_abonado", operation_id="existe_abonado")
-async def existe_abonado(dni: str = Body(..., embed=True)):
-    result = run_query("SELECT 1 FROM abonados WHERE dni = ?", (dni,))
-    return {"existe": bool(result)}
+def existe_abonado(dni: str = Body(..., embed=True)):
+    return {"existe": _existe_abonado(dni)}
 
 @app.post("/direccion_abonado", operation_id="direccion_abonado")
-async def direccion_abonado(dni: str = Body(..., embed=True)):
-    result = run_query("SELECT direccion FROM abonados WHERE dni = ?", (dni,))
-    return {"direccion": result[0][0] if result else None}
+def direccion_abonado(dni: str = Body(..., embed=True)):
+    return _direcciones([dni])[dni]
 
 @app.post("/estado_pagos", operation_id="estado_pagos")
-async def estado_pagos(dni: str = Body(..., embed=True)):
-    result = run_query("SELECT estado FROM facturas WHERE dni_abonado = ?", (dni,))
-    return {"estados": [r[0] for r in result]}
+def estado_pagos(dni: str = Body(..., embed=True)):
+    return _estados_pagos([dni])[dni]
 
 @app.post("/ultimo_pago", operation_id="ultimo_pago")
-async def ultimo_pago(dni: str = Body(..., embed=True)):
-    result = run_query(
-        "SELECT fecha, importe FROM facturas WHERE dni_abonado = ? AND estado = 'Pagado' ORDER BY fecha DESC LIMIT 1",
-        (dni,)
-    )
-    return {"ultimo_pago": {"fecha": result[0][0], "importe": result[0][1]} if result else None}
+def ultimo_pago(dni: str = Body(..., embed=True)):
+    return _ultimos_pagos([dni])[dni]
 
 @app.post("/deuda_total", operation_id="deuda_total")
-async def deuda_total(dni: str = Body(..., embed=True)):
-    result = run_query(
-        "SELECT SUM(importe) FROM facturas WHERE dni_abonado = ? AND estado != 'Pagado'",
-        (dni,)
-    )
-    deuda = result[0][0] if result[0][0] else 0
-    return {"deuda": deuda}
+def deuda_total(dni: str = Body(..., embed=True)):
+    return _deudas([dni])[dni]
 
 @app.post("/facturas_pendientes", operation_id="facturas_pendientes")
-async def facturas_pendientes(dni: str = Body(..., embed=True)):
-    result = run_query(
-        "SELECT fecha, estado, importe FROM facturas WHERE dni_abonado = ? AND estado != 'Pagado'",
-        (dni,)
-    )
-    return {
-        "facturas": [
-            {
-                "fecha": r[0],
-                "estado": r[1],
-                "importe": r[2]
-            } for r in result
-        ]
-    }
+def facturas_pendientes(dni: str = Body(..., embed=True)):
+    return _facturas_pendientes([dni])[dni]
 
 @app.post("/todas_las_facturas", operation_id="todas_las_facturas")
-async def todas_las_facturas(dni: str = Body(..., embed=True)):
-    result = run_query(
-        "SELECT id,fecha, estado, importe FROM facturas WHERE dni_abonado = ? ORDER BY fecha DESC",
-        (dni,)
-    )
-    return {"facturas": [{"identificador":r[0],"fecha": r[1], "estado": r[2], "importe": r[3]} for r in result]}
+def todas_las_facturas(dni: str = Body(..., embed=True)):
+    return _todas_las_facturas([dni])[dni]
 
 class DatosAbonadoInput(BaseModel):
     dni: Optional[str] = None
     poliza: Optional[str] = None
 
 @app.post("/datos_abonado", operation_id="datos_abonado")
-async def datos_abonado(data: DatosAbonadoInput):
+def datos_abonado(data: DatosAbonadoInput):
     dni = data.dni
     poliza = data.poliza
 
@@ -104,71 +207,40 @@ async def datos_abonado(data: DatosAbonadoInput):
         return {"error": "Debe proporcionar un DNI o una póliza"}
 
     if dni:
-        result = run_query(
-            "SELECT nombre, dni, direccion, email, telefono, poliza FROM abonados WHERE dni = ?",
-            (dni,)
-        )
-    else:
-        result = run_query(
-            "SELECT nombre, dni, direccion, email, telefono, poliza FROM abonados WHERE poliza = ?",
-            (poliza,)
-        )
-
-    if result:
-        nombre, dni, direccion, correo, telefono, poliza = result[0]
-        return {
-            "nombre": nombre,
-            "dni": dni,
-            "direccion": direccion,
-            "correo": correo,
-            "telefono": telefono,
-            "poliza": poliza
-        }
-    else:
-        return {"error": "Abonado no encontrado"}
+        return _datos_abonados([dni])[dni]
+    result = run_query(
+        "SELECT nombre, dni, direccion, email, telefono, poliza FROM abonados WHERE poliza = ?",
+        (poliza,)
+    )
+    return _datos_abonado_response(result[0]) if result else {"error": "Abonado no encontrado"}
 
 @app.post("/crear_incidencia", operation_id="crear_incidencia")
-async def crear_incidencia(
+def crear_incidencia(
     dni: str = Body(..., embed=True),
     ubicacion: str = Body(..., embed=True),
     descripcion: str = Body(..., embed=True),
     estado: str = Body("Abierto", embed=True)
 ):
-    # Buscar el usuario_id usando el DNI
-    result = run_query("SELECT id FROM abonados WHERE dni = ?", (dni,))
-    if not result:
-        return {"error": "No se encontró un abonado con el DNI proporcionado."}
-
-    usuario_id = result[0][0]
-    
     # Capitalizar la primera letra de la ubicación
     ubicacion = ubicacion.strip().capitalize()
 
-    # Inserta la incidencia en la base de datos
-    run_query(
-        "INSERT INTO incidencias (usuario_id, ubicacion, descripcion, estado) VALUES (?, ?, ?, ?)",
-        (usuario_id, ubicacion, descripcion, estado),
+    # Inserta la incidencia resolviendo el usuario_id por DNI en la misma sentencia
+    result = run_query(
+        "INSERT INTO incidencias (usuario_id, ubicacion, descripcion, estado) "
+        "SELECT id, ?, ?, ? FROM abonados WHERE dni = ? RETURNING id",
+        (ubicacion, descripcion, estado, dni),
         commit=True
     )
-    return {"message": f"Incidencia creada exitosamente para el abonado con DNI {dni}"}
-
-@app.post("/incidencias_por_dni", operation_id="incidencias_por_dni")
-async def incidencias_por_dni(dni: str = Body(..., embed=True)):
-    
-    result = run_query("SELECT id FROM abonados WHERE dni = ?", (dni,))
     if not result:
         return {"error": "No se encontró un abonado con el DNI proporcionado."}
+    return {"message": f"Incidencia creada exitosamente para el abonado con DNI {dni}"}
 
-    usuario_id = result[0][0]
-
-    incidencias = run_query(
-        "SELECT ubicacion, descripcion, estado FROM incidencias WHERE usuario_id = ?",
-        (usuario_id,)
-    )
-    return {"incidencias": [{"ubicacion": r[0], "descripcion": r[1], "estado": r[2]} for r in incidencias]}
+@app.post("/incidencias_por_dni", operation_id="incidencias_por_dni")
+def incidencias_por_dni(dni: str = Body(..., embed=True)):
+    return _incidencias_por_dnis([dni])[dni]
 
 @app.post("/incidencias_por_nombre", operation_id="incidencias_por_nombre")
-async def incidencias_por_nombre(nombre: str = Body(..., embed=True)):
+def incidencias_por_nombre(nombre: str = Body(..., embed=True)):
     result = run_query(
         "SELECT ubicacion, descripcion, estado FROM incidencias WHERE usuario_id IN (SELECT id FROM abonados WHERE nombre = ?)",
         (nombre,)
@@ -178,62 +250,54 @@ async def incidencias_por_nombre(nombre: str = Body(..., embed=True)):
 
 
 @app.post("/actualizar_factura", operation_id="actualizar_estado_factura")
-async def actualizar_factura(
+def actualizar_factura(
     dni:str = Body(..., embed=True),
     identificador: int = Body(..., embed=True),
     nuevo_estado: str = Body(..., embed=True)   
 ):
-    # Buscar el usuario_id usando el DNI
-    result = run_query("SELECT id FROM abonados WHERE dni = ?", (dni,))
-    if not result:
-        return {"error": "No se encontró un abonado con el DNI proporcionado."}
-    usuario_id = result[0][0]
-    
     # Actualizar el estado de la última factura del abonado
-    run_query(
-        "UPDATE facturas SET estado = ? WHERE dni_abonado = ? AND id = ?",
+    result = run_query(
+        "UPDATE facturas SET estado = ? WHERE dni_abonado = ? AND id = ? RETURNING id",
         (nuevo_estado, dni,identificador),
         commit=True
     )
+    # Solo si no se actualizó nada se comprueba si el abonado existe
+    if not result and not _existe_abonado(dni):
+        return {"error": "No se encontró un abonado con el DNI proporcionado."}
     return {"¡Atención!": f"Estado de la última factura del abonado {dni} actualizado a '{nuevo_estado}'"}
 
 
 @app.post("/actualizar_estado_incidencia", operation_id="actualizar_estado_incidencia")
-async def actualizar_estado_incidencia(
+def actualizar_estado_incidencia(
     dni: str = Body(..., embed=True),
     ubicacion: str = Body(..., embed=True),
     nuevo_estado: str = Body(..., embed=True)
 ):
-    # Buscar el usuario_id usando el DNI
-    result = run_query("SELECT id FROM abonados WHERE dni = ?", (dni,))
-    if not result:
-        return {"error": "No se encontró un abonado con el DNI proporcionado."}
-    usuario_id = result[0][0]
     # Capitalizar la ubicación para evitar problemas de mayúsculas/minúsculas
     ubicacion = ubicacion.strip().capitalize()
-    # Busca la incidencia por usuario y ubicación
+    # Actualiza la última incidencia del abonado en esa ubicación en una sola sentencia
     incidencia = run_query(
-        "SELECT id FROM incidencias WHERE usuario_id = ? AND ubicacion = ? ORDER BY id DESC LIMIT 1",
-        (usuario_id, ubicacion)
+        "UPDATE incidencias SET estado = ? WHERE id = ("
+        "SELECT i.id FROM incidencias i JOIN abonados a ON a.id = i.usuario_id "
+        "WHERE a.dni = ? AND i.ubicacion = ? ORDER BY i.id DESC LIMIT 1) RETURNING id",
+        (nuevo_estado, dni, ubicacion),
+        commit=True
     )
     if not incidencia:
+        if not _existe_abonado(dni):
+            return {"error": "No se encontró un abonado con el DNI proporcionado."}
         return {"error": "No se encontró ninguna incidencia para el abonado en esa ubicación."}
     incidencia_id = incidencia[0][0]
-    run_query(
-        "UPDATE incidencias SET estado = ? WHERE id = ?",
-        (nuevo_estado, incidencia_id),
-        commit=True
-    )
     return {"¡Atención!": f"Estado de la incidencia {incidencia_id} del abonado {dni} actualizado a '{nuevo_estado}'"}
 
 @app.post("/incidencias_pendientes", operation_id="incidencias_pendientes")
-async def incidencias_pendientes():
+def incidencias_pendientes():
     # Devuelve solo las incidencias pendientes
     result = run_query("SELECT ubicacion, descripcion, estado FROM incidencias WHERE estado = 'Pendiente'")
     return {"incidencias": [{"ubicacion": r[0], "descripcion": r[1], "estado": r[2]} for r in result]}
 
 @app.post("/incidencias_por_ubicacion", operation_id="incidencias_por_ubicacion")
-async def incidencias_por_ubicacion(ubicacion: str = Body(..., embed=True)):
+def incidencias_por_ubicacion(ubicacion: str = Body(..., embed=True)):
     # Capitalizar solo la primera letra
     ubicacion = ubicacion.capitalize()
     result = run_query(
@@ -242,9 +306,142 @@ async def incidencias_por_ubicacion(ubicacion: str = Body(..., embed=True)):
     )
     return {"incidencias": [{"ubicacion": r[0], "descripcion": r[1], "estado": r[2]} for r in result]}
 
+# === CONSULTAS POR LOTES ===
+
+class BatchOperation(BaseModel):
+    id: Optional[str] = None
+    tool: str
+    args: Dict[str, Any] = {}
+
+class BatchInput(BaseModel):
+    operations: List[BatchOperation]
+
+# Lecturas por DNI con consulta de conjunto: endpoint -> función(lista de DNIs) -> {dni: respuesta}
+SET_TOOLS = {
+    "existe_abonado": _existe_abonados,
+    "direccion_abonado": _direcciones,
+    "estado_pagos": _estados_pagos,
+    "ultimo_pago": _ultimos_pagos,
+    "deuda_total": _deudas,
+    "facturas_pendientes": _facturas_pendientes,
+    "todas_las_facturas": _todas_las_facturas,
+    "datos_abonado": _datos_abonados,
+    "incidencias_por_dni": _incidencias_por_dnis,
+}
+
+# Endpoint de cada herramienta, para ejecutarla operación a operación: las que no están en
+# SET_TOOLS y las de SET_TOOLS con otros argumentos (igual que si se llamara a su endpoint)
+SINGLE_TOOLS = {
+    "existe_abonado": lambda args: existe_abonado(args["dni"]),
+    "direccion_abonado": lambda args: direccion_abonado(args["dni"]),
+    "estado_pagos": lambda args: estado_pagos(args["dni"]),
+    "ultimo_pago": lambda args: ultimo_pago(args["dni"]),
+    "deuda_total": lambda args: deuda_total(args["dni"]),
+    "facturas_pendientes": lambda args: facturas_pendientes(args["dni"]),
+    "todas_las_facturas": lambda args: todas_las_facturas(args["dni"]),
+    "incidencias_por_dni": lambda args: incidencias_por_dni(args["dni"]),
+    "datos_abonado": lambda args: datos_abonado(DatosAbonadoInput(**args)),
+    "crear_incidencia": lambda args: crear_incidencia(args["dni"], args["ubicacion"], args["descripcion"], args.get("estado", "Abierto")),
+    "incidencias_por_nombre": lambda args: incidencias_por_nombre(args["nombre"]),
+    "incidencias_por_ubicacion": lambda args: incidencias_por_ubicacion(args["ubicacion"]),
+    "incidencias_pendientes": lambda args: incidencias_pendientes(),
+    "actualizar_factura": lambda args: actualizar_factura(args["dni"], int(args["identificador"]), args["nuevo_estado"]),
+    "actualizar_estado_incidencia": lambda args: actualizar_estado_incidencia(args["dni"], args["ubicacion"], args["nuevo_estado"]),
+    "weather_foo": lambda args: _clima(args["direccion"]),
+}
+
+WRITE_TOOLS = {"crear_incidencia", "actualizar_factura", "actualizar_estado_incidencia"}
+
+def _set_key(operation):
+    """DNI de la operación si se puede resolver con la consulta de conjunto de su herramienta."""
+    dni = operation.args.get("dni")
+    if operation.tool in SET_TOOLS and isinstance(dni, str) and set(operation.args) == {"dni"}:
+        return dni
+    return None
+
+def _run_operation(operation, write=False):
+    """
+    Ejecuta una operación con el endpoint de su herramienta. Las escrituras van cada una en
+    su propia transacción: si una falla (o la base de datos está ocupada), solo falla ella.
+    """
+    tool = SINGLE_TOOLS.get(operation.tool)
+    if tool is None:
+        return {"status": "error", "error": f"Herramienta desconocida: {operation.tool}"}
+    try:
+        if not write:
+            return {"status": "ok", "response": tool(operation.args)}
+        with db_pool.transaction(immediate=True):
+            return {"status": "ok", "response": tool(operation.args)}
+    except KeyError as e:
+        return {"status": "error", "error": f"Falta el argumento {e}"}
+    except Exception as e:
+        logging.exception("[batch] Error en la operación %s", operation.tool)
+        return {"status": "error", "error": str(e)}
+
+@app.post("/batch", operation_id="batch")
+def batch(data: BatchInput):
+    """
+    Ejecuta varias operaciones {"id", "tool", "args"} (tool = nombre del endpoint) en una
+    petición y con una conexión. Las lecturas por DNI de una misma herramienta se resuelven
+    con una única consulta IN (...); el resto se ejecuta operación a operación en el orden
+    recibido. Las lecturas entre dos escrituras comparten una transacción de lectura y cada
+    escritura tiene la suya, así que ninguna lectura ve una escritura posterior a ella y
+    el fallo de una escritura no afecta al resto del lote.
+    Devuelve {"results": {id: {"status": "ok", "response": ...} | {"status": "error", "error": ...}}};
+    sin id, el id de una operación es su posición.
+    """
+    if len(data.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BATCH_MAX_OPERATIONS} operaciones por lote (BATCH_MAX_OPERATIONS)")
+    ids = [operation.id if operation.id is not None else str(i) for i, operation in enumerate(data.operations)]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Ids de operación repetidos")
+
+    results = {}
+    pending = {}  # herramienta -> [(id, dni)]
+
+    def resolve_pending():
+        for tool, operations in pending.items():
+            try:
+                found = SET_TOOLS[tool](list(dict.fromkeys(dni for _, dni in operations)))
+                for op_id, dni in operations:
+                    results[op_id] = {"status": "ok", "response": found[dni]}
+            except Exception as e:
+                logging.exception("[batch] Error en la consulta de conjunto de %s", tool)
+                for op_id, _ in operations:
+                    results[op_id] = {"status": "error", "error": str(e)}
+        pending.clear()
+
+    reads = []
+
+    def run_reads():
+        if not reads:
+            return
+        with db_pool.transaction():
+            for op_id, operation in reads:
+                dni = _set_key(operation)
+                if dni is not None:
+                    pending.setdefault(operation.tool, []).append((op_id, dni))
+                else:
+                    results[op_id] = _run_operation(operation)
+            resolve_pending()
+        reads.clear()
+
+    for op_id, operation in zip(ids, data.operations):
+        if operation.tool in WRITE_TOOLS:
+            run_reads()
+            results[op_id] = _run_operation(operation, write=True)
+        else:
+            reads.append((op_id, operation))
+    run_reads()
+    logging.info("[batch] %s operaciones", len(ids), extra={"event": "batch"})
+    return {"results": {op_id: results[op_id] for op_id in ids}}
+
+def _clima(direccion):
+    return {"clima": f"35 grados despejado en {direccion}"}
+
 @app.post("/weather_foo", operation_id="weather_foo")
 async def weather_foo(direccion: str = Body(..., embed=True)):
-    return {"clima": f"35 grados despejado en {direccion}"}
+    return _clima(direccion)
 
 @app.get("/herramientas_disponibles", operation_id="herramientas_disponibles")
 async def herramientas_disponibles():
@@ -263,5 +460,6 @@ async def herramientas_disponibles():
         {"endpoint": "/incidencias_por_ubicacion", "descripcion": "Consulta todas las incidencias registradas en una ubicación específica."},
         {"endpoint": "/actualizar_estado_incidencia", "descripcion": "Actualiza el estado de una incidencia por ID."},
         {"endpoint": "/incidencias_pendientes", "descripcion": "Muestra todas las incidencias pendientes."},
-        {"endpoint": "/weather_foo", "descripcion": "Devuelve un clima simulado para una dirección."}
+        {"endpoint": "/weather_foo", "descripcion": "Devuelve un clima simulado para una dirección."},
+        {"endpoint": "/batch", "descripcion": "Ejecuta varias operaciones (herramienta y argumentos) en una sola petición."}
     ]
@@ -43,7 +43,151 @@ class ConfigManager:
             "debug": os.getenv("DEBUG", "false").lower() == "true",
             "cors_origins": os.getenv("CORS_ORIGINS", "*").split(",")
         }
-    
+
+    def get_session_config(self) -> Dict[str, Any]:
+        """Get conversation session store configuration"""
+        return {
+            "backend": os.getenv("SESSION_BACKEND", "memory"),
+            "db_path": os.getenv("SESSION_DB_PATH", str(self.base_path / "data" / "sessions.db")),
+            "max_sessions": int(os.getenv("SESSION_MAX", "100000")),
+            "ttl": float(os.getenv("SESSION_TTL", "1800"))
+        }
+
+    def get_cache_config(self) -> Dict[str, Any]:
+        """Get router decision and tool response cache configuration"""
+        return {
+            "enabled": os.getenv("CACHE_ENABLED", "true").lower() == "true",
+            "backend": os.getenv("CACHE_BACKEND", "memory"),
+            "db_path": os.getenv("SHARED_STORE_PATH", str(self.base_path / "data" / "shared.db")),
+            "router_max_entries": int(os.getenv("ROUTER_CACHE_SIZE", "10000")),
+            "router_ttl": float(os.getenv("ROUTER_CACHE_TTL", "3600")),
+            "tool_max_entries": int(os.getenv("TOOL_CACHE_SIZE", "10000"))
+        }
+
+    def get_http_config(self) -> Dict[str, Any]:
+        """Get pooled HTTP client configuration for tool endpoints"""
+        return {
+            "pool_size": int(os.getenv("HTTP_POOL_SIZE", "20")),
+            "connect_timeout": float(os.getenv("HTTP_CONNECT_TIMEOUT", "3")),
+            "read_timeout": float(os.getenv("HTTP_READ_TIMEOUT", os.getenv("TOOL_TIMEOUT", "30"))),
+            "max_retries": int(os.getenv("HTTP_MAX_RETRIES", "2")),
+            "backoff": float(os.getenv("HTTP_RETRY_BACKOFF", "0.1"))
+        }
+
+    def get_tool_batch_config(self) -> Dict[str, Any]:
+        """Get tool call batching configuration (POST /batch on the backend)"""
+        return {
+            "enabled": os.getenv("TOOL_BATCH_ENABLED", "true").lower() == "true",
+            "max_operations": int(os.getenv("TOOL_BATCH_MAX", "50"))
+        }
+
+    def get_reload_config(self) -> Dict[str, Any]:
+        """Get client_config hot reload configuration"""
+        return {
+            "enabled": os.getenv("CONFIG_RELOAD", "false").lower() == "true",
+            "interval": float(os.getenv("CONFIG_RELOAD_INTERVAL", "2")),
+            "debounce": float(os.getenv("CONFIG_RELOAD_DEBOUNCE", "0.2"))
+        }
+
+    def get_prompt_config(self) -> Dict[str, Any]:
+        """Get flexible-mode prompt budget configuration"""
+        return {
+            "max_input_tokens": int(os.getenv("PROMPT_MAX_TOKENS", "2000")),
+            "default_max_rows": int(os.getenv("PROMPT_MAX_ROWS", "20")),
+            "history_messages": int(os.getenv("PROMPT_HISTORY_MESSAGES", "2"))
+        }
+
+    def get_provider_config(self) -> Dict[str, Any]:
+        """Get LLM provider configuration (groq, openai-compatible or fake)"""
+        provider = os.getenv("LLM_PROVIDER", "groq").lower()
+        pool_size = int(os.getenv("LLM_POOL_SIZE", "20"))
+        if provider == "openai":
+            return {
+                "provider": provider,
+                "api_key": os.getenv("OPENAI_API_KEY"),
+                "base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+                "pool_size": pool_size,
+                "timeout": float(os.getenv("LLM_TIMEOUT", "60"))
+            }
+        if provider == "fake":
+            latency = os.getenv("LLM_FAKE_LATENCY")
+            return {
+                "provider": provider,
+                "script": os.getenv("LLM_FAKE_SCRIPT") or None,
+                "latency": float(latency) if latency else None
+            }
+        return {
+            "provider": provider,
+            "api_key": os.getenv("GROQ_API_KEY"),
+            "base_url": os.getenv("GROQ_BASE_URL") or None,
+            "pool_size": pool_size
+        }
+
+    def get_llm_pool_config(self) -> Dict[str, Any]:
+        """Get shared LLM client pool and rate limit configuration"""
+        # LLM_MODEL_CONCURRENCY: "modelo=4,otro-modelo=8"
+        model_concurrency = {}
+        for item in os.getenv("LLM_MODEL_CONCURRENCY", "").split(","):
+            if "=" in item:
+                model, limit = item.rsplit("=", 1)
+                model_concurrency[model.strip()] = int(limit)
+        return {
+            "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+            "model_concurrency": model_concurrency,
+            "rpm": int(os.getenv("LLM_RPM", "0")),
+            "tpm": int(os.getenv("LLM_TPM", "0")),
+            "max_queue": int(os.getenv("LLM_MAX_QUEUE", "200")),
+            "queue_timeout": float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+            "cooldown": float(os.getenv("LLM_429_COOLDOWN", "5")),
+            "backend": os.getenv("LLM_LIMIT_BACKEND", "memory"),
+            "db_path": os.getenv("SHARED_STORE_PATH", str(self.base_path / "data" / "shared.db"))
+        }
+
+    def get_speculation_config(self) -> Dict[str, Any]:
+        """Get speculative routing configuration"""
+        return {
+            "enabled": os.getenv("SPECULATIVE_ROUTING", "false").lower() == "true",
+            "min_confidence": float(os.getenv("SPECULATIVE_MIN_CONFIDENCE", "0"))
+        }
+
+    def get_batch_config(self) -> Dict[str, Any]:
+        """Get batch chat configuration (/api/chat/batch and the JSONL CLI)"""
+        return {
+            "concurrency": int(os.getenv("BATCH_CONCURRENCY", "8")),
+            "max_items": int(os.getenv("BATCH_MAX_ITEMS", "1000")),
+            "dedupe": os.getenv("BATCH_DEDUPE", "false").lower() == "true"
+        }
+
+    def get_logging_config(self) -> Dict[str, Any]:
+        """Get structured logging configuration"""
+        # LOG_SAMPLE: "evento=0.1,httpx=0.5" (proporción de registros que se conservan)
+        sample = {}
+        for item in os.getenv("LOG_SAMPLE", "").split(","):
+            if "=" in item:
+                name, rate = item.rsplit("=", 1)
+                sample[name.strip()] = float(rate)
+        return {
+            "level": os.getenv("LOG_LEVEL", "INFO").upper(),
+            "format": os.getenv("LOG_FORMAT", "json"),
+            "output": os.getenv("LOG_OUTPUT", "file"),
+            "dir": os.getenv("LOG_DIR", str(self.base_path / "logs")),
+            "queue": os.getenv("LOG_QUEUE", "true").lower() == "true",
+            "sample": sample
+        }
+
+    def get_metrics_config(self) -> Dict[str, Any]:
+        """Get Prometheus metrics configuration"""
+        return {
+            "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+            "namespace": os.getenv("METRICS_NAMESPACE", "promptbridge")
+        }
+
+    def get_validation_config(self) -> Dict[str, Any]:
+        """Get argument validation message configuration"""
+        return {
+            "locale": os.getenv("LOCALE", "")
+        }
+
     def get_client_config(self, config_name: str) -> Dict[str, Any]:
         """
         Load client-specific configuration from JSON files
@@ -113,11 +257,15 @@ class ConfigManager:
         """Get tools configuration"""
         default_tools = {
             "tools": [],
-            "tool_timeout": 30,
-            "max_tool_calls": 5
+            "tool_timeout": float(os.getenv("TOOL_TIMEOUT", "30")),
+            "max_tool_calls": int(os.getenv("MAX_TOOL_CALLS", "5")),
+            "max_parallel_tools": int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
         }
         
         tools = self.get_client_config("tools_schema")
+        # tools_schema.json puede ser directamente la lista de herramientas
+        if isinstance(tools, list):
+            tools = {"tools": tools}
         return {**default_tools, **tools}
     
     def get_entity_patterns(self) -> Dict[str, Any]:
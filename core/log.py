@@ -0,0 +1,129 @@
+"""
+Logging estructurado (JSON lines) y no bloqueante para el servicio web y el backend.
+
+setup_logging() configura el logger raíz una sola vez por proceso:
+  - Nivel desde LOG_LEVEL (INFO por defecto): las llamadas por debajo del nivel se
+    descartan en logging.debug() sin crear el registro ni formatear nada.
+  - Formato perezoso: el código llama a logging con "%s" y argumentos, nunca con
+    f-strings; el mensaje (y el repr de los objetos) se construye solo si el registro se
+    escribe, y en el hilo del QueueListener, no en el de la petición.
+  - Muestreo: los eventos de mucho volumen se marcan con extra={"event": ...} y
+    LOG_SAMPLE ("evento=proporción,...") decide qué fracción se conserva; los registros
+    sin evento se muestrean por nombre de logger (p. ej. "httpx=0.1"). WARNING y
+    superiores no se muestrean nunca.
+  - QueueHandler/QueueListener: la petición solo encola el registro; la escritura en
+    fichero (o stderr) la hace un hilo aparte.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Atributos propios de LogRecord; el resto de claves de extra= son campos estructurados
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea con ts, level, logger, msg y los campos de extra=."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Conserva solo una fracción de los registros de cada evento (o logger) muestreado.
+    """
+    def __init__(self, rates, seed=None):
+        """
+        Args:
+            rates (dict): {evento o logger: proporción entre 0 y 1}.
+            seed (int, opcional): Semilla, para muestreos reproducibles.
+        """
+        super().__init__()
+        self.rates = rates
+        self._random = random.Random(seed).random
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None) or record.name)
+        return rate is None or self._random() < rate
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # QueueHandler.prepare() formatea el mensaje en el hilo que llama; aquí se encola
+        # el registro tal cual y el formato se hace en el QueueListener
+        return record
+
+
+def setup_logging(config, filename):
+    """
+    Configura el logger raíz del proceso (solo la primera vez que se llama).
+
+    Args:
+        config (dict): Configuración de config_manager.get_logging_config().
+        filename (str): Fichero dentro de config["dir"] cuando la salida es "file".
+    Returns:
+        logging.handlers.QueueListener | None: El listener en marcha, si se usa cola.
+    """
+    global _listener
+    root = logging.getLogger()
+    if getattr(root, "_promptbridge_configured", False):
+        return _listener
+    root._promptbridge_configured = True
+
+    if config.get("output", "file") == "stderr":
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        os.makedirs(config["dir"], exist_ok=True)
+        handler = logging.FileHandler(os.path.join(config["dir"], filename), encoding="utf-8")
+    if config.get("format", "json") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+
+    if config.get("queue", True):
+        front = _LazyQueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(front.queue, handler, respect_handler_level=False)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        front = handler
+    rates = config.get("sample") or {}
+    if rates:
+        front.addFilter(SamplingFilter(rates))
+
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(front)
+    root.setLevel(config.get("level", "INFO"))
+    return _listener
+
+
+def stop_logging():
+    """Escribe los registros pendientes de la cola y detiene el QueueListener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,155 @@
+"""
+Métricas del proceso en formato de texto de Prometheus.
+
+Registro mínimo (sin dependencias) de contadores e histogramas con etiquetas, compartido
+por todo el proceso y publicado en GET /metrics de web/main.py y de core/backend/server.py.
+Con METRICS_ENABLED=false las métricas se crean como objetos nulos: observe() e inc() no
+hacen nada y /metrics responde 404.
+"""
+
+import bisect
+import threading
+
+from core.config.config import config_manager
+
+# Límites (segundos) por defecto de los histogramas de latencia
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values = {}  # etiquetas -> [cuentas por intervalo (+Inf al final), suma]
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(label_values)
+            if data is None:
+                data = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            data[0][index] += 1
+            data[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+        for label_values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+class _NullMetric:
+    """Métrica desactivada: mismo interfaz, sin coste."""
+    def observe(self, value, *label_values):
+        pass
+
+    def inc(self, *label_values, amount=1):
+        pass
+
+
+_NULL = _NullMetric()
+
+
+class MetricsRegistry:
+    def __init__(self, config=None):
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.namespace = config.get("namespace", "promptbridge")
+        self._metrics = []
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(f"{self.namespace}_{name}", help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(f"{self.namespace}_{name}", help_text, labels, buckets))
+
+    def _register(self, metric):
+        if not self.enabled:
+            return _NULL
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Returns:
+            str: Todas las métricas registradas en el formato de texto de Prometheus.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Registro del proceso y métricas del pipeline
+registry = MetricsRegistry(config_manager.get_metrics_config())
+
+# Web: turnos, etapas, modelo y herramientas
+TURN_SECONDS = registry.histogram("turn_seconds", "Duración de un turno completo del orquestador", ("mode",))
+STAGE_SECONDS = registry.histogram("stage_seconds", "Duración de cada etapa del turno", ("stage",))
+ERRORS = registry.counter("errors_total", "Errores por etapa del turno", ("stage",))
+LLM_SECONDS = registry.histogram("llm_request_seconds", "Duración de las llamadas al modelo", ("model",))
+LLM_TOKENS = registry.counter("llm_tokens_total", "Tokens según el campo usage del proveedor", ("model", "type"))
+LLM_ERRORS = registry.counter("llm_errors_total", "Llamadas al modelo fallidas", ("model", "status"))
+TOOL_SECONDS = registry.histogram("tool_seconds", "Duración de las llamadas a herramientas del backend", ("tool",))
+TOOL_ERRORS = registry.counter("tool_errors_total", "Llamadas a herramientas fallidas", ("tool", "error"))
+
+# Servidores HTTP (web y backend) y base de datos del backend
+HTTP_SECONDS = registry.histogram("http_request_seconds", "Duración de las peticiones HTTP", ("method", "route", "status"))
+DB_QUERY_SECONDS = registry.histogram("db_query_seconds", "Duración de las consultas SQLite", ("operation",))
+DB_ERRORS = registry.counter("db_errors_total", "Consultas SQLite fallidas", ("operation",))
+
+
+def observe_http(request, response, seconds):
+    """
+    Registra una petición HTTP etiquetada con la ruta de FastAPI (no con la URL, para no
+    crear una serie por cada valor de los parámetros).
+    """
+    route = request.scope.get("route")
+    HTTP_SECONDS.observe(seconds, request.method, getattr(route, "path", "unmatched"), str(response.status_code))
@@ -0,0 +1,28 @@
+# Configuración de gunicorn para el servicio web con varios workers por nodo:
+#   gunicorn -c deployment/gunicorn.conf.py web.main:app
+# Cada worker es un proceso con su propio orquestador; las sesiones, las cachés y los
+# límites del proveedor se comparten con SESSION_BACKEND, CACHE_BACKEND y
+# LLM_LIMIT_BACKEND = sqlite (ver "Varios workers y réplicas" en el README).
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Cada worker importa la aplicación por su cuenta: los clientes HTTP, las conexiones
+# SQLite y los hilos (recarga de configuración, logging) no sobreviven a un fork
+preload_app = False
+
+# Las respuestas del modelo pueden tardar; /api/chat/stream mantiene la conexión abierta
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 60
+
+# Reinicio periódico de workers para acotar la memoria (con variación para no reiniciarlos a la vez)
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
@@ -1,27 +1,50 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Union
 import json
 import os
 import sys
+import time
+import uuid
 import uvicorn
 
 # Agregar el directorio raíz al path para los imports
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from core.agent.agent import responder
+from core.agent.agent import aresponder, astream_responder, get_stats as get_agent_stats
+from core.agent.batch import BatchRunner, normalize_items
+from core.agent.llm_pool import LLMOverloaded
+from core.config.config import config_manager
+from core.metrics import observe_http, registry as metrics_registry
 
 app = FastAPI(title="Agente Cliente", description="Asistente virtual personalizado")
 
 # Servir archivos estáticos
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
 
+if metrics_registry.enabled:
+    @app.middleware("http")
+    async def measure_requests(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        observe_http(request, response, time.perf_counter() - start)
+        return response
+
 class ChatRequest(BaseModel):
     message: str
     user_role: str = "cliente"
     mode: str = "rigido"
+    session_id: Optional[str] = None
+
+class BatchItem(ChatRequest):
+    id: Optional[Union[str, int]] = None
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    concurrency: Optional[int] = None
+    dedupe: Optional[bool] = None
 
 class ChatResponse(BaseModel):
     type: str
@@ -29,6 +52,7 @@ class ChatResponse(BaseModel):
     agent: Optional[str] = None
     results: Optional[List] = None
     error: Optional[str] = None
+    session_id: Optional[str] = None
 
 @app.get("/", response_class=HTMLResponse)
 async def serve_frontend():
@@ -57,12 +81,83 @@ async def chat(request: ChatRequest):
     """Endpoint principal del chat - usa tu lógica actual"""
     if not request.message:
         raise HTTPException(status_code=400, detail="Mensaje requerido")
+    session_id = request.session_id or uuid.uuid4().hex
     try:
-        response = responder(request.message, request.user_role, request.mode)
+        response = await aresponder(request.message, request.user_role, request.mode, session_id=session_id)
+        if isinstance(response, dict):
+            response["session_id"] = session_id
         return response
+    except LLMOverloaded as e:
+        # Backpressure: el cliente puede reintentar en lugar de provocar más 429 del proveedor
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error procesando consulta: {str(e)}")
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Igual que /api/chat pero en Server-Sent Events: emite el agente elegido, el progreso
+    de las herramientas y los tokens de la respuesta según se generan. El último evento
+    ("done") lleva la respuesta completa con el mismo formato que /api/chat.
+    """
+    if not request.message:
+        raise HTTPException(status_code=400, detail="Mensaje requerido")
+    session_id = request.session_id or uuid.uuid4().hex
+
+    async def events():
+        yield _sse({"event": "session", "session_id": session_id})
+        async for event in astream_responder(request.message, request.user_role, request.mode, session_id=session_id):
+            if event["event"] == "done" and isinstance(event["response"], dict):
+                event["response"]["session_id"] = session_id
+            yield _sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/chat/batch")
+async def chat_batch(request: BatchRequest):
+    """
+    Procesa un lote de mensajes (ver core/agent/batch.py) con concurrencia acotada y
+    devuelve los resultados en JSON Lines según terminan, cada uno con el id de su
+    elemento. Tras una desconexión, el cliente reenvía solo los id que no recibió.
+    """
+    batch_config = config_manager.get_batch_config()
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Lote vacío")
+    if len(request.items) > batch_config["max_items"]:
+        raise HTTPException(status_code=413, detail=f"Máximo {batch_config['max_items']} elementos por lote (BATCH_MAX_ITEMS)")
+    runner = BatchRunner(
+        aresponder,
+        # El cliente puede pedir menos concurrencia, no más que BATCH_CONCURRENCY
+        concurrency=min(request.concurrency or batch_config["concurrency"], batch_config["concurrency"]),
+        dedupe=batch_config["dedupe"] if request.dedupe is None else request.dedupe
+    )
+    items = normalize_items(item.model_dump() for item in request.items)
+
+    async def lines():
+        async for result in runner.run(items):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _sse(event):
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+@app.get("/api/stats")
+async def get_stats():
+    """Métricas internas del orquestador (enrutado local, sesiones...)"""
+    return get_agent_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas del proceso (etapas del turno, modelo, herramientas, HTTP) en formato Prometheus"""
+    if not metrics_registry.enabled:
+        raise HTTPException(status_code=404, detail="Métricas desactivadas (METRICS_ENABLED=false)")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/health")
 async def health_check():
     """Health check para monitoring"""
@@ -87,10 +182,13 @@ if __name__ == "__main__":
     print("🔧 API: http://localhost:8080/docs")
     print("❤️  Health check: http://localhost:8080/api/health")
     
+    # WEB_WORKERS > 1: varios procesos; sesiones, cachés y límites deben usar el backend
+    # sqlite (ver "Varios workers y réplicas" en el README) para compartirse entre ellos
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8080,
         reload=False,
+        workers=int(os.getenv("WEB_WORKERS", "1")),
         log_level="info"
     )
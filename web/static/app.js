@@ -11,6 +11,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // --- Estado de la aplicación ---
     let currentMode = "rígido"; // Modo inicial
+    let sessionId = null; // Identificador de la conversación, lo asigna el servidor
 
     // --- Manejador del botón limpiar chat ---
     clearChatButton.addEventListener('click', () => {
@@ -84,33 +85,40 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     /**
-     * Obtiene una respuesta del backend.
+     * Actualiza el texto de progreso bajo el indicador de "escribiendo...".
+     * @param {string} text - Estado a mostrar (agente elegido, herramienta en curso...).
+     */
+    function setBotStatus(text) {
+        const typingIndicator = document.getElementById('typing-indicator');
+        if (!typingIndicator) return;
+        let status = typingIndicator.querySelector('.typing-status');
+        if (!status) {
+            status = document.createElement('small');
+            status.className = 'typing-status';
+            typingIndicator.querySelector('.message-bubble').appendChild(status);
+        }
+        status.textContent = text;
+        scrollToBottom();
+    }
+
+    /**
+     * Obtiene una respuesta del backend. Usa el endpoint en streaming si el navegador
+     * lo soporta y recurre a /api/chat en caso contrario.
      * @param {string} userMessage - El mensaje del usuario.
      */
     async function getBotResponse(userMessage) {
+        const payload = {
+            message: userMessage,
+            user_role: userRoleSelect.value,
+            mode: currentMode, // Enviamos el modo actual al backend
+            session_id: sessionId
+        };
         try {
-            const selectedRole = userRoleSelect.value;
-            
-            const response = await fetch('/api/chat', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    message: userMessage,
-                    user_role: selectedRole,
-                    mode: currentMode // Enviamos el modo actual al backend
-                })
-            });
-
-            if (!response.ok) {
-                throw new Error(`Error HTTP: ${response.status}`);
+            if (window.ReadableStream && window.TextDecoder) {
+                await streamBotResponse(payload);
+            } else {
+                await fetchBotResponse(payload);
             }
-
-            const data = await response.json();
-            hideBotTyping();
-            handleResponse(data);
-
         } catch (error) {
             console.error('Error enviando mensaje:', error);
             hideBotTyping();
@@ -118,6 +126,108 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    /**
+     * Petición clásica: espera la respuesta completa.
+     * @param {object} payload - Cuerpo de la petición.
+     */
+    async function fetchBotResponse(payload) {
+        const response = await fetch('/api/chat', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(payload)
+        });
+
+        if (!response.ok) {
+            throw new Error(`Error HTTP: ${response.status}`);
+        }
+
+        const data = await response.json();
+        if (data.session_id) {
+            sessionId = data.session_id;
+        }
+        hideBotTyping();
+        handleResponse(data);
+    }
+
+    /**
+     * Petición en streaming (Server-Sent Events sobre fetch): muestra el progreso y los
+     * tokens de la respuesta según llegan.
+     * @param {object} payload - Cuerpo de la petición.
+     */
+    async function streamBotResponse(payload) {
+        const response = await fetch('/api/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(payload)
+        });
+
+        if (!response.ok || !response.body) {
+            return fetchBotResponse(payload);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const stream = { bubble: null, finished: false };
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const frames = buffer.split('\n\n');
+            buffer = frames.pop();
+            for (const frame of frames) {
+                if (frame.startsWith('data: ')) {
+                    handleStreamEvent(JSON.parse(frame.slice(6)), stream);
+                }
+            }
+        }
+        if (!stream.finished) {
+            throw new Error('Respuesta en streaming incompleta');
+        }
+    }
+
+    /**
+     * Procesa un evento del streaming.
+     * @param {object} event - Evento recibido del servidor.
+     * @param {object} stream - Estado del mensaje en curso.
+     */
+    function handleStreamEvent(event, stream) {
+        if (event.event === 'session') {
+            sessionId = event.session_id;
+        } else if (event.event === 'route') {
+            setBotStatus(event.agent ? `Consultando ${event.agent}...` : 'Pensando...');
+        } else if (event.event === 'tool') {
+            setBotStatus(`${event.status === 'ok' ? '✅' : '⚠️'} ${event.tool}`);
+        } else if (event.event === 'token') {
+            if (!stream.bubble) {
+                hideBotTyping();
+                displayMessage('', 'bot');
+                stream.bubble = chatWindow.lastElementChild.querySelector('.message-bubble');
+            }
+            stream.bubble.textContent += event.delta;
+            scrollToBottom();
+        } else if (event.event === 'done') {
+            stream.finished = true;
+            hideBotTyping();
+            const data = event.response;
+            if (stream.bubble && data.type === 'chat') {
+                // El texto ya se ha mostrado; se sustituye por la versión final
+                stream.bubble.textContent = data.response || 'No se recibió respuesta';
+            } else {
+                if (stream.bubble) stream.bubble.parentElement.remove();
+                handleResponse(data);
+            }
+        } else if (event.event === 'error') {
+            stream.finished = true;
+            hideBotTyping();
+            displayMessage(`❌ Error: ${event.error}`, 'bot');
+        }
+    }
+
     /**
      * Maneja la respuesta del backend.
      * @param {object} data - Los datos de respuesta del servidor.
@@ -165,6 +275,7 @@ document.addEventListener('DOMContentLoaded', () => {
      */
     function clearChat() {
         chatWindow.innerHTML = '';
+        sessionId = null; // Nueva conversación
         setTimeout(() => {
             displayMessage('🧹 Chat limpiado correctamente', 'bot');
         }, 100);